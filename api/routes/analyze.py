@@ -9,23 +9,29 @@ from workers.tasks import (
     clean_data_task,
     remove_duplicates_task
 )
+from services.artifact_cache import artifact_cache
+from core.grouping import read_group_page
+from core.validation import ValidationEngine
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, Dict, Any, List
 import uuid
 
 router = APIRouter(prefix="/analyze", tags=["analyze"])
 
 class AnalyzeRequest(BaseModel):
     file_id: str
+    time_budget: Optional[float] = None  # ثانیه؛ پیش‌فرض ANALYSIS_TIME_BUDGET
 
 class CleanDataRequest(BaseModel):
     file_id: str
     strategy: str = "drop"  # drop, fill, flag
+    checks: Optional[List[str]] = None  # پیش‌فرض ValidationEngine.ERROR_CHECKS؛ 'outliers' فقط با ذکر صریح
 
 class DeduplicateRequest(BaseModel):
     file_id: str
-    method: str = "hybrid"  # exact, fuzzy, semantic, hybrid
+    method: str = "hybrid"  # exact, fuzzy, semantic, minhash, linkage, hybrid
     keep: str = "first"  # first, last, none
+    options: Dict[str, Any] = {}  # مثلاً threshold، num_perm، shingle_size
 
 @router.post("/full")
 async def analyze_full(
@@ -44,12 +50,16 @@ async def analyze_full(
         if not file:
             raise HTTPException(status_code=404, detail="File not found")
         
+        if request.time_budget is not None and request.time_budget <= 0:
+            raise HTTPException(status_code=400, detail="time_budget must be positive")
+        
         # شروع آنالیز
-        task = analyze_file_task.delay(request.file_id)
+        task = analyze_file_task.delay(request.file_id, request.time_budget)
         
         return {
             "message": "Analysis started",
             "file_id": request.file_id,
+            "time_budget": request.time_budget,
             "task_id": task.id
         }
         
@@ -78,12 +88,16 @@ async def clean_data(
         if request.strategy not in ['drop', 'fill', 'flag']:
             raise HTTPException(status_code=400, detail="Invalid strategy")
         
-        task = clean_data_task.delay(request.file_id, request.strategy)
+        if request.checks is not None and not set(request.checks) <= set(ValidationEngine.BITS):
+            raise HTTPException(status_code=400, detail=f"Invalid checks; allowed: {list(ValidationEngine.BITS)}")
+        
+        task = clean_data_task.delay(request.file_id, request.strategy, request.checks)
         
         return {
             "message": "Data cleaning started",
             "file_id": request.file_id,
             "strategy": request.strategy,
+            "checks": request.checks,
             "task_id": task.id
         }
         
@@ -109,7 +123,7 @@ async def deduplicate_data(
         if not file:
             raise HTTPException(status_code=404, detail="File not found")
         
-        if request.method not in ['exact', 'fuzzy', 'semantic', 'hybrid']:
+        if request.method not in ['exact', 'fuzzy', 'semantic', 'minhash', 'linkage', 'hybrid']:
             raise HTTPException(status_code=400, detail="Invalid method")
         
         if request.keep not in ['first', 'last', 'none']:
@@ -118,7 +132,8 @@ async def deduplicate_data(
         task = remove_duplicates_task.delay(
             request.file_id,
             request.method,
-            request.keep
+            request.keep,
+            request.options
         )
         
         return {
@@ -168,4 +183,34 @@ async def get_task_status(task_id: str):
         return response
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/task/{task_id}/duplicate-groups")
+async def get_duplicate_groups(task_id: str, offset: int = 0, limit: int = 100):
+    """صفحه‌بندی گروه‌های تکراری از artifact ستونی نتیجه task"""
+    try:
+        from celery.result import AsyncResult
+        
+        if offset < 0 or not 0 < limit <= 1000:
+            raise HTTPException(status_code=400, detail="Invalid offset or limit")
+        
+        task = AsyncResult(task_id)
+        if task.state != 'SUCCESS':
+            raise HTTPException(status_code=409, detail=f"Task is {task.state}")
+        
+        # نتیجه remove_duplicates یا بخش deduplication آنالیز کامل
+        result = task.result or {}
+        groups_artifact = result.get('groups_artifact') or \
+            result.get('result', {}).get('deduplication', {}).get('groups_artifact')
+        
+        if not groups_artifact:
+            raise HTTPException(status_code=404, detail="No duplicate groups for this task")
+        
+        # artifact یک بار دانلود و صفحه‌ها از فایل محلی خوانده می‌شوند
+        path = await artifact_cache.get(groups_artifact)
+        return read_group_page(path, offset=offset, limit=limit)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -162,6 +162,7 @@ async def delete_file(
     try:
         from sqlalchemy import select, delete
         from services.storage import storage_service
+        from core.fingerprint_index import fingerprint_index
         
         result = await db.execute(
             select(FileModel).where(FileModel.id == uuid.UUID(file_id))
@@ -175,6 +176,9 @@ async def delete_file(
         if file.storage_path:
             await storage_service.delete_file(file.storage_path)
         
+        # حذف از ایندکس اثر انگشت
+        fingerprint_index.remove_file(file_id)
+        
         # حذف از دیتابیس
         await db.execute(
             delete(FileModel).where(FileModel.id == uuid.UUID(file_id))
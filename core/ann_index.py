@@ -0,0 +1,155 @@
+# Location: datanex/core/ann_index.py
+
+import numpy as np
+from typing import Optional, Tuple
+from sklearn.cluster import MiniBatchKMeans
+from utils.logger import log
+
+class IVFIndex:
+    """ایندکس IVF (inverted file) برای جستجوی تقریبی نزدیک‌ترین همسایه روی CPU
+
+    بردارها با MiniBatchKMeans به nlist لیست تقسیم می‌شوند و هر پرس‌وجو فقط
+    با اعضای nprobe لیست نزدیک مقایسه می‌شود. شباهت از نوع cosine است.
+    """
+
+    def __init__(self, nlist: Optional[int] = None, nprobe: int = 8, train_size: int = 100000,
+                 block_size: int = 4096, random_state: int = 42):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_size = train_size
+        self.block_size = block_size
+        self.random_state = random_state
+
+        self.vectors = None
+        self.centroids = None
+        self.assignments = None
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def fit(self, vectors: np.ndarray) -> 'IVFIndex':
+        """آموزش centroid ها و تخصیص بردارها به لیست‌ها"""
+        self.vectors = self._normalize(vectors)
+        n = len(self.vectors)
+
+        # حداقل 39 بردار برای هر لیست
+        nlist = self.nlist or int(np.sqrt(n))
+        nlist = max(1, min(nlist, n // 39))
+
+        if nlist == 1:
+            self.centroids = self.vectors.mean(axis=0, keepdims=True)
+            self.assignments = np.zeros(n, dtype=np.int64)
+            return self
+
+        # آموزش روی نمونه برای محدود ماندن زمان و حافظه
+        rng = np.random.default_rng(self.random_state)
+        sample_size = min(n, max(self.train_size, nlist * 39))
+        sample = self.vectors[rng.choice(n, sample_size, replace=False)] if sample_size < n else self.vectors
+
+        kmeans = MiniBatchKMeans(
+            n_clusters=nlist,
+            random_state=self.random_state,
+            batch_size=min(sample_size, 4096),
+            n_init=1
+        )
+        kmeans.fit(sample)
+        self.centroids = self._normalize(kmeans.cluster_centers_)
+        self.assignments = self._nearest_lists(self.vectors, 1)[:, 0]
+
+        log.debug(f"IVF index built: {n} vectors in {nlist} lists")
+        return self
+
+    def _nearest_lists(self, queries: np.ndarray, nprobe: int) -> np.ndarray:
+        """نزدیک‌ترین لیست‌ها برای هر پرس‌وجو (به صورت بلوکی)"""
+        nprobe = min(nprobe, len(self.centroids))
+        result = np.empty((len(queries), nprobe), dtype=np.int64)
+
+        for start in range(0, len(queries), self.block_size):
+            scores = queries[start:start + self.block_size] @ self.centroids.T
+            if nprobe < scores.shape[1]:
+                result[start:start + self.block_size] = np.argpartition(-scores, nprobe - 1, axis=1)[:, :nprobe]
+            else:
+                result[start:start + self.block_size] = np.arange(scores.shape[1])
+
+        return result
+
+    def self_join(self, k: int = 10, threshold: float = 0.9) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """یافتن حداکثر k همسایه با شباهت >= threshold برای هر بردار ایندکس
+
+        خروجی: (i, j, similarity) برای جفت‌های i != j
+        """
+        if self.vectors is None:
+            raise ValueError("Index is not fitted")
+
+        n = len(self.vectors)
+        probes = self._nearest_lists(self.vectors, self.nprobe)
+
+        # هر لیست: پرس‌وجوهایی که آن را probe می‌کنند × اعضای لیست
+        probe_query = np.repeat(np.arange(n), probes.shape[1])
+        probe_list = probes.ravel()
+        order = np.argsort(probe_list, kind='stable')
+        probe_query, probe_list = probe_query[order], probe_list[order]
+        query_bounds = np.searchsorted(probe_list, np.arange(len(self.centroids) + 1))
+
+        member_order = np.argsort(self.assignments, kind='stable')
+        member_bounds = np.searchsorted(self.assignments[member_order], np.arange(len(self.centroids) + 1))
+
+        left, right, sims = [], [], []
+
+        for list_id in range(len(self.centroids)):
+            members = member_order[member_bounds[list_id]:member_bounds[list_id + 1]]
+            queries = probe_query[query_bounds[list_id]:query_bounds[list_id + 1]]
+
+            if len(members) == 0 or len(queries) == 0:
+                continue
+
+            member_vectors = self.vectors[members]
+
+            for start in range(0, len(queries), self.block_size):
+                block = queries[start:start + self.block_size]
+                scores = self.vectors[block] @ member_vectors.T
+
+                # top-k در هر بلوک (به اضافه خود بردار)
+                top = min(k + 1, scores.shape[1])
+                if top < scores.shape[1]:
+                    cols = np.argpartition(-scores, top - 1, axis=1)[:, :top]
+                    top_scores = np.take_along_axis(scores, cols, axis=1)
+                else:
+                    cols = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+                    top_scores = scores
+
+                rows, positions = np.nonzero(top_scores >= threshold)
+                i = block[rows]
+                j = members[cols[rows, positions]]
+                keep = i != j
+
+                left.append(i[keep])
+                right.append(j[keep])
+                sims.append(top_scores[rows, positions][keep])
+
+        if not left:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, np.zeros(0, dtype=np.float32)
+
+        i = np.concatenate(left)
+        j = np.concatenate(right)
+        s = np.concatenate(sims)
+
+        # حذف جفت‌های تکراری و نگه داشتن k همسایه برتر برای هر بردار
+        order = np.lexsort((-s, j, i))
+        i, j, s = i[order], j[order], s[order]
+        unique_pair = np.ones(len(i), dtype=bool)
+        unique_pair[1:] = (i[1:] != i[:-1]) | (j[1:] != j[:-1])
+        i, j, s = i[unique_pair], j[unique_pair], s[unique_pair]
+
+        order = np.lexsort((-s, i))
+        i, j, s = i[order], j[order], s[order]
+        group_start = np.searchsorted(i, i, side='left')
+        rank = np.arange(len(i)) - group_start
+        keep = rank < k
+
+        return i[keep], j[keep], s[keep]
@@ -0,0 +1,169 @@
+# Location: datanex/core/anomaly.py
+
+import hashlib
+import warnings
+import pandas as pd
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from sklearn.ensemble import IsolationForest
+from utils.logger import log
+
+# ضریب تبدیل MAD به انحراف معیار در توزیع نرمال
+MAD_SCALE = 0.6745
+
+class AnomalyEngine:
+    """آمار مقاوم و تشخیص ناهنجاری مشترک بین PatternFinder، Validator و Labeler
+
+    برای همه ستون‌های عددی در یک گذر ماتریسی (بلوک به بلوک از ستون‌ها)
+    چارک‌ها، میانه، MAD، مرزهای IQR و تعداد outlier ها محاسبه می‌شود. هر بلوک
+    حداکثر max_cells خانه دارد (چند کپی float64 از بلوک همزمان در حافظه‌اند).
+    نتیجه در یک cache کوچک با کلید hash محتوای ستون‌های عددی نگه داشته می‌شود
+    تا مراحل مختلف یک تحلیل دوباره داده را مرتب نکنند و جواب یکسان بگیرند؛
+    تغییر درجای داده کلید را عوض می‌کند.
+    """
+
+    def __init__(self, iqr_factor: float = 1.5, z_threshold: float = 3.5, block_size: int = 256,
+                 max_cells: int = 2 ** 24, cache_size: int = 4):
+        self.iqr_factor = iqr_factor
+        self.z_threshold = z_threshold
+        self.block_size = block_size
+        self.max_cells = max_cells
+        self.cache_size = cache_size
+        self._cache: 'OrderedDict[bytes, dict]' = OrderedDict()
+
+    @staticmethod
+    def _quantiles(sorted_block: np.ndarray, counts: np.ndarray, q: float) -> np.ndarray:
+        """چندک با درون‌یابی خطی (مانند pandas) روی ستون‌های مرتب؛ null ها انتهای هر ستون‌اند"""
+        position = q * np.maximum(counts - 1, 0)
+        low = np.floor(position).astype(np.int64)
+        high = np.minimum(low + 1, np.maximum(counts - 1, 0))
+        columns = np.arange(sorted_block.shape[1])
+
+        low_values = sorted_block[low, columns]
+        high_values = sorted_block[high, columns]
+        with np.errstate(invalid='ignore'):
+            values = low_values + (position - low) * (high_values - low_values)
+        return np.where(counts > 0, values, np.nan)
+
+    def _compute(self, numeric_df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+        profile = {}
+        columns = list(numeric_df.columns)
+        if len(numeric_df) == 0:
+            return profile
+
+        block_size = max(1, min(self.block_size, self.max_cells // len(numeric_df)))
+        for start in range(0, len(columns), block_size):
+            block_columns = columns[start:start + block_size]
+            x = numeric_df[block_columns].to_numpy(dtype=np.float64, na_value=np.nan)
+            counts = (~np.isnan(x)).sum(axis=0)
+
+            ordered = np.sort(x, axis=0)
+            q1 = self._quantiles(ordered, counts, 0.25)
+            median = self._quantiles(ordered, counts, 0.5)
+            q3 = self._quantiles(ordered, counts, 0.75)
+            del ordered
+
+            deviation = np.sort(np.abs(x - median), axis=0)
+            mad = self._quantiles(deviation, counts, 0.5)
+            del deviation
+
+            iqr = q3 - q1
+            lower, upper = q1 - self.iqr_factor * iqr, q3 + self.iqr_factor * iqr
+            radius = self.z_threshold * mad / MAD_SCALE
+
+            iqr_outliers = ((x < lower) | (x > upper)).sum(axis=0)
+            # ستون‌های با MAD صفر outlier مقاوم ندارند
+            robust_outliers = np.where(mad > 0, (np.abs(x - median) > radius).sum(axis=0), 0)
+            mean = np.nanmean(x, axis=0)
+            std = np.nanstd(x, axis=0, ddof=1)
+
+            for k, column in enumerate(block_columns):
+                profile[column] = {
+                    'count': int(counts[k]),
+                    'mean': float(mean[k]),
+                    'std': float(std[k]),
+                    'q1': float(q1[k]),
+                    'median': float(median[k]),
+                    'q3': float(q3[k]),
+                    'iqr': float(iqr[k]),
+                    'mad': float(mad[k]),
+                    'lower_bound': float(lower[k]),
+                    'upper_bound': float(upper[k]),
+                    'iqr_outliers': int(iqr_outliers[k]),
+                    'robust_outliers': int(robust_outliers[k])
+                }
+
+        return profile
+
+    @staticmethod
+    def _content_key(numeric_df: pd.DataFrame) -> bytes:
+        """کلید cache از نام و dtype ستون‌ها و hash مقادیر (یک گذر خطی، بدون مرتب‌سازی)"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr([(column, str(dtype)) for column, dtype in numeric_df.dtypes.items()]).encode('utf-8'))
+        if len(numeric_df.columns):
+            digest.update(pd.util.hash_pandas_object(numeric_df, index=False).to_numpy().tobytes())
+        return digest.digest()
+
+    def profile(self, df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+        """آمار مقاوم همه ستون‌های عددی: {ستون: {count, median, mad, q1, q3, ...}}"""
+        numeric_df = df.select_dtypes(include=[np.number])
+        key = self._content_key(numeric_df)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+
+        # ستون‌های تماماً null هشدار nanmean/nanstd می‌دهند؛ نتیجه‌شان nan است
+        with np.errstate(all='ignore'), warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            profile = self._compute(numeric_df)
+
+        self._cache[key] = profile
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+        log.debug(f"Anomaly profile computed for {len(profile)} numeric columns")
+        return profile
+
+    def outlier_mask(self, series: pd.Series, stats: Dict[str, Any], method: str = 'iqr') -> pd.Series:
+        """ماسک outlier های یک ستون با آمار از پیش محاسبه شده"""
+        if method == 'iqr':
+            return (series < stats['lower_bound']) | (series > stats['upper_bound'])
+        if method == 'robust_z':
+            if not stats['mad'] > 0:
+                return pd.Series(False, index=series.index)
+            return (series - stats['median']).abs() > self.z_threshold * stats['mad'] / MAD_SCALE
+        raise ValueError(f"Unknown outlier method: {method}")
+
+    def isolation_forest(self, df: pd.DataFrame, sample_size: int = 100000, chunk_size: int = 200000,
+                         contamination: Any = 'auto', random_state: int = 42) -> Optional[Dict[str, np.ndarray]]:
+        """ناهنجاری چندمتغیره با Isolation Forest
+
+        مدل روی نمونه‌ای از ردیف‌ها آموزش و کل داده تکه به تکه امتیازدهی
+        می‌شود. null و مقادیر نامتناهی با میانه ستون (از profile) پر می‌شوند.
+        خروجی: {'columns': ستون‌های استفاده شده, 'scores': امتیاز هر ردیف (منفی یعنی ناهنجار), 'is_anomaly': ماسک}
+        """
+        profile = self.profile(df)
+        columns = [column for column, stats in profile.items() if stats['count'] > 0]
+        if len(columns) < 2 or len(df) < 4:
+            return None
+
+        fill = np.array([profile[column]['median'] for column in columns])
+        x = df[columns]
+
+        def matrix(frame: pd.DataFrame) -> np.ndarray:
+            values = frame.to_numpy(dtype=np.float64, na_value=np.nan)
+            return np.where(np.isfinite(values), values, fill)
+
+        sample = x.sample(sample_size, random_state=random_state) if len(x) > sample_size else x
+        model = IsolationForest(contamination=contamination, random_state=random_state, n_jobs=-1)
+        model.fit(matrix(sample))
+
+        scores = np.empty(len(x), dtype=np.float64)
+        for start in range(0, len(x), chunk_size):
+            scores[start:start + chunk_size] = model.decision_function(matrix(x.iloc[start:start + chunk_size]))
+
+        return {'columns': columns, 'scores': scores, 'is_anomaly': scores < 0}
+
+anomaly_engine = AnomalyEngine()
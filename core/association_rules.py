@@ -0,0 +1,152 @@
+# Location: datanex/core/association_rules.py
+
+import pandas as pd
+import numpy as np
+from itertools import combinations
+from typing import Dict, List, Tuple
+from utils.logger import log
+
+class FPGrowth:
+    """استخراج itemset های پرتکرار به روش FP-Growth و ساخت قوانین انجمنی
+
+    هر ردیف یک تراکنش است و هر (ستون=مقدار) از ستون‌های categorical یک
+    item. به جای درخت با اشاره‌گر، پایگاه‌های شرطی (projected database) به
+    صورت آرایه NumPy ساخته می‌شوند: تراکنش‌های یکسان با وزن ادغام و برای هر
+    item پرتکرار فقط تراکنش‌های شامل آن (محدود به item های کوچک‌تر) بازگشتی
+    استخراج می‌شوند. در هر لحظه فقط یک مسیر از پایگاه‌های شرطی در حافظه است
+    و max_len و max_itemsets عمق و تعداد نتایج را محدود می‌کنند.
+    """
+
+    def __init__(self, min_support: float = 0.1, min_confidence: float = 0.5, max_len: int = 3,
+                 max_itemsets: int = 100000):
+        self.min_support = min_support
+        self.min_confidence = min_confidence
+        self.max_len = max_len
+        self.max_itemsets = max_itemsets
+        self.truncated = False
+
+    def _transactions(self, df: pd.DataFrame) -> Tuple[np.ndarray, List[str]]:
+        """کدهای item هر ردیف (ردیف‌ها × ستون‌ها) و نام item ها؛ null ها کد len(names) می‌گیرند"""
+        codes = np.empty((len(df), len(df.columns)), dtype=np.int64)
+        names: List[str] = []
+
+        for position, column in enumerate(df.columns):
+            column_codes, uniques = pd.factorize(df[column])
+            codes[:, position] = np.where(column_codes >= 0, column_codes + len(names), -1)
+            names.extend(f"{column}={value}" for value in uniques)
+
+        codes[codes < 0] = len(names)
+        return codes, names
+
+    @staticmethod
+    def _compress(rows: np.ndarray, weights: np.ndarray, sentinel: int) -> Tuple[np.ndarray, np.ndarray]:
+        """مرتب‌سازی item های هر تراکنش، حذف ستون‌های خالی و ادغام تراکنش‌های یکسان"""
+        rows = np.sort(rows, axis=1)
+        sizes = (rows < sentinel).sum(axis=1)
+        nonempty = sizes > 0
+        rows, weights = rows[nonempty], weights[nonempty]
+        rows = rows[:, :int(sizes.max()) if len(rows) else 0]
+        
+        if len(rows) > 1 and rows.shape[1] > 0:
+            # کلید هر تراکنش ستون به ستون با factorize عددی ساخته می‌شود
+            # (به جای np.unique روی محور 0 که مرتب‌سازی سطری کندی دارد)
+            inverse = np.zeros(len(rows), dtype=np.int64)
+            for column in rows.T:
+                inverse, _ = pd.factorize(inverse * (sentinel + 1) + column)
+
+            # کدهای factorize به ترتیب اولین ظاهر شدن‌اند
+            is_first = np.ones(len(rows), dtype=bool)
+            is_first[1:] = inverse[1:] > np.maximum.accumulate(inverse)[:-1]
+            first = np.flatnonzero(is_first)
+            weights = np.bincount(inverse, weights=weights, minlength=len(first)).astype(np.int64)
+            rows = rows[first]
+        return rows, weights
+
+    def frequent_itemsets(self, df: pd.DataFrame) -> Tuple[Dict[Tuple[int, ...], int], List[str], int]:
+        """itemset های پرتکرار: {(item ها): تعداد}"""
+        codes, names = self._transactions(df)
+        n = len(df)
+        min_count = max(1, int(np.ceil(self.min_support * n)))
+        self.truncated = False
+
+        itemsets: Dict[Tuple[int, ...], int] = {}
+        if n > 0 and names:
+            rows, weights = self._compress(codes, np.ones(n, dtype=np.int64), len(names))
+            self._mine(rows, weights, (), min_count, len(names), itemsets)
+
+        if self.truncated:
+            log.warning(f"FP-Growth stopped after {self.max_itemsets} itemsets")
+
+        return itemsets, names, n
+
+    def _mine(self, rows: np.ndarray, weights: np.ndarray, suffix: Tuple[int, ...], min_count: int,
+              sentinel: int, itemsets: Dict[Tuple[int, ...], int]):
+        valid = rows < sentinel
+        row_positions, column_positions = np.nonzero(valid)
+        items = rows[row_positions, column_positions]
+        counts = np.bincount(items, weights=weights[row_positions], minlength=sentinel)
+        frequent = np.flatnonzero(counts >= min_count)
+
+        for item in frequent:
+            if len(itemsets) >= self.max_itemsets:
+                self.truncated = True
+                return
+            itemsets[tuple(sorted(suffix + (int(item),)))] = int(counts[item])
+
+        if len(suffix) + 1 >= self.max_len or len(frequent) < 2:
+            return
+
+        # item های غیر پرتکرار در پایگاه‌های شرطی لازم نیستند
+        is_frequent = np.zeros(sentinel + 1, dtype=bool)
+        is_frequent[frequent] = True
+        rows = np.where(is_frequent[rows], rows, sentinel)
+
+        # تراکنش‌های شامل هر item با یک مرتب‌سازی
+        order = np.argsort(items, kind='stable')
+        sorted_items = items[order]
+        starts = np.searchsorted(sorted_items, frequent, side='left')
+        ends = np.searchsorted(sorted_items, frequent, side='right')
+
+        for item, start, end in zip(frequent[1:], starts[1:], ends[1:]):
+            members = row_positions[order[start:end]]
+
+            # پایگاه شرطی: فقط item های کوچک‌تر تا هر itemset یک بار تولید شود
+            projected = rows[members]
+            projected = np.where(projected < item, projected, sentinel)
+            projected, projected_weights = self._compress(projected, weights[members], sentinel)
+
+            if len(projected):
+                self._mine(projected, projected_weights, suffix + (int(item),), min_count, sentinel, itemsets)
+            if self.truncated:
+                return
+
+    def rules(self, df: pd.DataFrame) -> List[Dict]:
+        """قوانین X → Y با support، confidence و lift"""
+        itemsets, names, n = self.frequent_itemsets(df)
+        rules = []
+
+        for itemset, count in itemsets.items():
+            if len(itemset) < 2:
+                continue
+
+            for size in range(1, len(itemset)):
+                for antecedent in combinations(itemset, size):
+                    consequent = tuple(item for item in itemset if item not in antecedent)
+                    antecedent_count = itemsets.get(antecedent)
+                    consequent_count = itemsets.get(consequent)
+                    if not antecedent_count or not consequent_count:
+                        continue
+
+                    confidence = count / antecedent_count
+                    if confidence < self.min_confidence:
+                        continue
+
+                    rules.append({
+                        'antecedent': [names[item] for item in antecedent],
+                        'consequent': [names[item] for item in consequent],
+                        'support': count / n,
+                        'confidence': confidence,
+                        'lift': confidence / (consequent_count / n)
+                    })
+
+        return rules
@@ -0,0 +1,178 @@
+# Location: datanex/core/budget.py
+
+import time
+import pandas as pd
+import numpy as np
+from math import comb
+from typing import Dict, List, Optional, Tuple
+from utils.logger import log
+
+class CostModel:
+    """تخمین زمان اجرای هر detector در find_patterns از شکل داده
+
+    از تعداد ردیف‌ها و ستون‌ها و کاردینالیتی ستون‌های categorical (تخمین زده
+    شده روی نمونه) یک هزینه بر حسب «واحد کار» ساخته و با RATES (ثانیه بر
+    واحد، اندازه‌گیری شده روی یک هسته) به ثانیه تبدیل می‌شود. هزینه تقریباً
+    خطی در تعداد ردیف‌هاست، پس نمونه‌گیری با کسر f زمان را حدوداً f برابر می‌کند.
+    """
+
+    RATES = {
+        'correlations': 3e-10,
+        'trends': 2.5e-8,
+        'seasonality': 4.5e-8,
+        'sequences': 3e-7,
+        'anomalies': 1.1e-7,
+        'associations': 1.2e-8,
+        'clusters': 2e-7
+    }
+
+    # هزینه ثابت (ثانیه) مستقل از تعداد ردیف‌ها، مثل آموزش Isolation Forest یا انتخاب k روی نمونه
+    OVERHEAD = {'anomalies': 0.5, 'clusters': 3.0}
+
+    # سربار ثابت هر فراخوانی detector (انتخاب ستون‌ها، ساخت نتیجه) که در RATES نیست
+    CALL_OVERHEAD = 0.02
+
+    def __init__(self, sample_size: int = 10000, min_support: float = 0.1, max_len: int = 3,
+                 max_itemsets: int = 100000, random_state: int = 42):
+        self.sample_size = sample_size
+        self.min_support = min_support
+        self.max_len = max_len
+        self.max_itemsets = max_itemsets
+        self.random_state = random_state
+
+    def _cardinalities(self, sample: pd.DataFrame, n: int) -> Dict[str, float]:
+        """تعداد مقادیر یکتای هر ستون در کل داده؛ ستون‌های تقریباً یکتا در نمونه به نسبت n برون‌یابی می‌شوند"""
+        cardinalities = {}
+        for column in sample.columns:
+            distinct = sample[column].nunique()
+            ratio = distinct / max(len(sample), 1)
+            cardinalities[column] = float(distinct if ratio < 0.5 else ratio * n)
+        return cardinalities
+
+    def _frequent_items(self, sample: pd.DataFrame) -> int:
+        """تعداد item های (ستون=مقدار) با support حداقل min_support در نمونه"""
+        return int(sum(
+            (sample[column].value_counts(normalize=True) >= self.min_support).sum()
+            for column in sample.columns
+        ))
+
+    def fixed(self, detector: str, estimate: float) -> float:
+        """بخش ثابت تخمین یک detector که با نمونه‌گیری کم نمی‌شود"""
+        return self.OVERHEAD.get(detector, 0.0) + self.CALL_OVERHEAD if estimate > 0 else 0.0
+
+    def estimate(self, df: pd.DataFrame) -> Dict[str, float]:
+        """زمان تخمینی (ثانیه) هر detector روی کل df"""
+        n = len(df)
+        log_n = np.log2(max(n, 2))
+        p = len(df.select_dtypes(include=[np.number]).columns)
+        d = len(df.select_dtypes(include=['datetime64']).columns)
+        categorical = df.select_dtypes(include=['object', 'category'])
+        c = len(categorical.columns)
+
+        sample = categorical.sample(self.sample_size, random_state=self.random_state) if n > self.sample_size else categorical
+        cardinalities = self._cardinalities(sample, n)
+
+        # FP-Growth: هر itemset پرتکرار یک پایگاه شرطی روی تراکنش‌های یکتا می‌سازد
+        frequent = self._frequent_items(sample) if c >= 2 else 0
+        itemsets = min(sum(comb(frequent, k) for k in range(1, self.max_len + 1)), self.max_itemsets)
+        transactions = min(n, float(np.prod([max(value, 1.0) for value in cardinalities.values()])) if c else 0)
+
+        units = {
+            'correlations': n * p * (p + 32) if p >= 2 else 0,
+            'trends': d * n * (p + 4) if p else 0,
+            'seasonality': d * n * (p + 4) if p else 0,
+            'sequences': n * c,
+            'anomalies': n * (p + 40) if p else 0,
+            'associations': n * c * log_n + transactions * c * itemsets / 50 if c >= 2 else 0,
+            'clusters': n * p if p >= 2 and n >= 10 else 0
+        }
+
+        return {
+            detector: float(units[detector] * rate + (self.OVERHEAD.get(detector, 0.0) + self.CALL_OVERHEAD
+                                                      if units[detector] else 0.0))
+            for detector, rate in self.RATES.items()
+        }
+
+class PatternBudget:
+    """بودجه زمانی کل find_patterns و تصمیم اجرای کامل، نمونه‌گیری یا رد هر detector
+
+    هر detector هزینه ثابتش را به علاوه سهمی از بقیه زمان باقی‌مانده به نسبت
+    هزینه متغیرش از هزینه detector های باقی‌مانده می‌گیرد؛ زمان استفاده نشده
+    به بعدی‌ها می‌رسد.
+    اگر تخمین از سهم بیشتر باشد روی کسری از ردیف‌ها اجرا می‌شود و اگر حتی
+    min_rows ردیف هم در سهم جا نشود اجرا نمی‌شود. نسبت زمان واقعی به تخمین
+    در scale نگه داشته می‌شود تا تخمین‌های بعدی اصلاح شوند؛ این نسبت فقط
+    پس از min_calibration ثانیه اجرای واقعی به‌روز می‌شود، چون زمان اجراهای
+    چند میلی‌ثانیه‌ای عمدتاً سربار ثابت هر فراخوانی است. هزینه ثابت (fixed)
+    مقیاس نمی‌شود.
+    """
+
+    def __init__(self, time_budget: float, min_rows: int = 1000, min_calibration: float = 0.05):
+        self.time_budget = time_budget
+        self.min_rows = min_rows
+        self.min_calibration = min_calibration
+        self.deadline = time.monotonic() + time_budget
+        self.scale = 1.0
+        self._estimated = 0.0
+        self._elapsed = 0.0
+
+    def remaining(self) -> float:
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def reserve(self, costs: List[Tuple[float, float]]) -> Tuple[float, float]:
+        """(مجموع تخمین‌ها، مجموع بخش‌های ثابت) detector هایی که هزینه ثابتشان در زمان باقی‌مانده جا می‌شود
+
+        costs: (تخمین، بخش ثابت) detector های باقی‌مانده به ترتیب اجرا
+        """
+        remaining, pending, pending_fixed = self.remaining(), 0.0, 0.0
+        for estimate, fixed in costs:
+            if pending_fixed + fixed > remaining:
+                continue
+            pending += estimate
+            pending_fixed += fixed
+        return pending, pending_fixed
+
+    def plan(self, estimate: float, pending: float, rows: int, fixed: float = 0.0,
+             pending_fixed: float = 0.0) -> Optional[float]:
+        """کسر ردیف‌هایی که detector با آن اجرا شود (1.0 یعنی کامل)؛ None یعنی رد
+
+        estimate: تخمین این detector، pending: مجموع تخمین این و detector های باقی‌مانده،
+        fixed: بخشی از estimate که با نمونه‌گیری کم نمی‌شود، pending_fixed: مجموع بخش‌های
+        ثابت pending. بخش‌های ثابت از زمان باقی‌مانده کنار گذاشته و بقیه زمان به نسبت
+        بخش متغیر تقسیم می‌شود.
+        """
+        remaining = self.remaining()
+        if fixed > remaining:
+            return None
+
+        variable = max(estimate - fixed, 0.0)
+        pending_variable = pending - pending_fixed
+        ratio = variable / pending_variable if pending_variable > 0 else 1.0
+        share = fixed + max(remaining - pending_fixed, 0.0) * ratio
+
+        if fixed + variable * self.scale <= share:
+            return 1.0
+
+        fraction = (share - fixed) / (variable * self.scale)
+        if rows * fraction < min(self.min_rows, rows):
+            return None
+        return fraction
+
+    def record(self, estimate: float, elapsed: float):
+        """ثبت زمان واقعی یک اجرا (estimate برای همان کسر ردیف‌ها)"""
+        self._estimated += estimate
+        self._elapsed += elapsed
+        if self._estimated > 0 and self._elapsed >= self.min_calibration:
+            self.scale = float(np.clip(self._elapsed / self._estimated, 0.1, 10.0))
+
+def sample_rows(df: pd.DataFrame, fraction: float, contiguous: bool = False, random_state: int = 42) -> pd.DataFrame:
+    """کسری از ردیف‌ها با حفظ ترتیب؛ contiguous برای detector هایی که به ردیف‌های متوالی نیاز دارند"""
+    size = max(int(len(df) * fraction), 1)
+    log.debug(f"Sampling {size} of {len(df)} rows")
+    if contiguous:
+        return df.iloc[:size]
+
+    rng = np.random.default_rng(random_state)
+    return df.iloc[np.sort(rng.choice(len(df), size=size, replace=False))]
+
+cost_model = CostModel()
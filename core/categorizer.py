@@ -4,6 +4,9 @@ import pandas as pd
 from typing import List, Dict, Any
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.cluster import KMeans
+from core.date_inference import date_inference
+from core.pattern_matcher import pattern_matcher
+from core.validation import ValidationEngine
 from utils.logger import log
 import re
 
@@ -56,15 +59,15 @@ class Categorizer:
         
         elif pd.api.types.is_string_dtype(series) or pd.api.types.is_object_dtype(series):
             # بررسی الگوهای خاص
-            sample = series.dropna().head(100).astype(str)
+            sample = series.dropna().head(100)
             
-            if sample.str.match(r'^[\w\.-]+@[\w\.-]+\.\w+$').any():
+            if pattern_matcher.match(sample, ValidationEngine.PATTERNS['email']).any():
                 return 'personal'
             
-            if sample.str.match(r'^\d{4}-\d{2}-\d{2}').any():
+            if date_inference.infer_format(series) is not None:
                 return 'temporal'
             
-            if sample.str.len().mean() > 100:
+            if sample.astype(str).str.len().mean() > 100:
                 return 'text'
             
             if series.nunique() < len(series) * 0.5:
@@ -0,0 +1,164 @@
+# Location: datanex/core/clustering.py
+
+import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from io import BytesIO
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.decomposition import IncrementalPCA
+from sklearn.metrics import silhouette_score
+from sklearn.preprocessing import StandardScaler
+from utils.logger import log
+
+ChunkSource = Callable[[], Iterable[pd.DataFrame]]
+
+class StreamingClusterer:
+    """خوشه‌بندی مقیاس‌پذیر: IncrementalPCA تکه‌ای و MiniBatchKMeans با انتخاب خودکار k
+
+    داده سه بار به صورت تکه‌ای خوانده می‌شود و حافظه به اندازه یک تکه
+    به علاوه نمونه و برچسب‌های فشرده (int8/int16) است:
+    1. StandardScaler.partial_fit و نمونه‌گیری reservoir
+    2. IncrementalPCA.partial_fit روی داده استاندارد شده
+    3. برچسب‌گذاری هر ردیف با نزدیک‌ترین مرکز
+    k با silhouette روی نمونه انتخاب و KMeans روی نمونه برازش می‌شود. null ها
+    با میانگین ستون (صفر پس از استانداردسازی) پر می‌شوند.
+    """
+
+    def __init__(self, n_components: int = 2, k_range: Iterable[int] = range(2, 11), sample_size: int = 20000,
+                 silhouette_size: int = 5000, batch_size: int = 4096, random_state: int = 42):
+        self.n_components = n_components
+        self.k_range = list(k_range)
+        self.sample_size = sample_size
+        self.silhouette_size = silhouette_size
+        self.batch_size = batch_size
+        self.random_state = random_state
+
+    @staticmethod
+    def _values(chunk: pd.DataFrame, columns: List[str]) -> np.ndarray:
+        return chunk[columns].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    def _scaled(self, values: np.ndarray, scaler: StandardScaler) -> np.ndarray:
+        scaled = scaler.transform(values)
+        return np.nan_to_num(scaled, nan=0.0, posinf=0.0, neginf=0.0)
+
+    def _first_pass(self, chunks: ChunkSource, columns: List[str]):
+        """برازش scaler و نمونه یکنواخت (reservoir با کلیدهای تصادفی)"""
+        rng = np.random.default_rng(self.random_state)
+        scaler = StandardScaler()
+        sample, keys = np.zeros((0, len(columns))), np.zeros(0)
+        rows = 0
+
+        for chunk in chunks():
+            values = self._values(chunk, columns)
+            values = np.where(np.isfinite(values), values, np.nan)
+            if len(values) == 0:
+                continue
+
+            scaler.partial_fit(values)
+            rows += len(values)
+
+            # نگه داشتن sample_size ردیف با کوچک‌ترین کلید تصادفی
+            sample = np.vstack([sample, values])
+            keys = np.concatenate([keys, rng.random(len(values))])
+            if len(keys) > self.sample_size:
+                keep = np.argpartition(keys, self.sample_size)[:self.sample_size]
+                sample, keys = sample[keep], keys[keep]
+
+        return scaler, sample, rows
+
+    def _choose_k(self, projected: np.ndarray) -> Tuple[Optional[MiniBatchKMeans], Dict[int, float]]:
+        """انتخاب k با بیشترین silhouette روی نمونه"""
+        scores = {}
+        best, best_score = None, -np.inf
+
+        for k in self.k_range:
+            if k >= len(projected):
+                break
+
+            model = MiniBatchKMeans(n_clusters=k, batch_size=self.batch_size, n_init=3,
+                                    random_state=self.random_state).fit(projected)
+            if len(np.unique(model.labels_)) < 2:
+                continue
+
+            score = float(silhouette_score(projected, model.labels_,
+                                           sample_size=min(self.silhouette_size, len(projected)),
+                                           random_state=self.random_state))
+            scores[k] = score
+            if score > best_score:
+                best, best_score = model, score
+
+        return best, scores
+
+    def fit_predict(self, chunks: ChunkSource, columns: List[str]) -> Optional[Dict[str, Any]]:
+        """خوشه‌بندی همه ردیف‌ها؛ chunks هر بار یک iterator تازه از تکه‌ها می‌دهد
+
+        خروجی شامل 'labels' (آرایه فشرده برچسب هر ردیف) و خلاصه خوشه‌هاست؛
+        None اگر داده کافی نباشد.
+        """
+        scaler, sample, rows = self._first_pass(chunks, columns)
+        n_components = min(self.n_components, len(columns))
+        if len(sample) < max(10, n_components + 1):
+            return None
+
+        ipca = IncrementalPCA(n_components=n_components)
+        fitted = False
+        pending, pending_rows = [], 0
+        for chunk in chunks():
+            pending.append(self._scaled(self._values(chunk, columns), scaler))
+            pending_rows += len(pending[-1])
+            # partial_fit حداقل n_components ردیف در هر دسته می‌خواهد
+            if pending_rows >= max(n_components, self.batch_size):
+                ipca.partial_fit(np.vstack(pending))
+                fitted = True
+                pending, pending_rows = [], 0
+
+        if pending_rows >= n_components:
+            ipca.partial_fit(np.vstack(pending))
+        elif not fitted:
+            ipca.partial_fit(self._scaled(sample, scaler))
+
+        projected_sample = ipca.transform(self._scaled(sample, scaler))
+        model, scores = self._choose_k(projected_sample)
+        if model is None:
+            return None
+
+        dtype = np.int8 if model.n_clusters <= np.iinfo(np.int8).max else np.int16
+        labels = np.empty(rows, dtype=dtype)
+        preview = []
+        position = 0
+
+        for chunk in chunks():
+            projected = ipca.transform(self._scaled(self._values(chunk, columns), scaler))
+            labels[position:position + len(projected)] = model.predict(projected)
+            position += len(projected)
+            if len(preview) < 100:
+                preview.extend(projected[:100 - len(preview)].tolist())
+
+        sizes = np.bincount(labels, minlength=model.n_clusters)
+        centers = scaler.inverse_transform(ipca.inverse_transform(model.cluster_centers_))
+
+        log.debug(f"Clustering: {rows} rows, k={model.n_clusters}, {n_components} components")
+        return {
+            'n_clusters': int(model.n_clusters),
+            'silhouette_scores': {int(k): score for k, score in scores.items()},
+            'cluster_sizes': sizes.tolist(),
+            'centers': [dict(zip(columns, center.tolist())) for center in centers],
+            'n_components': n_components,
+            'explained_variance': ipca.explained_variance_ratio_.tolist(),
+            'total_variance_explained': float(ipca.explained_variance_ratio_.sum()),
+            'principal_components': preview,
+            'labels': labels
+        }
+
+def labels_to_parquet(labels: np.ndarray, row_group_size: int = 1048576) -> bytes:
+    """ذخیره ستونی برچسب خوشه هر ردیف (شماره ردیف همان موقعیت است)"""
+    table = pa.table({'cluster': pa.array(labels)}).replace_schema_metadata({
+        'row_count': str(len(labels)),
+        'cluster_count': str(int(labels.max()) + 1 if len(labels) else 0)
+    })
+
+    buffer = BytesIO()
+    pq.write_table(table, buffer, row_group_size=row_group_size, compression='zstd')
+    return buffer.getvalue()
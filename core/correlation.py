@@ -0,0 +1,109 @@
+# Location: datanex/core/correlation.py
+
+import pandas as pd
+import numpy as np
+from typing import Optional, Tuple
+from utils.logger import log
+
+class CorrelationEngine:
+    """محاسبه همبستگی جفت ستون‌ها به صورت بلوکی روی ماتریس float32
+
+    ماتریس کامل همبستگی هیچ‌وقت ساخته نمی‌شود؛ برای هر جفت بلوک از ستون‌ها
+    ضرب ماتریسی انجام و فقط جفت‌های بالای threshold نگه داشته می‌شوند.
+    Spearman همان Pearson روی رتبه‌هاست. اگر داده null داشته باشد همبستگی
+    روی مشاهدات کامل هر جفت (مانند pandas) با ضرب‌های ماسک‌دار محاسبه می‌شود؛
+    در این حالت رتبه‌های Spearman یک بار برای هر ستون (نه برای هر جفت) گرفته
+    می‌شوند.
+    """
+
+    METHODS = ('pearson', 'spearman')
+
+    def __init__(self, threshold: float = 0.7, method: str = 'pearson', block_size: int = 1024,
+                 sample_size: Optional[int] = None, random_state: int = 42):
+        if method not in self.METHODS:
+            raise ValueError(f"Unknown correlation method: {method}")
+
+        self.threshold = threshold
+        self.method = method
+        self.block_size = block_size
+        self.sample_size = sample_size
+        self.random_state = random_state
+
+    def _prepare(self, numeric_df: pd.DataFrame) -> np.ndarray:
+        if self.sample_size and len(numeric_df) > self.sample_size:
+            numeric_df = numeric_df.sample(self.sample_size, random_state=self.random_state)
+
+        if self.method == 'spearman':
+            # رتبه‌ها روی مقادیر غیر null هر ستون محاسبه می‌شوند
+            numeric_df = numeric_df.rank()
+
+        # مرکزی کردن در float64 و سپس float32 برای ضرب‌ها
+        values = numeric_df.to_numpy(dtype=np.float64) - numeric_df.mean().to_numpy(dtype=np.float64)
+        return values.astype(np.float32)
+
+    def _block_dense(self, z: np.ndarray, a: slice, b: slice) -> np.ndarray:
+        return z[:, a].T @ z[:, b]
+
+    def _block_masked(self, x: np.ndarray, mask: np.ndarray, a: slice, b: slice) -> np.ndarray:
+        """همبستگی روی مشاهدات کامل هر جفت"""
+        xa, xb, ma, mb = x[:, a], x[:, b], mask[:, a], mask[:, b]
+
+        count = ma.T @ mb
+        sum_a = xa.T @ mb
+        sum_b = ma.T @ xb
+        cov = xa.T @ xb - sum_a * sum_b / np.maximum(count, 1)
+        var_a = (xa * xa).T @ mb - sum_a ** 2 / np.maximum(count, 1)
+        var_b = ma.T @ (xb * xb) - sum_b ** 2 / np.maximum(count, 1)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr = cov / np.sqrt(var_a * var_b)
+        corr[count < 2] = np.nan
+        return corr
+
+    def pairs(self, numeric_df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """جفت ستون‌های (i < j) با |r| >= threshold
+
+        خروجی: (i, j, r) به ترتیب i و سپس j
+        """
+        x = self._prepare(numeric_df)
+        n, m = x.shape
+        mask = ~np.isnan(x)
+        has_nulls = not mask.all()
+
+        if has_nulls:
+            mask = mask.astype(np.float32)
+            x = np.where(mask > 0, x, 0).astype(np.float32)
+        else:
+            # استانداردسازی؛ ستون‌های ثابت صفر می‌شوند و همبستگی‌شان 0 است
+            std = x.std(axis=0, ddof=1, keepdims=True) if n > 1 else np.zeros((1, m), dtype=np.float32)
+            std[std == 0] = np.inf
+            x = x / (std * np.sqrt(max(n - 1, 1), dtype=np.float32))
+
+        left, right, values = [], [], []
+        starts = range(0, m, self.block_size)
+
+        for a_start in starts:
+            a = slice(a_start, min(a_start + self.block_size, m))
+
+            for b_start in range(a_start, m, self.block_size):
+                b = slice(b_start, min(b_start + self.block_size, m))
+                corr = self._block_masked(x, mask, a, b) if has_nulls else self._block_dense(x, a, b)
+
+                selected = np.abs(corr) >= self.threshold
+                if a_start == b_start:
+                    selected &= np.triu(np.ones_like(selected), k=1)
+
+                rows, cols = np.nonzero(selected)
+                left.append(rows + a_start)
+                right.append(cols + b_start)
+                values.append(np.clip(corr[rows, cols], -1, 1))
+
+        if not left:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, np.zeros(0, dtype=np.float32)
+
+        i, j, r = np.concatenate(left), np.concatenate(right), np.concatenate(values)
+        order = np.lexsort((j, i))
+
+        log.debug(f"Correlation engine: {m} columns, {len(i)} pairs above {self.threshold} ({self.method})")
+        return i[order], j[order], r[order]
@@ -0,0 +1,164 @@
+# Location: datanex/core/date_inference.py
+
+import pandas as pd
+from typing import Dict, Optional
+from utils.logger import log
+
+class DateInference:
+    """تشخیص ستون‌های تاریخ در ستون‌های متنی و تبدیل برداری آن‌ها
+
+    از هر ستون متنی نمونه‌ای گرفته و «شکل» مقادیر (رقم ← 0، حرف ← a) ساخته
+    می‌شود. برای شکل غالب یک format از بین FORMATS انتخاب و کل ستون با همان
+    format به صورت برداری parse می‌شود. format هر شکل cache می‌شود تا ستون‌ها
+    و فایل‌های بعدی با همان شکل فقط با همان format امتحان شوند. فقط ستون‌های مبهم (بدون
+    شکل غالب یا بدون format ثابت) با parse عنصر به عنصر (format='mixed')
+    تبدیل می‌شوند.
+    """
+
+    FORMATS = [
+        'ISO8601',
+        '%m/%d/%Y', '%d/%m/%Y', '%m/%d/%Y %H:%M', '%d/%m/%Y %H:%M',
+        '%m/%d/%Y %H:%M:%S', '%d/%m/%Y %H:%M:%S', '%Y/%m/%d', '%Y/%m/%d %H:%M:%S',
+        '%m-%d-%Y', '%d-%m-%Y', '%d.%m.%Y', '%d.%m.%Y %H:%M', '%d.%m.%Y %H:%M:%S',
+        '%d %b %Y', '%d %B %Y', '%b %d, %Y', '%B %d, %Y', '%b %d %Y', '%d-%b-%Y',
+        '%a, %d %b %Y %H:%M:%S %z'
+    ]
+
+    # مقادیری که فقط عدد هستند (مثل 2024 یا 12.5) تاریخ حساب نمی‌شوند
+    NUMERIC = r'^\s*[+-]?(\d+([.,]\d*)?|[.,]\d+)([eE][+-]?\d+)?\s*$'
+    # همه فرمت‌ها سال چهار رقمی دارند؛ مقادیری مثل نسخه 1.2.3 تاریخ نیستند
+    YEAR = r'\d{4}'
+
+    def __init__(self, sample_size: int = 200, min_ratio: float = 0.95, max_length: int = 40,
+                 max_shapes: int = 32, cache_size: int = 1024, random_state: int = 42):
+        self.sample_size = sample_size
+        self.max_shapes = max_shapes
+        self.min_ratio = min_ratio
+        self.max_length = max_length
+        self.cache_size = cache_size
+        self.random_state = random_state
+        self._formats: Dict[str, str] = {}
+
+    @staticmethod
+    def _shapes(values: pd.Series) -> pd.Series:
+        """شکل هر مقدار: رقم ← 0 و حرف ← a"""
+        return values.str.replace(r'\d', '0', regex=True).str.replace(r'[^\W\d_]', 'a', regex=True)
+
+    @staticmethod
+    def _to_datetime(values: pd.Series, date_format: str) -> pd.Series:
+        """parse با یک format؛ زمان‌های دارای منطقه زمانی به UTC بدون منطقه تبدیل می‌شوند"""
+        parsed = pd.to_datetime(values, format=date_format, errors='coerce', utc=True)
+        return parsed.dt.tz_convert(None)
+
+    def _ratio(self, sample: pd.Series, date_format: str) -> float:
+        try:
+            return float(self._to_datetime(sample, date_format).notna().mean())
+        except (ValueError, TypeError, OverflowError):
+            return 0.0
+
+    def _remember(self, shape: str, date_format: str):
+        if len(self._formats) >= self.cache_size:
+            self._formats.pop(next(iter(self._formats)))
+        self._formats[shape] = date_format
+
+    def _shape_format(self, shape: str, sample: pd.Series) -> Optional[str]:
+        """format مقادیر یک شکل (از cache یا با امتحان FORMATS روی نمونه)
+
+        format cache شده فقط وقتی استفاده می‌شود که روی همین نمونه هم برازش شود؛
+        مثلاً شکل 00/00/0000 هم برای %d/%m/%Y و هم برای %m/%d/%Y است.
+        """
+        cached = self._formats.get(shape)
+        if cached is not None and self._ratio(sample, cached) >= self.min_ratio:
+            return cached
+
+        fits = [date_format for date_format in self.FORMATS if self._ratio(sample, date_format) >= self.min_ratio]
+
+        # اگر چند format برازش شوند (مثلاً روز/ماه وقتی همه روزها <= 12 اند)
+        # اولی انتخاب ولی cache نمی‌شود تا ستون‌های دیگر دوباره بررسی شوند
+        if len(fits) == 1:
+            self._remember(shape, fits[0])
+        return fits[0] if fits else None
+
+    def infer_format(self, series: pd.Series) -> Optional[str]:
+        """format تاریخ یک ستون متنی؛ 'mixed' برای ستون‌های مبهم و None اگر تاریخ نیست"""
+        values = series.dropna()
+        if len(values) == 0:
+            return None
+
+        sample = values.sample(min(self.sample_size, len(values)), random_state=self.random_state)
+        if not all(isinstance(value, str) for value in sample):
+            return None
+
+        sample = sample.str.strip()
+        if sample.str.len().max() > self.max_length or not sample.str.contains(self.YEAR).all():
+            return None
+        if sample.str.match(self.NUMERIC).mean() >= self.min_ratio:
+            return None
+
+        shapes = self._shapes(sample).value_counts()
+        if shapes.iloc[0] / len(sample) >= self.min_ratio:
+            date_format = self._shape_format(shapes.index[0], sample)
+            if date_format is not None:
+                return date_format
+
+        # ستون مبهم: هر شکل جداگانه (parse_mixed)
+        if self._ratio(sample, 'mixed') >= self.min_ratio:
+            return 'mixed'
+        return None
+
+    def parse_mixed(self, series: pd.Series) -> pd.Series:
+        """parse ستون مبهم: گروه هر شکل با format خودش و فقط باقی‌مانده عنصر به عنصر"""
+        values = series.dropna().str.strip()
+        shapes = self._shapes(values)
+        parsed = pd.Series(pd.NaT, index=series.index, dtype='datetime64[ns]')
+        remaining = pd.Series(True, index=values.index)
+
+        groups = shapes.groupby(shapes, sort=False).groups
+        if len(groups) <= self.max_shapes:
+            for shape, index in groups.items():
+                group = values.loc[index]
+                sample = group.iloc[:self.sample_size]
+                date_format = self._shape_format(shape, sample)
+                if date_format is not None:
+                    parsed.loc[index] = self._to_datetime(group, date_format)
+                    remaining.loc[index] = parsed.loc[index].isna()
+
+        rest = values[remaining]
+        if len(rest) > 0:
+            parsed.loc[rest.index] = self._to_datetime(rest, 'mixed')
+        return parsed
+
+    def parse(self, series: pd.Series, date_format: str) -> Optional[pd.Series]:
+        """parse کل ستون با format داده شده؛ None اگر بخش کافی از مقادیر تاریخ نباشند"""
+        try:
+            if date_format == 'mixed':
+                parsed = self.parse_mixed(series)
+            else:
+                parsed = self._to_datetime(series.str.strip(), date_format)
+        except (ValueError, TypeError, OverflowError):
+            return None
+
+        present = series.notna().sum()
+        if present == 0 or parsed.notna().sum() / present < self.min_ratio:
+            return None
+        return parsed
+
+    def convert(self, df: pd.DataFrame) -> Dict[str, str]:
+        """تبدیل در جای ستون‌های تاریخ به datetime64؛ خروجی: {ستون: format}"""
+        formats = {}
+
+        for column in df.select_dtypes(include=['object', 'string']).columns:
+            date_format = self.infer_format(df[column])
+            if date_format is None:
+                continue
+
+            parsed = self.parse(df[column], date_format)
+            if parsed is not None:
+                df[column] = parsed
+                formats[column] = date_format
+
+        if formats:
+            log.info(f"Parsed date columns: {formats}")
+        return formats
+
+date_inference = DateInference()
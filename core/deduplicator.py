@@ -2,11 +2,19 @@
 
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional
 from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+from core.ann_index import IVFIndex
+from core.minhash import MinHashLSH
+from core.record_linkage import RecordLinker
+from core.grouping import group_rows, hash_pairs, group_members, groups_to_parquet
+from core.row_hashing import hash_rows, row_texts
+from core.fingerprint_index import fingerprint_index
+from services.embedding_cache import embedding_cache
+from utils.config import get_settings
 from utils.logger import log
-import hashlib
+
+settings = get_settings()
 
 class Deduplicator:
     """ماژول 5: تشخیص و حذف داده‌های تکراری"""
@@ -17,17 +25,21 @@ class Deduplicator:
     def _load_model(self):
         """بارگذاری مدل برای semantic similarity"""
         if self.model is None:
-            self.model = SentenceTransformer('all-MiniLM-L6-v2')
+            self.model = SentenceTransformer(settings.EMBEDDING_MODEL)
     
-    async def find_duplicates(self, df: pd.DataFrame, method: str = 'exact') -> Dict[str, Any]:
+    async def find_duplicates(self, df: pd.DataFrame, method: str = 'exact', **options) -> Dict[str, Any]:
         """پیدا کردن تکراری‌ها"""
         
         if method == 'exact':
             result = await self._find_exact_duplicates(df)
         elif method == 'fuzzy':
-            result = await self._find_fuzzy_duplicates(df)
+            result = await self._find_fuzzy_duplicates(df, **options)
         elif method == 'semantic':
-            result = await self._find_semantic_duplicates(df)
+            result = await self._find_semantic_duplicates(df, **options)
+        elif method == 'minhash':
+            result = await self._find_minhash_duplicates(df, **options)
+        elif method == 'linkage':
+            result = await self._find_linked_records(df, **options)
         elif method == 'hybrid':
             result = await self._find_hybrid_duplicates(df)
         else:
@@ -36,243 +48,333 @@ class Deduplicator:
         log.info(f"Found {result['duplicate_count']} duplicates using {method} method")
         return result
     
-    async def _find_exact_duplicates(self, df: pd.DataFrame) -> Dict[str, Any]:
-        """تشخیص تکراری‌های دقیق"""
-        duplicates = df[df.duplicated(keep=False)]
-        duplicate_groups = []
-        
-        if len(duplicates) > 0:
-            # گروه‌بندی تکراری‌ها
-            for _, group in duplicates.groupby(list(df.columns)):
-                if len(group) > 1:
-                    duplicate_groups.append({
-                        'size': len(group),
-                        'indices': group.index.tolist(),
-                        'sample': group.iloc[0].to_dict()
-                    })
-        
-        return {
-            'method': 'exact',
-            'duplicate_count': len(duplicates),
-            'duplicate_groups': duplicate_groups,
-            'unique_count': len(df) - len(duplicates) + len(duplicate_groups)
+    def _build_result(self, method: str, df: pd.DataFrame, group_ids: np.ndarray,
+                      row_similarity: Optional[np.ndarray] = None, **extra) -> Dict[str, Any]:
+        """نتیجه فشرده: آرایه شناسه گروه هر ردیف به جای دیکشنری برای هر گروه"""
+        duplicate_count = int((group_ids >= 0).sum())
+        group_count = int(group_ids.max()) + 1 if duplicate_count > 0 else 0
+        
+        result = {
+            'method': method,
+            'duplicate_count': duplicate_count,
+            'group_count': group_count,
+            'unique_count': len(df) - duplicate_count + group_count,
+            'group_ids': group_ids
         }
+        
+        if row_similarity is not None:
+            result['row_similarity'] = row_similarity
+        
+        result.update(extra)
+        return result
+    
+    @staticmethod
+    def _best_similarity(n: int, left: np.ndarray, right: np.ndarray, similarities: np.ndarray) -> np.ndarray:
+        """بیشترین شباهت هر ردیف با ردیف‌های هم‌گروه"""
+        best_similarity = np.zeros(n, dtype=np.float32)
+        np.maximum.at(best_similarity, left, similarities)
+        np.maximum.at(best_similarity, right, similarities)
+        return best_similarity
+    
+    async def _find_exact_duplicates(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """تشخیص تکراری‌های دقیق با هش 64 بیتی ردیف‌ها"""
+        group_ids = group_rows(len(df), hash_pairs(hash_rows(df)))
+        return self._build_result('exact', df, group_ids)
     
     async def _find_fuzzy_duplicates(self, df: pd.DataFrame, threshold: float = 0.85) -> Dict[str, Any]:
         """تشخیص تکراری‌های fuzzy با نام‌های متفاوت"""
-        duplicate_groups = []
-        processed_indices = set()
-        
-        # ایجاد هش برای هر ردیف (نادیده گرفتن تفاوت‌های جزئی)
-        def fuzzy_hash(row):
-            # نرمال‌سازی و هش
-            normalized = []
-            for val in row:
-                if pd.isna(val):
-                    normalized.append('NULL')
-                elif isinstance(val, str):
-                    # حذف فاصله‌ها و تبدیل به lowercase
-                    normalized.append(val.strip().lower())
-                else:
-                    normalized.append(str(val))
-            return hashlib.md5('|'.join(normalized).encode()).hexdigest()
-        
-        # محاسبه هش برای هر ردیف
-        hashes = df.apply(fuzzy_hash, axis=1)
-        
-        # پیدا کردن گروه‌های مشابه
-        for hash_val, group in df.groupby(hashes):
-            if len(group) > 1:
-                duplicate_groups.append({
-                    'size': len(group),
-                    'indices': group.index.tolist(),
-                    'sample': group.iloc[0].to_dict(),
-                    'variations': group.to_dict('records')[:5]
-                })
-                processed_indices.update(group.index)
-        
-        return {
-            'method': 'fuzzy',
-            'duplicate_count': len(processed_indices),
-            'duplicate_groups': duplicate_groups,
-            'unique_count': len(df) - len(processed_indices) + len(duplicate_groups)
-        }
+        # نرمال‌سازی برداری (حذف فاصله‌ها و lowercase) و هش هر ردیف
+        group_ids = group_rows(len(df), hash_pairs(hash_rows(df, normalize=True)))
+        return self._build_result('fuzzy', df, group_ids)
     
-    async def _find_semantic_duplicates(self, df: pd.DataFrame, threshold: float = 0.9) -> Dict[str, Any]:
-        """تشخیص تکراری‌های معنایی"""
+    async def _find_semantic_duplicates(self, df: pd.DataFrame, threshold: float = 0.9, k: int = 10,
+                                        nprobe: int = 8, exact_max_rows: int = 5000) -> Dict[str, Any]:
+        """تشخیص تکراری‌های معنایی با ایندکس IVF و k همسایه نزدیک"""
         self._load_model()
-        duplicate_groups = []
         
         try:
             # ترکیب ستون‌های متنی
             text_columns = df.select_dtypes(include=['object']).columns
             if len(text_columns) == 0:
-                return {
-                    'method': 'semantic',
-                    'duplicate_count': 0,
-                    'duplicate_groups': [],
-                    'unique_count': len(df),
-                    'note': 'No text columns for semantic comparison'
-                }
+                return self._build_result(
+                    'semantic', df, np.full(len(df), -1, dtype=np.int64),
+                    note='No text columns for semantic comparison'
+                )
             
             # ایجاد متن ترکیبی
             texts = df[text_columns].fillna('').astype(str).agg(' '.join, axis=1).tolist()
             
-            # محدود کردن برای عملکرد بهتر
-            max_rows = 1000
-            if len(texts) > max_rows:
-                log.warning(f"Dataset too large for semantic deduplication. Using first {max_rows} rows.")
-                texts = texts[:max_rows]
-                df_sample = df.head(max_rows)
-            else:
-                df_sample = df
-            
             # ایجاد embeddings
-            embeddings = self.model.encode(texts, show_progress_bar=False)
+            embeddings = embedding_cache.encode(self.model, texts, model_id=settings.EMBEDDING_MODEL)
             
-            # محاسبه شباهت
-            similarity_matrix = cosine_similarity(embeddings)
+            # برای داده‌های کوچک جستجوی کامل، در غیر این صورت IVF
+            use_exact = len(texts) <= exact_max_rows
+            index = IVFIndex(nlist=1 if use_exact else None, nprobe=nprobe).fit(embeddings)
+            left, right, similarities = index.self_join(k=k, threshold=threshold)
             
-            # پیدا کردن جفت‌های مشابه
-            processed = set()
-            
-            for i in range(len(similarity_matrix)):
-                if i in processed:
-                    continue
-                
-                # پیدا کردن ردیف‌های مشابه
-                similar_indices = np.where(similarity_matrix[i] >= threshold)[0]
-                
-                if len(similar_indices) > 1:
-                    group_indices = df_sample.iloc[similar_indices].index.tolist()
-                    duplicate_groups.append({
-                        'size': len(similar_indices),
-                        'indices': group_indices,
-                        'similarity_scores': similarity_matrix[i][similar_indices].tolist(),
-                        'sample': df_sample.iloc[i].to_dict(),
-                        'variations': df_sample.iloc[similar_indices].to_dict('records')[:3]
-                    })
-                    processed.update(similar_indices)
-            
-            duplicate_count = len(processed)
-            
-            return {
-                'method': 'semantic',
-                'duplicate_count': duplicate_count,
-                'duplicate_groups': duplicate_groups,
-                'unique_count': len(df_sample) - duplicate_count + len(duplicate_groups),
-                'threshold': threshold
-            }
+            return self._build_result(
+                'semantic', df, group_rows(len(df), (left, right)),
+                row_similarity=self._best_similarity(len(df), left, right, similarities),
+                threshold=threshold,
+                index='exact' if use_exact else 'ivf'
+            )
         
         except Exception as e:
             log.error(f"Error in semantic deduplication: {e}")
-            return {
-                'method': 'semantic',
-                'duplicate_count': 0,
-                'duplicate_groups': [],
-                'unique_count': len(df),
-                'error': str(e)
-            }
+            return self._build_result('semantic', df, np.full(len(df), -1, dtype=np.int64), error=str(e))
+    
+    async def _find_minhash_duplicates(self, df: pd.DataFrame, threshold: float = 0.8, num_perm: int = 128,
+                                       shingle_size: int = 4, bands: Optional[int] = None) -> Dict[str, Any]:
+        """تشخیص near-duplicate با MinHash و LSH (غلط تایپی، جابجایی کلمات و تغییرات جزئی)"""
+        if len(df) == 0:
+            return self._build_result('minhash', df, np.zeros(0, dtype=np.int64))
+        
+        lsh = MinHashLSH(threshold=threshold, num_perm=num_perm, shingle_size=shingle_size, bands=bands)
+        left, right, similarities = lsh.find_pairs(row_texts(df).tolist())
+        
+        return self._build_result(
+            'minhash', df, group_rows(len(df), (left, right)),
+            row_similarity=self._best_similarity(len(df), left, right, similarities),
+            threshold=threshold,
+            lsh={'bands': lsh.bands, 'rows_per_band': lsh.rows_per_band, 'num_perm': num_perm}
+        )
+    
+    async def _find_linked_records(self, df: pd.DataFrame, fields: Optional[Any] = None,
+                                   blocking: Optional[List[str]] = None, window: int = 10,
+                                   threshold: float = 0.85, scorer: str = 'token_sort_ratio') -> Dict[str, Any]:
+        """record linkage روی ستون‌های کلیدی (مثلاً نام و آدرس) با blocking و sorted-neighbourhood
+        
+        fields: لیست ستون‌ها یا دیکشنری {ستون: وزن}
+        """
+        if not fields:
+            raise ValueError("Record linkage requires key 'fields'")
+        
+        linker = RecordLinker(fields, blocking=blocking, window=window, threshold=threshold, scorer=scorer)
+        left, right, scores = linker.find_pairs(df)
+        
+        return self._build_result(
+            'linkage', df, group_rows(len(df), (left, right)),
+            row_similarity=self._best_similarity(len(df), left, right, scores),
+            threshold=threshold,
+            linkage={'fields': linker.weights, 'blocking': linker.blocking, 'window': window}
+        )
     
     async def _find_hybrid_duplicates(self, df: pd.DataFrame) -> Dict[str, Any]:
-        """ترکیب روش‌های مختلف"""
-        # اول exact
-        exact_result = await self._find_exact_duplicates(df)
-        exact_indices = set()
-        for group in exact_result['duplicate_groups']:
-            exact_indices.update(group['indices'])
-        
-        # حذف exact duplicates
-        df_remaining = df.drop(index=list(exact_indices))
-        
-        # سپس fuzzy روی باقی‌مانده
-        fuzzy_result = await self._find_fuzzy_duplicates(df_remaining)
-        fuzzy_indices = set()
-        for group in fuzzy_result['duplicate_groups']:
-            fuzzy_indices.update(group['indices'])
-        
-        # ترکیب نتایج
-        all_groups = exact_result['duplicate_groups'] + fuzzy_result['duplicate_groups']
-        
-        return {
-            'method': 'hybrid',
-            'duplicate_count': len(exact_indices) + len(fuzzy_indices),
-            'duplicate_groups': all_groups,
-            'unique_count': len(df) - len(exact_indices) - len(fuzzy_indices) + len(all_groups),
-            'breakdown': {
-                'exact': len(exact_indices),
-                'fuzzy': len(fuzzy_indices)
+        """ترکیب روش‌های مختلف
+        
+        جفت‌های exact و fuzzy با هم به union-find داده می‌شوند تا گروه‌ها
+        بستار تعدی هر دو روش باشند.
+        """
+        exact_pairs = hash_pairs(hash_rows(df))
+        fuzzy_pairs = hash_pairs(hash_rows(df, normalize=True))
+        
+        exact_rows = int((group_rows(len(df), exact_pairs) >= 0).sum())
+        group_ids = group_rows(len(df), exact_pairs, fuzzy_pairs)
+        duplicate_rows = int((group_ids >= 0).sum())
+        
+        return self._build_result(
+            'hybrid', df, group_ids,
+            breakdown={
+                'exact': exact_rows,
+                'fuzzy': duplicate_rows - exact_rows
+            }
+        )
+    
+    def describe_groups(self, df: pd.DataFrame, duplicate_result: Dict, offset: int = 0,
+                        limit: int = 100, variations: int = 3) -> List[Dict[str, Any]]:
+        """نمایش گروه‌ها (اندیس‌ها، نمونه و چند variation) فقط برای یک صفحه از گروه‌ها"""
+        group_ids = duplicate_result['group_ids']
+        members, bounds = group_members(group_ids)
+        row_similarity = duplicate_result.get('row_similarity')
+        
+        groups = []
+        for group_id in range(offset, min(offset + limit, len(bounds) - 1)):
+            rows = members[bounds[group_id]:bounds[group_id + 1]]
+            group = {
+                'group_id': group_id,
+                'size': len(rows),
+                'indices': df.index[rows].tolist(),
+                'sample': df.iloc[rows[0]].to_dict(),
+                'variations': df.iloc[rows[:variations]].to_dict('records')
             }
+            if row_similarity is not None:
+                group['similarity_scores'] = row_similarity[rows].tolist()
+            groups.append(group)
+        
+        return groups
+    
+    def summarize(self, duplicate_result: Dict, top: int = 10) -> Dict[str, Any]:
+        """خلاصه کوچک و قابل JSON نتیجه (بدون آرایه‌های هر ردیف)
+        
+        گروه‌ها به صورت artifact ستونی ذخیره می‌شوند (groups_to_parquet) و
+        از طریق endpoint صفحه‌بندی شده خوانده می‌شوند.
+        """
+        summary = {key: value for key, value in duplicate_result.items() if not isinstance(value, np.ndarray)}
+        
+        group_ids = duplicate_result['group_ids']
+        sizes = np.bincount(group_ids[group_ids >= 0], minlength=duplicate_result['group_count'])
+        largest = np.argsort(-sizes, kind='stable')[:top]
+        summary['largest_groups'] = [{'group_id': int(g), 'size': int(sizes[g])} for g in largest]
+        return summary
+    
+    def to_parquet(self, duplicate_result: Dict) -> bytes:
+        """artifact ستونی ردیف ← شناسه گروه"""
+        return groups_to_parquet(duplicate_result['group_ids'], duplicate_result.get('row_similarity'))
+    
+    async def find_cross_file_duplicates(self, df: pd.DataFrame, file_id: Optional[str] = None,
+                                         near: bool = False, threshold: float = 0.8) -> Dict[str, Any]:
+        """مقایسه ردیف‌ها با همه فایل‌های قبلی از طریق ایندکس اثر انگشت"""
+        hashes = hash_rows(df)
+        seen, matches = fingerprint_index.lookup(hashes, exclude_file_id=file_id)
+        
+        result = {
+            'method': 'cross_file',
+            'rows_checked': len(df),
+            'rows_seen': int(seen.sum())
         }
+        
+        if near:
+            signatures = MinHashLSH(num_perm=fingerprint_index.num_perm).signatures(row_texts(df).tolist())
+            near_seen, near_matches = fingerprint_index.lookup_near(signatures, threshold, exclude_file_id=file_id)
+            result['rows_near_seen'] = int((near_seen & ~seen).sum())
+            for other_id, count in near_matches.items():
+                matches[other_id] = max(matches.get(other_id, 0), count)
+        
+        indexed_files = fingerprint_index.files()
+        result['seen_in_files'] = sorted(
+            [
+                {
+                    'file_id': other_id,
+                    'filename': indexed_files.get(other_id, {}).get('filename'),
+                    'matching_rows': count
+                }
+                for other_id, count in matches.items()
+            ],
+            key=lambda x: x['matching_rows'],
+            reverse=True
+        )
+        
+        log.info(f"{result['rows_seen']} of {len(df)} rows already seen in {len(matches)} files")
+        return result
+    
+    async def register_file(self, df: pd.DataFrame, file_id: str, filename: str, with_minhash: Optional[bool] = None):
+        """افزودن ردیف‌های فایل به ایندکس اثر انگشت برای مقایسه‌های بعدی"""
+        if with_minhash is None:
+            with_minhash = settings.FINGERPRINT_STORE_MINHASH
+        
+        signatures = None
+        if with_minhash and len(df) > 0:
+            signatures = MinHashLSH(num_perm=fingerprint_index.num_perm).signatures(row_texts(df).tolist())
+        
+        fingerprint_index.add_file(file_id, filename, hash_rows(df), signatures)
+    
+    def _group_ids(self, df: pd.DataFrame, duplicate_result: Dict) -> np.ndarray:
+        """ستون شناسه گروه برای هر ردیف (بر اساس موقعیت)؛ -1 یعنی بدون گروه"""
+        if 'group_ids' in duplicate_result:
+            return np.asarray(duplicate_result['group_ids'], dtype=np.int64)
+        
+        # نتیجه به شکل لیست گروه‌ها (مثلاً ساخته شده توسط کاربر)
+        group_ids = np.full(len(df), -1, dtype=np.int64)
+        groups = duplicate_result['duplicate_groups']
+        if not groups:
+            return group_ids
+        
+        labels = [index for group in groups for index in group['indices']]
+        members = np.repeat(np.arange(len(groups)), [len(group['indices']) for group in groups])
+        positions = df.index.get_indexer(labels)
+        
+        found = positions >= 0
+        group_ids[positions[found]] = members[found]
+        return group_ids
     
     async def remove_duplicates(self, df: pd.DataFrame, duplicate_result: Dict, keep: str = 'first') -> pd.DataFrame:
         """حذف تکراری‌ها"""
-        df_clean = df.copy()
+        if keep not in ('first', 'last', 'none'):
+            raise ValueError(f"Invalid keep parameter: {keep}")
         
-        indices_to_drop = []
+        group_ids = self._group_ids(df, duplicate_result)
+        in_group = group_ids >= 0
         
-        for group in duplicate_result['duplicate_groups']:
-            group_indices = group['indices']
-            
-            if keep == 'first':
-                # حذف همه به جز اولی
-                indices_to_drop.extend(group_indices[1:])
-            elif keep == 'last':
-                # حذف همه به جز آخری
-                indices_to_drop.extend(group_indices[:-1])
-            elif keep == 'none':
-                # حذف همه
-                indices_to_drop.extend(group_indices)
-        
-        df_clean = df_clean.drop(index=indices_to_drop)
-        
-        log.info(f"Removed {len(indices_to_drop)} duplicate rows")
+        if keep == 'none':
+            # حذف همه
+            drop_mask = in_group
+        else:
+            # حذف همه به جز اولی (یا آخری) هر گروه
+            drop_mask = in_group & pd.Series(group_ids).duplicated(keep=keep).to_numpy()
+        
+        df_clean = df[~drop_mask]
+        
+        log.info(f"Removed {int(drop_mask.sum())} duplicate rows")
         return df_clean
     
     async def merge_duplicates(self, df: pd.DataFrame, duplicate_result: Dict, strategy: str = 'prefer_complete') -> pd.DataFrame:
-        """ادغام تکراری‌ها به جای حذف"""
-        df_merged = df.copy()
+        """ادغام تکراری‌ها به جای حذف
+        
+        همه گروه‌ها با یک groupby روی ستون شناسه گروه ادغام می‌شوند و ردیف‌های
+        اضافه در پایان با یک drop حذف می‌شوند.
+        """
+        if strategy not in ('prefer_complete', 'aggregate'):
+            raise ValueError(f"Unknown merge strategy: {strategy}")
+        
+        group_ids = self._group_ids(df, duplicate_result)
+        positions = np.flatnonzero(group_ids >= 0)
+        if len(positions) == 0:
+            return df.copy()
+        
+        groups = group_ids[positions]
+        group_data = df.iloc[positions].reset_index(drop=True)
         
-        for group in duplicate_result['duplicate_groups']:
-            group_indices = group['indices']
-            group_data = df.loc[group_indices]
+        if strategy == 'prefer_complete':
+            # ترجیح ردیفی که کمترین null دارد
+            null_counts = group_data.isnull().sum(axis=1).to_numpy()
+            order = np.lexsort((positions, null_counts, groups))
+            is_first = np.ones(len(order), dtype=bool)
+            is_first[1:] = groups[order][1:] != groups[order][:-1]
+            is_target = np.zeros(len(positions), dtype=bool)
+            is_target[order[is_first]] = True
             
-            if strategy == 'prefer_complete':
-                # ترجیح ردیفی که کمترین null دارد
-                null_counts = group_data.isnull().sum(axis=1)
-                best_idx = null_counts.idxmin()
-                merged_row = group_data.loc[best_idx]
-                
-                # پر کردن null‌های merged_row از سایر ردیف‌ها
-                for idx in group_indices:
-                    if idx != best_idx:
-                        for col in df.columns:
-                            if pd.isna(merged_row[col]) and not pd.isna(group_data.loc[idx, col]):
-                                merged_row[col] = group_data.loc[idx, col]
-                
-                # حذف بقیه و جایگزینی با merged
-                df_merged = df_merged.drop(index=[i for i in group_indices if i != best_idx])
-                df_merged.loc[best_idx] = merged_row
+            # ردیف منتخب اول و سپس بقیه به ترتیب اصلی؛ first() اولین مقدار غیر null هر ستون را برمی‌دارد
+            order = np.lexsort((positions, ~is_target, groups))
+            merged = group_data.iloc[order].groupby(groups[order], sort=True).first()
+        
+        else:
+            # ترکیب مقادیر: میانگین برای ستون‌های عددی و mode برای بقیه؛ نتیجه در اولین ردیف گروه
+            is_target = ~pd.Series(groups).duplicated(keep='first').to_numpy()
             
-            elif strategy == 'aggregate':
-                # ترکیب مقادیر
-                merged_row = {}
-                for col in df.columns:
-                    col_data = group_data[col].dropna()
-                    
-                    if len(col_data) == 0:
-                        merged_row[col] = None
-                    elif pd.api.types.is_numeric_dtype(col_data):
-                        merged_row[col] = col_data.mean()
-                    else:
-                        merged_row[col] = col_data.mode()[0] if len(col_data.mode()) > 0 else col_data.iloc[0]
-                
-                # نگه داشتن اولین ردیف و حذف بقیه
-                first_idx = group_indices[0]
-                df_merged = df_merged.drop(index=group_indices[1:])
-                df_merged.loc[first_idx] = pd.Series(merged_row)
-        
-        log.info(f"Merged duplicate groups using {strategy} strategy")
+            merged = pd.DataFrame(index=np.unique(groups))
+            for col in df.columns:
+                values = group_data[col]
+                if pd.api.types.is_numeric_dtype(values):
+                    merged[col] = values.groupby(groups).mean()
+                else:
+                    counts = pd.DataFrame({'group': groups, 'value': values}).dropna().groupby(['group', 'value']).size()
+                    if len(counts) == 0:
+                        merged[col] = None
+                        continue
+                    # بیشترین تکرار؛ در حالت تساوی کوچک‌ترین مقدار (مانند mode)
+                    mode = counts.groupby(level='group').idxmax()
+                    merged[col] = pd.Series([key[1] for key in mode], index=mode.index)
+        
+        # جایگزینی ردیف‌های منتخب با نتیجه ادغام و یک drop نهایی برای بقیه
+        target_positions = positions[is_target]
+        target_positions = target_positions[np.argsort(groups[is_target], kind='stable')]
+        
+        df_merged = df.copy()
+        for j, col in enumerate(df.columns):
+            values = merged[col]
+            column = df_merged.iloc[:, j]
+            if values.dtype != column.dtype:
+                # مثلاً میانگین یک ستون int؛ نوع ستون یک بار ارتقا داده می‌شود
+                both_numpy = isinstance(values.dtype, np.dtype) and isinstance(column.dtype, np.dtype)
+                common = np.result_type(values.dtype, column.dtype) if both_numpy else object
+                df_merged.isetitem(j, column.astype(common))
+            df_merged.iloc[target_positions, j] = values.to_numpy()
+        
+        drop_mask = np.zeros(len(df), dtype=bool)
+        drop_mask[positions[~is_target]] = True
+        df_merged = df_merged[~drop_mask]
+        
+        log.info(f"Merged {len(merged)} duplicate groups using {strategy} strategy")
         return df_merged
 
 deduplicator = Deduplicator()
\ No newline at end of file
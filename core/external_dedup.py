@@ -0,0 +1,159 @@
+# Location: datanex/core/external_dedup.py
+
+import pandas as pd
+import numpy as np
+from pathlib import Path
+from typing import Dict, Any, Optional
+from core.file_handler import file_handler
+from core.row_hashing import hash_rows, normalize_frame
+from models.file import FileType
+from utils.logger import log
+import os
+import shutil
+import tempfile
+
+POSITION_COLUMN = '__position'
+
+class ExternalDeduplicator:
+    """حذف تکراری‌ها خارج از حافظه (out-of-core) با hash partitioning روی دیسک
+
+    مرحله 1: فایل تکه‌تکه خوانده می‌شود و هر ردیف بر اساس هش خود در یکی از
+    partition های روی دیسک نوشته می‌شود.
+    مرحله 2: هر partition جداگانه بارگذاری و تکراری‌هایش مشخص می‌شود؛ نتیجه
+    در یک mask روی دیسک (memmap) ذخیره می‌شود.
+    مرحله 3: فایل دوباره به صورت stream خوانده و ردیف‌های نگه‌داشته‌شده در
+    خروجی نوشته می‌شوند.
+    """
+
+    SUPPORTED_METHODS = ('exact', 'fuzzy')
+
+    def __init__(self, chunksize: int = 200000, partition_bytes: int = 64 * 1024 ** 2, max_partitions: int = 1024):
+        self.chunksize = chunksize
+        self.partition_bytes = partition_bytes
+        self.max_partitions = max_partitions
+
+    def _num_partitions(self, input_path: str) -> int:
+        file_size = os.path.getsize(input_path)
+        return int(min(self.max_partitions, max(16, file_size // self.partition_bytes + 1)))
+
+    async def deduplicate(self, input_path: str, file_type: FileType, output_path: str, method: str = 'exact',
+                          keep: str = 'first', work_dir: Optional[str] = None) -> Dict[str, Any]:
+        """حذف تکراری‌ها از فایل روی دیسک و نوشتن خروجی CSV به صورت stream"""
+        if method not in self.SUPPORTED_METHODS:
+            raise ValueError(f"Method {method} is not supported for out-of-core deduplication")
+
+        if keep not in ('first', 'last', 'none'):
+            raise ValueError(f"Invalid keep parameter: {keep}")
+
+        spill_dir = Path(tempfile.mkdtemp(prefix='dedup_', dir=work_dir))
+        num_partitions = self._num_partitions(input_path)
+
+        try:
+            total_rows = await self._partition(input_path, file_type, spill_dir, num_partitions, method)
+
+            keep_mask = np.lib.format.open_memmap(
+                spill_dir / 'keep_mask.npy', mode='w+', dtype=bool, shape=(total_rows,)
+            )
+            keep_mask[:] = True
+
+            duplicate_count, group_count = self._resolve_partitions(spill_dir, num_partitions, keep, keep_mask)
+            keep_mask.flush()
+
+            rows_out = await self._write_output(input_path, file_type, output_path, keep_mask)
+        finally:
+            shutil.rmtree(spill_dir, ignore_errors=True)
+
+        log.info(f"Out-of-core deduplication removed {total_rows - rows_out} of {total_rows} rows")
+        return {
+            'method': method,
+            'rows_in': total_rows,
+            'rows_out': rows_out,
+            'duplicate_count': duplicate_count,
+            'duplicate_groups': group_count,
+            'duplicates_removed': total_rows - rows_out,
+            'partitions': num_partitions
+        }
+
+    async def _partition(self, input_path: str, file_type: FileType, spill_dir: Path,
+                         num_partitions: int, method: str) -> int:
+        """مرحله 1: نوشتن ردیف‌ها در partition های روی دیسک بر اساس هش"""
+        offset = 0
+
+        async for chunk_number, chunk in self._enumerate_chunks(input_path, file_type):
+            frame = normalize_frame(chunk) if method == 'fuzzy' else chunk
+            partitions = hash_rows(frame) % np.uint64(num_partitions)
+
+            frame = frame.reset_index(drop=True)
+            frame[POSITION_COLUMN] = np.arange(offset, offset + len(frame), dtype=np.int64)
+
+            for partition in np.unique(partitions):
+                partition_dir = spill_dir / f"part_{int(partition):05d}"
+                partition_dir.mkdir(exist_ok=True)
+                frame[partitions == partition].to_pickle(partition_dir / f"{chunk_number:08d}.pkl")
+
+            offset += len(chunk)
+
+        return offset
+
+    def _resolve_partitions(self, spill_dir: Path, num_partitions: int, keep: str,
+                            keep_mask: np.ndarray):
+        """مرحله 2: تشخیص تکراری‌ها در هر partition به صورت جداگانه"""
+        duplicate_count = 0
+        group_count = 0
+
+        for partition in range(num_partitions):
+            partition_dir = spill_dir / f"part_{partition:05d}"
+            if not partition_dir.exists():
+                continue
+
+            frame = pd.concat(
+                [pd.read_pickle(path) for path in sorted(partition_dir.glob('*.pkl'))],
+                ignore_index=True
+            )
+            shutil.rmtree(partition_dir, ignore_errors=True)
+
+            frame = frame.sort_values(POSITION_COLUMN, kind='stable')
+            columns = [column for column in frame.columns if column != POSITION_COLUMN]
+
+            all_duplicates = frame.duplicated(subset=columns, keep=False).to_numpy()
+            if not all_duplicates.any():
+                continue
+
+            first_duplicates = frame.duplicated(subset=columns, keep='first').to_numpy()
+            duplicate_count += int(all_duplicates.sum())
+            group_count += int(all_duplicates.sum() - first_duplicates.sum())
+
+            if keep == 'none':
+                dropped = all_duplicates
+            else:
+                dropped = frame.duplicated(subset=columns, keep=keep).to_numpy()
+
+            keep_mask[frame[POSITION_COLUMN].to_numpy()[dropped]] = False
+
+        return duplicate_count, group_count
+
+    async def _write_output(self, input_path: str, file_type: FileType, output_path: str,
+                            keep_mask: np.ndarray) -> int:
+        """مرحله 3: نوشتن stream ردیف‌های باقی‌مانده به ترتیب اصلی"""
+        offset = 0
+        rows_out = 0
+
+        with open(output_path, 'w', newline='', encoding='utf-8') as output:
+            async for chunk_number, chunk in self._enumerate_chunks(input_path, file_type):
+                mask = np.asarray(keep_mask[offset:offset + len(chunk)])
+                kept = chunk[mask]
+                kept.to_csv(output, index=False, header=(chunk_number == 0))
+                rows_out += len(kept)
+                offset += len(chunk)
+
+        return rows_out
+
+    async def _enumerate_chunks(self, input_path: str, file_type: FileType):
+        # CSV به صورت متن خوانده می‌شود تا نوع ستون‌ها در همه تکه‌ها یکسان باشد
+        # و خروجی دقیقاً همان مقادیر ورودی را داشته باشد
+        chunk_number = 0
+        async for chunk in file_handler.iter_chunks(input_path, file_type, self.chunksize, dtype=str):
+            yield chunk_number, chunk
+            chunk_number += 1
+
+external_deduplicator = ExternalDeduplicator()
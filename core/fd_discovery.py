@@ -0,0 +1,234 @@
+# Location: datanex/core/fd_discovery.py
+
+import pandas as pd
+import numpy as np
+from itertools import combinations
+from typing import Dict, List, Optional, Tuple
+from utils.logger import log
+
+# partition بدون کلاس‌های تک‌عضوی: (موقعیت ردیف‌ها، برچسب کلاس هر ردیف)
+StrippedPartition = Tuple[np.ndarray, np.ndarray]
+
+class FDDiscovery:
+    """کشف وابستگی‌های تابعی (FD) به سبک TANE
+
+    lattice مجموعه ستون‌ها سطح به سطح پیمایش می‌شود. برای هر مجموعه یک
+    stripped partition (فقط کلاس‌های بیش از یک عضو) نگه داشته و partition
+    سطح بعد از ضرب دو partition سطح قبل ساخته می‌شود. مجموعه‌های کاندید
+    سمت راست (C+) و کلیدها lattice را هرس می‌کنند.
+
+    max_error: حداکثر خطای g3 (نسبت ردیف‌هایی که باید حذف شوند تا FD برقرار
+    شود)؛ 0 یعنی فقط FD های دقیق.
+    sample_size: کشف روی نمونه انجام می‌شود و در صورت verify هر FD یافته شده
+    روی کل داده تأیید می‌شود.
+    """
+
+    def __init__(self, max_error: float = 0.0, max_lhs: int = 2, sample_size: Optional[int] = 10000,
+                 verify: bool = True, random_state: int = 42):
+        self.max_error = max_error
+        self.max_lhs = max_lhs
+        self.sample_size = sample_size
+        self.verify = verify
+        self.random_state = random_state
+
+    @staticmethod
+    def _strip(rows: np.ndarray, labels: np.ndarray) -> StrippedPartition:
+        """حذف کلاس‌های تک‌عضوی و فشرده کردن برچسب‌ها"""
+        labels, _ = pd.factorize(labels)
+        shared = np.bincount(labels) > 1
+        keep = shared[labels]
+        new_labels = np.cumsum(shared) - 1
+        return rows[keep], new_labels[labels[keep]].astype(np.int32)
+    
+    @staticmethod
+    def _error(partition: StrippedPartition) -> int:
+        """e(X) در TANE: تعداد ردیف‌های کلاس‌ها منهای تعداد کلاس‌ها"""
+        rows, labels = partition
+        return int(len(rows) - (labels.max() + 1)) if len(rows) else 0
+
+    def _product(self, first: StrippedPartition, second: StrippedPartition, lookup: np.ndarray) -> StrippedPartition:
+        """ضرب دو stripped partition با یک آرایه کمکی به طول n"""
+        rows, labels = first
+        lookup[second[0]] = second[1]
+        other = lookup[rows]
+        lookup[second[0]] = -1
+
+        keep = other >= 0
+        rows, labels, other = rows[keep], labels[keep], other[keep]
+        combined = labels.astype(np.int64) * (int(other.max()) + 1 if len(other) else 1) + other
+        return self._strip(rows, combined)
+
+    def _error_rows(self, lhs: StrippedPartition, full: StrippedPartition, lookup: np.ndarray) -> int:
+        """تعداد ردیف‌هایی که باید حذف شوند تا lhs → (full - lhs) برقرار شود (g3)"""
+        rows, labels = lhs
+        if len(rows) == 0:
+            return 0
+
+        lookup[full[0]] = full[1]
+        sub = lookup[rows]
+        lookup[full[0]] = -1
+
+        # اندازه زیرکلاس هر ردیف در partition کامل (ردیف‌های تک‌عضوی اندازه 1 دارند)
+        sizes = np.bincount(full[1], minlength=1)
+        sub_size = np.where(sub >= 0, sizes[np.maximum(sub, 0)], 1)
+
+        largest = np.zeros(int(labels.max()) + 1, dtype=np.int64)
+        np.maximum.at(largest, labels, sub_size)
+        return int(len(rows) - largest.sum())
+
+    @staticmethod
+    def _g3_rows(codes: List[np.ndarray], lhs: Tuple[int, ...], a: int) -> int:
+        """تعداد ردیف‌هایی که باید حذف شوند تا lhs → A برقرار شود، مستقیم از کد ستون‌ها"""
+        n = len(codes[a])
+        if lhs:
+            lhs_codes = pd.factorize(pd.MultiIndex.from_arrays([codes[b] for b in lhs]))[0]
+        else:
+            lhs_codes = np.zeros(n, dtype=np.int64)
+
+        pairs = pd.factorize(pd.MultiIndex.from_arrays([lhs_codes, codes[a]]))[0]
+        counts = np.bincount(pairs)
+        pair_lhs = np.zeros(len(counts), dtype=np.int64)
+        pair_lhs[pairs] = lhs_codes
+
+        largest = np.zeros(int(lhs_codes.max()) + 1, dtype=np.int64)
+        np.maximum.at(largest, pair_lhs, counts)
+        return int(n - largest.sum())
+
+    def discover(self, df: pd.DataFrame) -> List[Dict]:
+        """FD های مینیمال X → A با |X| <= max_lhs
+
+        خروجی: لیست {'lhs': [...], 'rhs': ستون، 'error': خطای g3}
+        """
+        full_df = df
+        if self.sample_size and len(df) > self.sample_size:
+            df = df.sample(self.sample_size, random_state=self.random_state)
+
+        n, m = len(df), len(df.columns)
+        if n < 2 or m < 2:
+            return []
+
+        columns = list(df.columns)
+        all_rows = np.arange(n, dtype=np.int64)
+        lookup = np.full(n, -1, dtype=np.int32)
+        max_error_rows = int(np.floor(self.max_error * n))
+
+        # partition هر ستون از کدهای عددی؛ null هم یک مقدار حساب می‌شود
+        partitions: Dict[Tuple[int, ...], StrippedPartition] = {(): (all_rows, np.zeros(n, dtype=np.int32))}
+        codes = [pd.factorize(df[column], use_na_sentinel=False)[0] for column in columns]
+        for a in range(m):
+            partitions[(a,)] = self._strip(all_rows, codes[a])
+
+        everything = frozenset(range(m))
+        cplus: Dict[Tuple[int, ...], frozenset] = {(): everything}
+        level = [(a,) for a in range(m)]
+        dependencies = []
+
+        while level:
+            # محاسبه وابستگی‌ها برای سطح جاری
+            for x in level:
+                candidates = everything
+                for a in x:
+                    candidates &= cplus.get(tuple(b for b in x if b != a), frozenset())
+
+                for a in sorted(set(x) & candidates):
+                    lhs = tuple(b for b in x if b != a)
+                    
+                    # lhs → A دقیقاً برقرار است اگر e(lhs) = e(x)؛ g3 فقط در حالت تقریبی لازم است
+                    if self._error(partitions[lhs]) == self._error(partitions[x]):
+                        error_rows = 0
+                    elif max_error_rows == 0:
+                        continue
+                    else:
+                        error_rows = self._error_rows(partitions[lhs], partitions[x], lookup)
+
+                    if error_rows <= max_error_rows:
+                        dependencies.append((lhs, a, error_rows / n))
+                        candidates -= {a}
+                        if error_rows == 0:
+                            candidates -= everything - set(x)
+
+                cplus[x] = candidates
+
+            # هرس: مجموعه‌های بدون کاندید و کلیدها
+            next_candidates = []
+            for x in level:
+                if not cplus[x]:
+                    continue
+
+                if len(partitions[x][0]) == 0:
+                    # x کلید است پس x → A برقرار است؛ مینیمال است اگر هیچ x - {B} تعیین‌کننده A
+                    # نباشد. مجموعه‌های سطح بعد ممکن است هرس شده باشند، پس C+ آن‌ها در
+                    # دسترس نیست و این شرط مستقیم روی کد ستون‌ها بررسی می‌شود.
+                    if len(x) <= self.max_lhs:
+                        for a in sorted(cplus[x] - set(x)):
+                            if all(self._g3_rows(codes, tuple(c for c in x if c != b), a) > max_error_rows
+                                   for b in x):
+                                dependencies.append((x, a, 0.0))
+                    continue
+
+                next_candidates.append(x)
+
+            if len(level[0]) > self.max_lhs:
+                break
+
+            level = self._next_level(next_candidates, partitions, lookup)
+
+            # partition های دو سطح قبل دیگر لازم نیستند
+            depth = len(level[0]) if level else 0
+            for key in [key for key in partitions if len(key) < depth - 1]:
+                del partitions[key]
+
+        results = [
+            {'lhs': [columns[b] for b in lhs], 'rhs': columns[a], 'error': float(error)}
+            for lhs, a, error in dependencies
+        ]
+        
+        if self.verify and len(full_df) > n:
+            results = self._verify(full_df, results)
+        
+        log.debug(f"FD discovery: {len(results)} dependencies over {m} columns and {n} rows")
+        return results
+    
+    def _verify(self, df: pd.DataFrame, results: List[Dict]) -> List[Dict]:
+        """تأیید FD های یافته شده روی نمونه با کل داده"""
+        n = len(df)
+        codes = {}
+        verified = []
+        
+        for fd in results:
+            for column in fd['lhs'] + [fd['rhs']]:
+                if column not in codes:
+                    codes[column] = pd.factorize(df[column], use_na_sentinel=False)[0]
+            
+            if fd['lhs']:
+                lhs = pd.MultiIndex.from_arrays([codes[column] for column in fd['lhs']])
+                lhs_codes = pd.factorize(lhs)[0]
+            else:
+                lhs_codes = np.zeros(n, dtype=np.int64)
+            
+            # g3: در هر کلاس lhs بیشترین مقدار rhs نگه داشته می‌شود
+            pair_counts = pd.Series(1, index=pd.MultiIndex.from_arrays([lhs_codes, codes[fd['rhs']]])).groupby(level=[0, 1]).size()
+            kept = pair_counts.groupby(level=0).max().sum()
+            error = (n - kept) / n
+            
+            if error <= self.max_error:
+                verified.append({**fd, 'error': float(error)})
+        
+        return verified
+
+    def _next_level(self, level: List[Tuple[int, ...]], partitions: Dict, lookup: np.ndarray) -> List[Tuple[int, ...]]:
+        """تولید سطح بعد با join مجموعه‌های دارای پیشوند مشترک"""
+        present = set(level)
+        blocks: Dict[Tuple[int, ...], List[Tuple[int, ...]]] = {}
+        for x in level:
+            blocks.setdefault(x[:-1], []).append(x)
+
+        next_level = []
+        for members in blocks.values():
+            for y, z in combinations(sorted(members), 2):
+                x = y + (z[-1],)
+                if all(tuple(b for b in x if b != a) in present for a in x):
+                    partitions[x] = self._product(partitions[y], partitions[z], lookup)
+                    next_level.append(x)
+
+        return next_level
@@ -3,10 +3,11 @@
 import pandas as pd
 import polars as pl
 from pathlib import Path
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, Tuple, AsyncIterator
 import magic
 from utils.logger import log
 from models.file import FileType
+from core.date_inference import date_inference
 import json
 import xml.etree.ElementTree as ET
 from PyPDF2 import PdfReader
@@ -88,8 +89,19 @@ class FileHandler:
         
         return metadata
     
-    async def load_data(self, file_data: bytes, file_type: FileType) -> pd.DataFrame:
-        """بارگذاری داده به DataFrame"""
+    async def load_data(self, file_data: bytes, file_type: FileType, parse_dates: bool = True) -> pd.DataFrame:
+        """بارگذاری داده به DataFrame
+
+        با parse_dates ستون‌های متنی تاریخ تشخیص داده و به datetime64 تبدیل می‌شوند.
+        """
+        df = await self._read_data(file_data, file_type)
+        
+        if parse_dates:
+            date_inference.convert(df)
+        
+        return df
+    
+    async def _read_data(self, file_data: bytes, file_type: FileType) -> pd.DataFrame:
         try:
             if file_type == FileType.CSV:
                 return pd.read_csv(pd.io.common.BytesIO(file_data))
@@ -123,6 +135,21 @@ class FileHandler:
             log.error(f"Error loading data: {e}")
             raise
     
+    async def iter_chunks(self, path: str, file_type: FileType, chunksize: int = 200000,
+                          dtype: Any = None) -> AsyncIterator[pd.DataFrame]:
+        """خواندن تکه‌تکه فایل از دیسک (برای فایل‌های بزرگ‌تر از حافظه)"""
+        if file_type == FileType.CSV:
+            for chunk in pd.read_csv(path, chunksize=chunksize, dtype=dtype):
+                yield chunk
+            return
+        
+        # سایر فرمت‌ها خواندن تکه‌ای ندارند؛ کل فایل بارگذاری و تکه‌تکه برگردانده می‌شود
+        with open(path, 'rb') as f:
+            df = await self.load_data(f.read(), file_type, parse_dates=False)
+        
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
+    
     async def get_statistics(self, df: pd.DataFrame) -> Dict[str, Any]:
         """آمار کلی از داده"""
         return {
@@ -0,0 +1,296 @@
+# Location: datanex/core/fingerprint_index.py
+
+import numpy as np
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from contextlib import contextmanager
+from datetime import datetime
+from core.minhash import MinHashLSH
+from utils.config import get_settings
+from utils.logger import log
+import json
+import os
+import threading
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # ویندوز
+    fcntl = None
+
+settings = get_settings()
+
+class BloomFilter:
+    """Bloom filter روی آرایه بیتی NumPy
+
+    موقعیت‌ها با double hashing از هش 64 بیتی ردیف‌ها به دست می‌آیند.
+    """
+
+    BLOCK_SIZE = 1000000
+
+    def __init__(self, num_bits: int, num_hashes: int, bits: Optional[np.ndarray] = None):
+        self.num_bits = (num_bits + 7) // 8 * 8
+        self.num_hashes = num_hashes
+        self.bits = bits if bits is not None else np.zeros(self.num_bits // 8, dtype=np.uint8)
+
+    def _positions(self, hashes: np.ndarray) -> np.ndarray:
+        h1 = hashes.astype(np.uint64)
+        h2 = h1 * np.uint64(0xBF58476D1CE4E5B9)
+        h2 ^= h2 >> np.uint64(31)
+        h2 |= np.uint64(1)
+        steps = np.arange(self.num_hashes, dtype=np.uint64)
+        return (h1[:, None] + steps[None, :] * h2[:, None]) % np.uint64(self.num_bits)
+
+    def add(self, hashes: np.ndarray):
+        for start in range(0, len(hashes), self.BLOCK_SIZE):
+            positions = self._positions(hashes[start:start + self.BLOCK_SIZE]).ravel()
+            masks = np.left_shift(1, positions & np.uint64(7)).astype(np.uint8)
+            np.bitwise_or.at(self.bits, (positions >> np.uint64(3)).astype(np.int64), masks)
+
+    def contains(self, hashes: np.ndarray) -> np.ndarray:
+        result = np.empty(len(hashes), dtype=bool)
+        for start in range(0, len(hashes), self.BLOCK_SIZE):
+            positions = self._positions(hashes[start:start + self.BLOCK_SIZE])
+            values = self.bits[(positions >> np.uint64(3)).astype(np.int64)]
+            result[start:start + self.BLOCK_SIZE] = ((values >> (positions & np.uint64(7)).astype(np.uint8)) & 1).all(axis=1)
+        return result
+
+class FingerprintIndex:
+    """ایندکس پایدار اثر انگشت ردیف‌ها برای همه فایل‌های آپلود شده
+
+    برای هر فایل هش‌های یکتای مرتب شده (و در صورت نیاز امضای MinHash) در
+    یک فایل npy ذخیره می‌شود و یک Bloom filter مشترک جلوی همه آن‌ها قرار
+    دارد تا ردیف‌های جدید بدون خواندن فایل‌ها رد شوند. کنار امضاها کلیدهای
+    باند LSH مرتب شده هر باند (برای banding آستانه near_threshold هنگام
+    افزودن، برای banding های دیگر در اولین جستجو) ذخیره و memory-map می‌شوند.
+    """
+
+    def __init__(self, index_dir: Optional[str] = None, bloom_bits: Optional[int] = None,
+                 bloom_hashes: Optional[int] = None, num_perm: int = 64, near_threshold: float = 0.8):
+        self.index_dir = Path(index_dir or settings.FINGERPRINT_INDEX_DIR)
+        self.bloom_bits = bloom_bits or settings.FINGERPRINT_BLOOM_BITS
+        self.bloom_hashes = bloom_hashes or settings.FINGERPRINT_BLOOM_HASHES
+        self.num_perm = num_perm
+        self.near_threshold = near_threshold
+        self._lock = threading.Lock()
+
+    @property
+    def _manifest_path(self) -> Path:
+        return self.index_dir / 'manifest.json'
+
+    @property
+    def _bloom_path(self) -> Path:
+        return self.index_dir / 'bloom.npy'
+
+    def _file_path(self, file_id: str, kind: str) -> Path:
+        return self.index_dir / 'files' / f"{file_id}.{kind}.npy"
+
+    @contextmanager
+    def _locked(self):
+        """قفل بین thread ها و (در صورت امکان) بین process ها"""
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.index_dir / '.lock', 'w') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        if not self._manifest_path.exists():
+            return {}
+        with open(self._manifest_path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_manifest(self, manifest: Dict[str, Dict[str, Any]]):
+        tmp_path = self._manifest_path.with_name(f".manifest.{uuid.uuid4().hex[:8]}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(tmp_path, self._manifest_path)
+
+    def _load_bloom(self, writable: bool = False) -> Optional[BloomFilter]:
+        if not self._bloom_path.exists():
+            return BloomFilter(self.bloom_bits, self.bloom_hashes) if writable else None
+        bits = np.load(self._bloom_path) if writable else np.load(self._bloom_path, mmap_mode='r')
+        return BloomFilter(len(bits) * 8, self.bloom_hashes, bits)
+
+    @staticmethod
+    def _band_kind(lsh: MinHashLSH) -> str:
+        return f"lsh{lsh.bands}x{lsh.rows_per_band}"
+
+    @staticmethod
+    def _sorted_band_keys(lsh: MinHashLSH, signatures: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """کلیدهای هر باند مرتب شده با ابعاد (bands, n) و موقعیت ردیف هر کلید"""
+        keys = lsh.band_keys(np.asarray(signatures)).T
+        order = np.argsort(keys, axis=1, kind='stable')
+        return np.take_along_axis(keys, order, axis=1), order
+
+    def _save_band_keys(self, file_id: str, lsh: MinHashLSH, signatures: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        keys, order = self._sorted_band_keys(lsh, signatures)
+        kind = self._band_kind(lsh)
+        # order قبل از keys نوشته می‌شود تا وجود keys یعنی هر دو کامل‌اند
+        self._save_array(self._file_path(file_id, f"{kind}.order"), order)
+        self._save_array(self._file_path(file_id, f"{kind}.keys"), keys)
+        return keys, order
+
+    def _band_index(self, file_id: str, lsh: MinHashLSH) -> Tuple[np.ndarray, np.ndarray]:
+        """کلیدهای باند مرتب شده یک فایل (memory-map)؛ برای banding جدید یک بار ساخته و ذخیره می‌شوند"""
+        kind = self._band_kind(lsh)
+        try:
+            keys = np.load(self._file_path(file_id, f"{kind}.keys"), mmap_mode='r')
+            return keys, np.load(self._file_path(file_id, f"{kind}.order"), mmap_mode='r')
+        except FileNotFoundError:
+            pass
+
+        signatures = np.load(self._file_path(file_id, 'minhash'), mmap_mode='r')
+        with self._locked():
+            return self._save_band_keys(file_id, lsh, signatures)
+
+    @staticmethod
+    def _save_array(path: Path, array: np.ndarray):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+        with open(tmp_path, 'wb') as f:
+            np.save(f, array)
+        os.replace(tmp_path, path)
+
+    def files(self) -> Dict[str, Dict[str, Any]]:
+        """فایل‌های موجود در ایندکس"""
+        return self._load_manifest()
+
+    def add_file(self, file_id: str, filename: str, hashes: np.ndarray, signatures: Optional[np.ndarray] = None):
+        """افزودن اثر انگشت ردیف‌های یک فایل به ایندکس"""
+        unique_hashes, first_index = np.unique(hashes.astype(np.uint64), return_index=True)
+
+        with self._locked():
+            self._save_array(self._file_path(file_id, 'hashes'), unique_hashes)
+            if signatures is not None:
+                signatures = signatures[first_index]
+                self._save_array(self._file_path(file_id, 'minhash'), signatures)
+                lsh = MinHashLSH(threshold=self.near_threshold, num_perm=self.num_perm)
+                self._save_band_keys(file_id, lsh, signatures)
+
+            bloom = self._load_bloom(writable=True)
+            bloom.add(unique_hashes)
+            self._save_array(self._bloom_path, bloom.bits)
+
+            manifest = self._load_manifest()
+            manifest[file_id] = {
+                'filename': filename,
+                'row_count': int(len(hashes)),
+                'unique_rows': int(len(unique_hashes)),
+                'has_minhash': signatures is not None,
+                'added_at': datetime.utcnow().isoformat()
+            }
+            self._save_manifest(manifest)
+
+        log.info(f"Indexed {len(unique_hashes)} row fingerprints for file {file_id}")
+
+    def remove_file(self, file_id: str) -> bool:
+        """حذف یک فایل و بازسازی Bloom filter از فایل‌های باقی‌مانده"""
+        with self._locked():
+            manifest = self._load_manifest()
+            if file_id not in manifest:
+                return False
+
+            del manifest[file_id]
+            for path in (self.index_dir / 'files').glob(f"{file_id}.*.npy"):
+                path.unlink(missing_ok=True)
+
+            bloom = BloomFilter(self.bloom_bits, self.bloom_hashes)
+            for other_id in manifest:
+                try:
+                    bloom.add(np.load(self._file_path(other_id, 'hashes'), mmap_mode='r'))
+                except FileNotFoundError:
+                    log.warning(f"Fingerprint hashes of file {other_id} are missing")
+            self._save_array(self._bloom_path, bloom.bits)
+            self._save_manifest(manifest)
+
+        log.info(f"Removed file {file_id} from fingerprint index")
+        return True
+
+    def lookup(self, hashes: np.ndarray, exclude_file_id: Optional[str] = None) -> Tuple[np.ndarray, Dict[str, int]]:
+        """ردیف‌های دیده شده و تعداد ردیف‌های مشترک با هر فایل
+
+        خروجی: (seen_mask, {file_id: matching_rows})
+        """
+        hashes = hashes.astype(np.uint64)
+        seen = np.zeros(len(hashes), dtype=bool)
+        matches: Dict[str, int] = {}
+
+        bloom = self._load_bloom()
+        manifest = self._load_manifest()
+        if bloom is None or not manifest or len(hashes) == 0:
+            return seen, matches
+
+        # فقط ردیف‌هایی که از Bloom filter عبور می‌کنند بررسی دقیق می‌شوند
+        maybe = np.flatnonzero(bloom.contains(hashes))
+        if len(maybe) == 0:
+            return seen, matches
+
+        candidates = hashes[maybe]
+        for file_id in manifest:
+            if file_id == exclude_file_id:
+                continue
+
+            try:
+                file_hashes = np.load(self._file_path(file_id, 'hashes'), mmap_mode='r')
+            except FileNotFoundError:
+                continue
+
+            if len(file_hashes) == 0:
+                continue
+
+            positions = np.minimum(np.searchsorted(file_hashes, candidates), len(file_hashes) - 1)
+            found = np.asarray(file_hashes[positions]) == candidates
+
+            if found.any():
+                matches[file_id] = int(found.sum())
+                seen[maybe[found]] = True
+
+        return seen, matches
+
+    def lookup_near(self, signatures: np.ndarray, threshold: float = 0.8,
+                    exclude_file_id: Optional[str] = None) -> Tuple[np.ndarray, Dict[str, int]]:
+        """ردیف‌های near-duplicate با فایل‌هایی که امضای MinHash دارند"""
+        seen = np.zeros(len(signatures), dtype=bool)
+        matches: Dict[str, int] = {}
+        lsh = MinHashLSH(threshold=threshold, num_perm=self.num_perm)
+        query_keys = lsh.band_keys(signatures)
+
+        for file_id, info in self._load_manifest().items():
+            if file_id == exclude_file_id or not info.get('has_minhash'):
+                continue
+
+            try:
+                file_signatures = np.load(self._file_path(file_id, 'minhash'), mmap_mode='r')
+                sorted_keys, order = self._band_index(file_id, lsh)
+            except FileNotFoundError:
+                continue
+
+            if len(file_signatures) == 0:
+                continue
+
+            found = np.zeros(len(signatures), dtype=bool)
+            for band in range(lsh.bands):
+                band_keys = sorted_keys[band]
+                positions = np.minimum(np.searchsorted(band_keys, query_keys[:, band]), len(band_keys) - 1)
+                candidates = np.flatnonzero((band_keys[positions] == query_keys[:, band]) & ~found)
+
+                if len(candidates) == 0:
+                    continue
+
+                # تأیید با Jaccard تخمینی (فقط امضاهای کاندید از دیسک خوانده می‌شوند)
+                other = np.asarray(order[band][positions[candidates]])
+                similarity = (signatures[candidates] == file_signatures[other]).mean(axis=1)
+                found[candidates[similarity >= threshold]] = True
+
+            if found.any():
+                matches[file_id] = int(found.sum())
+                seen |= found
+
+        return seen, matches
+
+fingerprint_index = FingerprintIndex()
@@ -0,0 +1,157 @@
+# Location: datanex/core/grouping.py
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+def union_find(n: int, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """disjoint-set آرایه‌ای روی جفت‌های (left, right)
+
+    به صورت برداری اجرا می‌شود: در هر دور ریشه بزرگ‌تر هر یال به ریشه کوچک‌تر
+    وصل می‌شود و سپس با pointer jumping مسیرها فشرده می‌شوند. خروجی برای هر
+    ردیف کوچک‌ترین موقعیت مؤلفه آن است؛ بنابراین نتیجه به ترتیب جفت‌ها بستگی
+    ندارد.
+    """
+    parent = np.arange(n, dtype=np.int64)
+    left = np.asarray(left, dtype=np.int64)
+    right = np.asarray(right, dtype=np.int64)
+
+    while len(left) > 0:
+        left_root, right_root = parent[left], parent[right]
+        active = left_root != right_root
+        if not active.any():
+            break
+
+        # یال‌هایی که دو سرشان در یک مؤلفه است دیگر بررسی نمی‌شوند
+        left, right = left[active], right[active]
+        low = np.minimum(left_root[active], right_root[active])
+        high = np.maximum(left_root[active], right_root[active])
+        np.minimum.at(parent, high, low)
+
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+
+    return parent
+
+def compact_group_ids(roots: np.ndarray) -> np.ndarray:
+    """تبدیل ریشه‌ها به شناسه گروه فشرده (0..G-1 به ترتیب اولین ظاهر شدن)؛ -1 برای ردیف‌های تکی"""
+    n = len(roots)
+    sizes = np.bincount(roots, minlength=n)
+    group_roots = np.flatnonzero(sizes > 1)
+
+    mapping = np.full(n, -1, dtype=np.int64)
+    mapping[group_roots] = np.arange(len(group_roots))
+    return mapping[roots]
+
+def hash_pairs(hashes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """جفت‌های ردیف‌های هم‌هش؛ هر عضو فقط با اولین عضو گروه جفت می‌شود"""
+    n = len(hashes)
+    order = np.argsort(hashes, kind='stable')
+    sorted_hashes = hashes[order]
+
+    same_as_previous = np.zeros(n, dtype=bool)
+    same_as_previous[1:] = sorted_hashes[1:] == sorted_hashes[:-1]
+    members = np.flatnonzero(same_as_previous)
+
+    bucket_start = np.maximum.accumulate(np.where(same_as_previous, 0, np.arange(n)))
+    return order[bucket_start[members]], order[members]
+
+def group_rows(n: int, *pairs: Tuple[np.ndarray, np.ndarray]) -> np.ndarray:
+    """شناسه گروه هر ردیف از جفت‌های کاندید همه منابع (hash، LSH، ANN، blocking)"""
+    left = np.concatenate([np.asarray(pair[0], dtype=np.int64) for pair in pairs]) if pairs else np.zeros(0, dtype=np.int64)
+    right = np.concatenate([np.asarray(pair[1], dtype=np.int64) for pair in pairs]) if pairs else np.zeros(0, dtype=np.int64)
+    return compact_group_ids(union_find(n, left, right))
+
+def group_members(group_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """اعضای گروه‌ها به صورت CSR: اعضای گروه g برابر members[bounds[g]:bounds[g + 1]] است"""
+    positions = np.flatnonzero(group_ids >= 0)
+    ids = group_ids[positions]
+    order = np.argsort(ids, kind='stable')
+    members = positions[order]
+
+    group_count = int(ids.max()) + 1 if len(ids) > 0 else 0
+    bounds = np.searchsorted(ids[order], np.arange(group_count + 1))
+    return members, bounds
+
+def groups_to_parquet(group_ids: np.ndarray, row_similarity: Optional[np.ndarray] = None,
+                      row_group_size: int = 65536) -> bytes:
+    """ذخیره ستونی ردیف ← شناسه گروه (فقط ردیف‌های تکراری، مرتب بر اساس گروه)
+
+    مرتب بودن بر اساس group_id باعث می‌شود خواندن یک صفحه از گروه‌ها فقط
+    row group های مربوط را از Parquet بخواند.
+    """
+    members, bounds = group_members(group_ids)
+    columns = {
+        'group_id': pa.array(group_ids[members], type=pa.int64()),
+        'row': pa.array(members, type=pa.int64())
+    }
+    if row_similarity is not None:
+        columns['similarity'] = pa.array(np.asarray(row_similarity, dtype=np.float32)[members])
+
+    table = pa.table(columns).replace_schema_metadata({
+        'row_count': str(len(group_ids)),
+        'group_count': str(len(bounds) - 1)
+    })
+
+    buffer = BytesIO()
+    pq.write_table(table, buffer, row_group_size=row_group_size)
+    return buffer.getvalue()
+
+def _page_row_groups(parquet: pq.ParquetFile, offset: int, limit: int) -> List[int]:
+    """row group هایی که بازه group_id آن‌ها (از آمار Parquet) با صفحه هم‌پوشانی دارد"""
+    column = parquet.schema_arrow.get_field_index('group_id')
+    selected = []
+    for index in range(parquet.num_row_groups):
+        statistics = parquet.metadata.row_group(index).column(column).statistics
+        if statistics is None or not statistics.has_min_max or \
+                (statistics.min < offset + limit and statistics.max >= offset):
+            selected.append(index)
+    return selected
+
+def read_group_page(source: Union[bytes, str, Path], offset: int = 0, limit: int = 100) -> Dict[str, Any]:
+    """خواندن یک صفحه از گروه‌ها از Parquet (bytes یا مسیر فایل محلی با memory map)
+
+    فقط row group های هم‌پوشان با بازه group_id صفحه خوانده می‌شوند.
+    """
+    if isinstance(source, bytes):
+        parquet = pq.ParquetFile(BytesIO(source))
+    else:
+        parquet = pq.ParquetFile(str(source), memory_map=True)
+
+    metadata = parquet.schema_arrow.metadata or {}
+    group_count = int(metadata.get(b'group_count', 0))
+
+    table = parquet.read_row_groups(_page_row_groups(parquet, offset, limit))
+    page = pc.and_(pc.greater_equal(table['group_id'], offset), pc.less(table['group_id'], offset + limit))
+    table = table.filter(page)
+    group_ids = table['group_id'].to_numpy()
+    rows = table['row'].to_numpy()
+    similarity = table['similarity'].to_numpy() if 'similarity' in table.column_names else None
+
+    groups = []
+    if len(group_ids) > 0:
+        starts = np.concatenate(([0], np.flatnonzero(group_ids[1:] != group_ids[:-1]) + 1, [len(group_ids)]))
+        for start, end in zip(starts[:-1], starts[1:]):
+            group = {
+                'group_id': int(group_ids[start]),
+                'size': int(end - start),
+                'rows': rows[start:end].tolist()
+            }
+            if similarity is not None:
+                group['similarity_scores'] = similarity[start:end].tolist()
+            groups.append(group)
+
+    return {
+        'offset': offset,
+        'limit': limit,
+        'group_count': group_count,
+        'row_count': int(metadata.get(b'row_count', 0)),
+        'groups': groups
+    }
@@ -2,10 +2,16 @@
 
 import pandas as pd
 from typing import List, Dict, Any, Optional
+from utils.config import get_settings
 from utils.logger import log
+from services.embedding_cache import embedding_cache
+from core.anomaly import anomaly_engine
+from core.rules import rule_engine
 from sentence_transformers import SentenceTransformer
 import numpy as np
 
+settings = get_settings()
+
 class Labeler:
     """ماژول 3: لیبل‌گذاری و تگ‌گذاری خودکار"""
     
@@ -16,19 +22,21 @@ class Labeler:
     def _load_model(self):
         """بارگذاری مدل embedding"""
         if self.model is None:
-            self.model = SentenceTransformer('all-MiniLM-L6-v2')
+            self.model = SentenceTransformer(settings.EMBEDDING_MODEL)
     
     async def auto_label_columns(self, df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
         """لیبل‌گذاری خودکار ستون‌ها"""
         labels = {}
+        profile = anomaly_engine.profile(df)
         
         for column in df.columns:
-            column_labels = await self._generate_column_labels(column, df[column])
+            column_labels = await self._generate_column_labels(column, df[column], profile.get(column))
             labels[column] = column_labels
         
         return labels
     
-    async def _generate_column_labels(self, column_name: str, series: pd.Series) -> Dict[str, Any]:
+    async def _generate_column_labels(self, column_name: str, series: pd.Series,
+                                      column_stats: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """تولید لیبل برای یک ستون"""
         labels = {
             'column_name': column_name,
@@ -64,15 +72,15 @@ class Labeler:
         if pd.api.types.is_numeric_dtype(series):
             labels['tags'].append('numeric')
             
+            if column_stats is None:
+                column_stats = anomaly_engine.profile(series.to_frame()).get(series.name)
+            
             # بررسی توزیع
-            if series.dropna().std() / (series.dropna().mean() + 1e-10) < 0.1:
+            if column_stats and column_stats['std'] / (column_stats['mean'] + 1e-10) < 0.1:
                 labels['tags'].append('low_variance')
             
-            # بررسی outlier
-            Q1 = series.quantile(0.25)
-            Q3 = series.quantile(0.75)
-            IQR = Q3 - Q1
-            outliers = ((series < (Q1 - 1.5 * IQR)) | (series > (Q3 + 1.5 * IQR))).sum()
+            # بررسی outlier (مرزهای IQR مشترک با Validator)
+            outliers = column_stats['iqr_outliers'] if column_stats else 0
             if outliers > len(series) * 0.05:
                 labels['tags'].append('has_outliers')
                 labels['quality']['outlier_count'] = int(outliers)
@@ -128,21 +136,22 @@ class Labeler:
         
         # اعمال قوانین سفارشی
         if custom_rules:
-            for rule in custom_rules:
-                if await self._check_custom_rule(df, rule):
+            for rule, holds in zip(custom_rules, await self._check_custom_rules(df, custom_rules)):
+                if holds:
                     tags.append(rule.get('tag', 'custom'))
         
         return tags
     
-    async def _check_custom_rule(self, df: pd.DataFrame, rule: Dict) -> bool:
-        """بررسی یک قانون سفارشی"""
-        try:
-            condition = rule.get('condition', '')
-            # اجرای شرط به صورت ایمن
-            # در نسخه واقعی باید از یک DSL امن استفاده شود
-            return False
-        except:
-            return False
+    async def _check_custom_rules(self, df: pd.DataFrame, rules: List[Dict]) -> List[bool]:
+        """بررسی قوانین سفارشی با DSL امن rule_engine (همه قوانین در یک ارزیابی)
+        
+        'condition' هر قانون یک عبارت است، مثل "mean(price) > 100" یا "any(country == 'IR')".
+        قانون ردیفی وقتی برقرار است که هیچ ردیفی آن را نقض نکند.
+        """
+        return [
+            result['error'] is None and result['holds']
+            for result in rule_engine.evaluate(df, rules)
+        ]
     
     async def suggest_labels_ml(self, df: pd.DataFrame, sample_size: int = 1000) -> Dict[str, List[str]]:
         """پیشنهاد لیبل با ML"""
@@ -159,7 +168,7 @@ class Labeler:
                     
                     if texts:
                         # استخراج کلمات کلیدی با embedding similarity
-                        embeddings = self.model.encode(texts)
+                        embeddings = embedding_cache.encode(self.model, texts, model_id=settings.EMBEDDING_MODEL)
                         
                         # محاسبه مرکز cluster
                         center = np.mean(embeddings, axis=0)
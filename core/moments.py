@@ -0,0 +1,261 @@
+# Location: datanex/core/moments.py
+
+import pandas as pd
+import numpy as np
+from scipy import stats
+from typing import Any, Dict, List, Optional
+
+class StreamingMoments:
+    """گشتاورهای مرتبه 1 تا 4 ستون‌ها در یک گذر، قابل ادغام (Welford/Pébay)
+
+    هر تکه جداگانه خلاصه و با فرمول‌های Pébay با وضعیت قبلی ادغام می‌شود؛
+    پس وضعیت دو worker یا دو تکه هم با merge ترکیب می‌شود. مقادیر null و
+    نامتناهی نادیده گرفته می‌شوند.
+    """
+
+    def __init__(self, n_columns: int):
+        self.n = np.zeros(n_columns)
+        self.mean = np.zeros(n_columns)
+        self.m2 = np.zeros(n_columns)
+        self.m3 = np.zeros(n_columns)
+        self.m4 = np.zeros(n_columns)
+        self.min = np.full(n_columns, np.inf)
+        self.max = np.full(n_columns, -np.inf)
+
+    def update(self, values: np.ndarray):
+        """افزودن یک تکه (ردیف‌ها × ستون‌ها)"""
+        mask = np.isfinite(values)
+        chunk = StreamingMoments(values.shape[1])
+        chunk.n = mask.sum(axis=0).astype(np.float64)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            chunk.mean = np.where(mask, values, 0).sum(axis=0) / np.maximum(chunk.n, 1)
+            deviation = np.where(mask, values - chunk.mean, 0)
+            squared = deviation * deviation
+            chunk.m2 = squared.sum(axis=0)
+            chunk.m3 = (squared * deviation).sum(axis=0)
+            chunk.m4 = (squared * squared).sum(axis=0)
+            chunk.min = np.where(mask, values, np.inf).min(axis=0, initial=np.inf)
+            chunk.max = np.where(mask, values, -np.inf).max(axis=0, initial=-np.inf)
+
+        self.merge(chunk)
+
+    def merge(self, other: 'StreamingMoments'):
+        """ادغام وضعیت دیگر در این وضعیت"""
+        na, nb = self.n, other.n
+        n = na + nb
+        safe_n = np.maximum(n, 1)
+        delta = other.mean - self.mean
+
+        mean = self.mean + delta * nb / safe_n
+        m2 = self.m2 + other.m2 + delta ** 2 * na * nb / safe_n
+        m3 = (self.m3 + other.m3 + delta ** 3 * na * nb * (na - nb) / safe_n ** 2
+              + 3 * delta * (na * other.m2 - nb * self.m2) / safe_n)
+        m4 = (self.m4 + other.m4 + delta ** 4 * na * nb * (na * na - na * nb + nb * nb) / safe_n ** 3
+              + 6 * delta ** 2 * (na * na * other.m2 + nb * nb * self.m2) / safe_n ** 2
+              + 4 * delta * (na * other.m3 - nb * self.m3) / safe_n)
+
+        self.n, self.mean, self.m2, self.m3, self.m4 = n, mean, m2, m3, m4
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+
+    def variance(self) -> np.ndarray:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.n > 1, self.m2 / (self.n - 1), np.nan)
+
+    def skewness(self) -> np.ndarray:
+        """چولگی (مانند scipy.stats.skew با bias=True)"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.sqrt(self.n) * self.m3 / self.m2 ** 1.5
+
+    def kurtosis(self, fisher: bool = True) -> np.ndarray:
+        """کشیدگی (مانند scipy.stats.kurtosis با bias=True)"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            kurtosis = self.n * self.m4 / self.m2 ** 2
+        return kurtosis - 3 if fisher else kurtosis
+
+    def normaltest(self) -> np.ndarray:
+        """p-value آزمون D'Agostino-Pearson (مانند scipy.stats.normaltest) از گشتاورها؛ nan برای n < 8"""
+        n = np.where(self.n >= 8, self.n, np.nan)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # skewtest
+            y = self.skewness() * np.sqrt((n + 1) * (n + 3) / (6 * (n - 2)))
+            beta2 = 3 * (n * n + 27 * n - 70) * (n + 1) * (n + 3) / ((n - 2) * (n + 5) * (n + 7) * (n + 9))
+            w2 = -1 + np.sqrt(2 * (beta2 - 1))
+            delta = 1 / np.sqrt(0.5 * np.log(w2))
+            alpha = np.sqrt(2 / (w2 - 1))
+            y = np.where(y == 0, 1, y)
+            z_skew = delta * np.log(y / alpha + np.sqrt((y / alpha) ** 2 + 1))
+
+            # kurtosistest
+            expected = 3 * (n - 1) / (n + 1)
+            variance = 24 * n * (n - 2) * (n - 3) / ((n + 1) ** 2 * (n + 3) * (n + 5))
+            x = (self.kurtosis(fisher=False) - expected) / np.sqrt(variance)
+            sqrt_beta1 = 6 * (n * n - 5 * n + 2) / ((n + 7) * (n + 9)) * np.sqrt(6 * (n + 3) * (n + 5) / (n * (n - 2) * (n - 3)))
+            a = 6 + 8 / sqrt_beta1 * (2 / sqrt_beta1 + np.sqrt(1 + 4 / sqrt_beta1 ** 2))
+            denominator = 1 + x * np.sqrt(2 / (a - 4))
+            term = np.sign(denominator) * np.where(denominator == 0, np.nan,
+                                                   np.power((1 - 2 / a) / np.abs(denominator), 1 / 3))
+            z_kurtosis = (1 - 2 / (9 * a) - term) / np.sqrt(2 / (9 * a))
+
+        return stats.chi2.sf(z_skew ** 2 + z_kurtosis ** 2, 2)
+
+    def to_dict(self) -> Dict[str, List[float]]:
+        return {key: getattr(self, key).tolist() for key in ('n', 'mean', 'm2', 'm3', 'm4', 'min', 'max')}
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, List[float]]) -> 'StreamingMoments':
+        moments = cls(len(state['n']))
+        for key, values in state.items():
+            setattr(moments, key, np.asarray(values, dtype=np.float64))
+        return moments
+
+class DDSketch:
+    """sketch چندک با خطای نسبی ثابت (DDSketch) برای چند ستون، قابل ادغام
+
+    هر مقدار به سطل لگاریتمی ceil(log_γ |x|) با γ = (1+α)/(1-α) می‌رود؛ پس
+    هر چندک با خطای نسبی حداکثر α برگردانده می‌شود. سطل همه ستون‌ها در یک
+    کد int64 (ستون، علامت، سطل) به ترتیب مقدار نگه داشته می‌شوند و ادغام
+    تکه‌ها و worker ها جمع شمارنده‌های کدهای یکسان است.
+    """
+
+    OFFSET = 2 ** 16
+    WIDTH = 2 ** 17
+
+    def __init__(self, n_columns: int, relative_accuracy: float = 0.01):
+        self.n_columns = n_columns
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.codes = np.zeros(0, dtype=np.int64)
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def _add(self, codes: np.ndarray, counts: np.ndarray):
+        codes, inverse = np.unique(np.concatenate([self.codes, codes]), return_inverse=True)
+        self.counts = np.bincount(inverse, weights=np.concatenate([self.counts, counts]),
+                                  minlength=len(codes)).astype(np.int64)
+        self.codes = codes
+
+    def update(self, values: np.ndarray):
+        """افزودن یک تکه (ردیف‌ها × ستون‌ها)"""
+        finite = np.isfinite(values)
+        if not finite.any():
+            return
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            keys = np.ceil(np.log(np.abs(values)) * (1 / np.log(self.gamma)))
+        np.clip(keys, -(self.OFFSET - 1), self.OFFSET - 1, out=keys)
+
+        # ترتیب کدها همان ترتیب مقادیر است: منفی (سطل بزرگ‌تر کوچک‌تر)، صفر، مثبت
+        local = self.WIDTH + np.sign(values) * (self.OFFSET + keys)
+        low = int(np.min(local, where=finite, initial=np.inf))
+        span = int(np.max(local, where=finite, initial=-np.inf)) - low + 1
+        columns = np.arange(values.shape[1])
+
+        if self.n_columns * span <= 2 ** 24:
+            # شمارش با bincount روی بازه فشرده سطل‌های این تکه (بدون مرتب‌سازی)؛ خانه آخر برای null ها
+            size = self.n_columns * span
+            bins = np.where(finite, local - low + columns * span, size).astype(np.int64)
+            counts = np.bincount(bins.ravel(), minlength=size + 1)[:size]
+            present = np.flatnonzero(counts)
+            unique = (present // span) * (3 * self.WIDTH) + present % span + low
+            counts = counts[present]
+        else:
+            codes = (local + columns * (3 * self.WIDTH))[finite].astype(np.int64)
+            unique, counts = np.unique(codes, return_counts=True)
+        self._add(unique, counts)
+
+    def merge(self, other: 'DDSketch'):
+        self._add(other.codes, other.counts)
+
+    def _value(self, local: np.ndarray) -> np.ndarray:
+        """نماینده سطل: 2γ^i / (γ + 1) با علامت"""
+        positive = local > self.WIDTH
+        keys = np.where(positive, local - self.WIDTH - self.OFFSET, self.OFFSET - local)
+        value = 2 * self.gamma ** keys.astype(np.float64) / (self.gamma + 1)
+        return np.where(local == self.WIDTH, 0.0, np.where(positive, value, -value))
+
+    def quantiles(self, column: int, qs: List[float]) -> np.ndarray:
+        """چندک‌های یک ستون (رتبه q × (n - 1) مانند pandas)"""
+        bounds = np.searchsorted(self.codes, [column * 3 * self.WIDTH, (column + 1) * 3 * self.WIDTH])
+        codes = self.codes[bounds[0]:bounds[1]] - column * 3 * self.WIDTH
+        cumulative = np.cumsum(self.counts[bounds[0]:bounds[1]])
+        if len(cumulative) == 0:
+            return np.full(len(qs), np.nan)
+
+        ranks = np.asarray(qs) * (cumulative[-1] - 1)
+        positions = np.searchsorted(cumulative, np.floor(ranks), side='right')
+        return self._value(codes[positions])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'n_columns': self.n_columns, 'relative_accuracy': self.relative_accuracy,
+                'codes': self.codes.tolist(), 'counts': self.counts.tolist()}
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> 'DDSketch':
+        sketch = cls(state['n_columns'], state['relative_accuracy'])
+        sketch.codes = np.asarray(state['codes'], dtype=np.int64)
+        sketch.counts = np.asarray(state['counts'], dtype=np.int64)
+        return sketch
+
+class DistributionAccumulator:
+    """خلاصه توزیع ستون‌های عددی در یک گذر: گشتاورها و DDSketch
+
+    با update تکه‌ها اضافه و با merge وضعیت worker های دیگر ادغام می‌شود.
+    to_dict/from_dict وضعیت را برای انتقال بین worker ها سریال می‌کنند.
+    """
+
+    def __init__(self, columns: List[str], relative_accuracy: float = 0.01):
+        self.columns = list(columns)
+        self.moments = StreamingMoments(len(self.columns))
+        self.sketch = DDSketch(len(self.columns), relative_accuracy)
+
+    def update(self, chunk: pd.DataFrame):
+        values = chunk[self.columns].to_numpy(dtype=np.float64, na_value=np.nan)
+        self.moments.update(values)
+        self.sketch.update(values)
+
+    def merge(self, other: 'DistributionAccumulator'):
+        if other.columns != self.columns:
+            raise ValueError("Cannot merge distribution states of different columns")
+        self.moments.merge(other.moments)
+        self.sketch.merge(other.sketch)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'columns': self.columns, 'moments': self.moments.to_dict(), 'sketch': self.sketch.to_dict()}
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> 'DistributionAccumulator':
+        accumulator = cls(state['columns'], state['sketch']['relative_accuracy'])
+        accumulator.moments = StreamingMoments.from_dict(state['moments'])
+        accumulator.sketch = DDSketch.from_dict(state['sketch'])
+        return accumulator
+
+    def result(self, min_count: int = 4) -> Dict[str, Dict[str, Any]]:
+        """خلاصه هر ستون؛ ستون‌های با کمتر از min_count مقدار حذف می‌شوند"""
+        moments = self.moments
+        std = np.sqrt(moments.variance())
+        skewness, kurtosis, p_values = moments.skewness(), moments.kurtosis(), moments.normaltest()
+        distributions = {}
+
+        for k, column in enumerate(self.columns):
+            if moments.n[k] < min_count:
+                continue
+
+            # چندک‌ها به بازه [min, max] واقعی محدود می‌شوند
+            q1, median, q3 = np.clip(self.sketch.quantiles(k, [0.25, 0.5, 0.75]), moments.min[k], moments.max[k])
+            p_value: Optional[float] = None if np.isnan(p_values[k]) else float(p_values[k])
+            distributions[column] = {
+                'count': int(moments.n[k]),
+                'mean': float(moments.mean[k]),
+                'median': float(median),
+                'std': float(std[k]),
+                'min': float(moments.min[k]),
+                'max': float(moments.max[k]),
+                'skewness': float(skewness[k]),
+                'kurtosis': float(kurtosis[k]),
+                'is_normal': None if p_value is None else p_value > 0.05,
+                'quartiles': {'Q1': float(q1), 'Q2': float(median), 'Q3': float(q3)}
+            }
+
+        return distributions
@@ -1,64 +1,164 @@
 # Location: datanex/core/pattern_finder.py
 
+import asyncio
+import time
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Any, Tuple
-from sklearn.decomposition import PCA
-from sklearn.preprocessing import StandardScaler
-from scipy import stats
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+from core.correlation import CorrelationEngine
+from core.fd_discovery import FDDiscovery
+from core.sequence_mining import frequent_ngrams
+from core.association_rules import FPGrowth
+from core.anomaly import anomaly_engine
+from core.trends import TrendEngine
+from core.seasonality import SeasonalityDetector
+from core.clustering import StreamingClusterer
+from core.moments import DistributionAccumulator
+from core.budget import PatternBudget, cost_model, sample_rows
 from utils.logger import log
-import itertools
 
 class PatternFinder:
     """ماژول 6: یافتن الگوها و روابط در داده"""
     
-    async def find_patterns(self, df: pd.DataFrame) -> Dict[str, Any]:
-        """یافتن همه انواع الگوها"""
-        patterns = {
-            'correlations': await self._find_correlations(df),
-            'trends': await self._find_trends(df),
-            'sequences': await self._find_sequences(df),
-            'anomalies': await self._find_anomalies(df),
-            'associations': await self._find_associations(df),
-            'clusters': await self._find_clusters(df)
-        }
+    # (نام، متد، نیاز به ردیف‌های متوالی هنگام نمونه‌گیری، نتیجه خالی)
+    DETECTORS = [
+        ('correlations', '_find_correlations', False, list),
+        ('trends', '_find_trends', False, list),
+        ('seasonality', '_find_seasonality', False, list),
+        ('sequences', '_find_sequences', True, list),
+        ('anomalies', '_find_anomalies', False, list),
+        ('associations', '_find_associations', False, list),
+        ('clusters', '_find_clusters', False, dict)
+    ]
+    
+    async def find_patterns(self, df: pd.DataFrame, time_budget: Optional[float] = None) -> Dict[str, Any]:
+        """یافتن همه انواع الگوها
+        
+        با time_budget (ثانیه) هزینه هر detector از شکل داده تخمین زده می‌شود و
+        detector هایی که در سهمشان از بودجه جا نمی‌شوند روی نمونه اجرا یا رد
+        می‌شوند. detector ها از ارزان به گران اجرا می‌شوند و خطای هر کدام بقیه
+        را متوقف نمی‌کند؛ detector های رد شده در پایان یک بار دیگر با زمان
+        باقی‌مانده برنامه‌ریزی می‌شوند. با بودجه، هر detector در یک thread با
+        مهلت زمان باقی‌مانده اجرا می‌شود تا تخمین اشتباه از مهلت کل task رد نشود؛
+        نتیجه detector ای که مهلتش تمام شود کنار گذاشته می‌شود و نتایج قبلی
+        حفظ می‌شوند. وضعیت هر detector در 'completion' است:
+        {'status': 'complete' | 'sampled' | 'skipped' | 'timed_out' | 'failed',
+        'completed', 'sample_fraction', 'estimated_seconds', 'elapsed_seconds'}
+        """
+        estimates = cost_model.estimate(df)
+        budget = PatternBudget(time_budget) if time_budget is not None else None
+        order = sorted(self.DETECTORS, key=lambda detector: estimates[detector[0]])
+        patterns, completion = {}, {}
+        # thread های detector های بی‌مهلت متوقف نمی‌شوند، پس منتظرشان نمی‌مانیم
+        executor = ThreadPoolExecutor(thread_name_prefix='pattern-detector') if budget else None
+        
+        # detector های رد شده در پایان با زمان باقی‌مانده دوباره برنامه‌ریزی می‌شوند
+        for _ in range(2 if budget else 1):
+            costs = [(estimates[name], cost_model.fixed(name, estimates[name])) for name, *_ in order]
+            skipped = []
+            for position, detector in enumerate(order):
+                name = detector[0]
+                estimate, fixed = costs[position]
+                if budget:
+                    pending, pending_fixed = budget.reserve(costs[position:])
+                    fraction = budget.plan(estimate, pending, len(df), fixed, pending_fixed)
+                else:
+                    fraction = 1.0
+                
+                if fraction is None:
+                    skipped.append(detector)
+                    patterns[name] = detector[3]()
+                    completion[name] = {'estimated_seconds': estimate, 'sample_fraction': None,
+                                        'status': 'skipped', 'completed': False, 'elapsed_seconds': 0.0}
+                    continue
+                
+                timeout = budget.remaining() if budget else None
+                patterns[name], completion[name] = await self._run_detector(df, detector, fraction, estimate,
+                                                                            timeout, executor)
+                if budget:
+                    budget.record(fixed + (estimate - fixed) * fraction, completion[name]['elapsed_seconds'])
+            
+            order = skipped
+        
+        if executor:
+            executor.shutdown(wait=False)
+        
+        for name, *_ in order:
+            log.warning(f"Pattern detector '{name}' skipped: no room left in the time budget "
+                        f"(estimated {estimates[name]:.1f}s, scale {budget.scale:.2f})")
         
+        # برچسب خوشه‌های نمونه با ردیف‌های کل داده هم‌راستا نیست
+        if completion['clusters']['status'] == 'sampled':
+            patterns['clusters'].pop('labels', None)
+        
+        patterns = {name: patterns[name] for name, *_ in self.DETECTORS}
+        patterns['completion'] = completion
         log.info("Pattern detection completed")
         return patterns
     
-    async def _find_correlations(self, df: pd.DataFrame, threshold: float = 0.7) -> List[Dict]:
-        """یافتن همبستگی بین ستون‌ها"""
-        correlations = []
+    async def _run_detector(self, df: pd.DataFrame, detector: Tuple, fraction: float, estimate: float,
+                            timeout: Optional[float] = None,
+                            executor: Optional[ThreadPoolExecutor] = None) -> Tuple[Any, Dict[str, Any]]:
+        """اجرای یک detector روی کل داده یا کسری از ردیف‌ها؛ (نتیجه، وضعیت)
+        
+        با timeout، detector (که محاسبه‌اش همگام است) در executor اجرا و پس از
+        timeout ثانیه رها می‌شود.
+        """
+        name, method, contiguous, empty = detector
+        status = {'estimated_seconds': estimate, 'sample_fraction': fraction}
+        data = df if fraction >= 1.0 else sample_rows(df, fraction, contiguous=contiguous)
+        started = time.monotonic()
+        try:
+            if timeout is None:
+                result = await getattr(self, method)(data)
+            else:
+                run = lambda: asyncio.run(getattr(self, method)(data))
+                result = await asyncio.wait_for(asyncio.get_running_loop().run_in_executor(executor, run), timeout)
+            status['status'] = 'complete' if fraction >= 1.0 else 'sampled'
+        except asyncio.TimeoutError:
+            log.warning(f"Pattern detector '{name}' stopped: time budget ran out after {timeout:.1f}s")
+            result = empty()
+            status['status'] = 'timed_out'
+        except Exception as e:
+            log.error(f"Error in pattern detector '{name}': {e}")
+            result = empty()
+            status['status'] = 'failed'
+            status['error'] = str(e)
         
+        status['completed'] = status['status'] in ('complete', 'sampled')
+        status['elapsed_seconds'] = time.monotonic() - started
+        return result, status
+    
+    async def _find_correlations(self, df: pd.DataFrame, threshold: float = 0.7, method: str = 'pearson',
+                                 sample_size: Optional[int] = None) -> List[Dict]:
+        """یافتن همبستگی بین ستون‌ها (بلوکی؛ برای جداول با هزاران ستون)"""
         numeric_df = df.select_dtypes(include=[np.number])
         
         if len(numeric_df.columns) < 2:
-            return correlations
-        
-        # محاسبه ماتریس همبستگی
-        corr_matrix = numeric_df.corr()
+            return []
         
-        # پیدا کردن جفت‌های با همبستگی بالا
-        for i in range(len(corr_matrix.columns)):
-            for j in range(i + 1, len(corr_matrix.columns)):
-                corr_value = corr_matrix.iloc[i, j]
-                
-                if abs(corr_value) >= threshold:
-                    col1 = corr_matrix.columns[i]
-                    col2 = corr_matrix.columns[j]
-                    
-                    correlations.append({
-                        'column1': col1,
-                        'column2': col2,
-                        'correlation': float(corr_value),
-                        'type': 'positive' if corr_value > 0 else 'negative',
-                        'strength': 'strong' if abs(corr_value) > 0.9 else 'moderate'
-                    })
+        engine = CorrelationEngine(threshold=threshold, method=method, sample_size=sample_size)
+        left, right, values = engine.pairs(numeric_df)
+        columns = numeric_df.columns
         
-        return correlations
+        return [
+            {
+                'column1': columns[i],
+                'column2': columns[j],
+                'correlation': float(r),
+                'type': 'positive' if r > 0 else 'negative',
+                'strength': 'strong' if abs(r) > 0.9 else 'moderate'
+            }
+            for i, j, r in zip(left.tolist(), right.tolist(), values.tolist())
+        ]
     
-    async def _find_trends(self, df: pd.DataFrame) -> List[Dict]:
-        """یافتن روندهای زمانی"""
+    async def _find_trends(self, df: pd.DataFrame, min_r: float = 0.5, window: Optional[str] = None) -> List[Dict]:
+        """یافتن روندهای زمانی (رگرسیون همه ستون‌های عددی روی زمان با یک عملیات ماتریسی)
+
+        شیب بر حسب «تغییر در روز» است. با window (مثل '7D' یا 'M') روند هر
+        پنجره زمانی هم گزارش می‌شود.
+        """
         trends = []
         
         # پیدا کردن ستون‌های زمانی
@@ -69,201 +169,196 @@ class PatternFinder:
             return trends
         
         for date_col in date_columns:
-            df_sorted = df.sort_values(by=date_col)
+            fitted = TrendEngine().fit(df[date_col], df[numeric_columns])
             
-            for num_col in numeric_columns:
-                try:
-                    # محاسبه شیب روند
-                    x = np.arange(len(df_sorted))
-                    y = df_sorted[num_col].fillna(method='ffill').fillna(0).values
-                    
-                    slope, intercept, r_value, p_value, std_err = stats.linregress(x, y)
-                    
-                    if abs(r_value) > 0.5:  # همبستگی قابل توجه
-                        trends.append({
-                            'column': num_col,
-                            'date_column': date_col,
-                            'trend': 'increasing' if slope > 0 else 'decreasing',
-                            'slope': float(slope),
-                            'r_squared': float(r_value ** 2),
-                            'significance': 'significant' if p_value < 0.05 else 'not_significant'
-                        })
+            for j, num_col in enumerate(numeric_columns):
+                r_value = fitted['r'][0, j]
                 
-                except Exception as e:
-                    log.debug(f"Could not calculate trend for {num_col}: {e}")
+                if abs(r_value) > min_r:  # همبستگی قابل توجه (nan رد می‌شود)
+                    slope = fitted['slope'][0, j]
+                    trends.append({
+                        'column': num_col,
+                        'date_column': date_col,
+                        'trend': 'increasing' if slope > 0 else 'decreasing',
+                        'slope': float(slope),
+                        'r_squared': float(r_value ** 2),
+                        'significance': 'significant' if fitted['p_value'][0, j] < 0.05 else 'not_significant'
+                    })
+            
+            if window:
+                trends.extend(self._windowed_trends(df, date_col, numeric_columns, window, min_r))
         
         return trends
     
-    async def _find_sequences(self, df: pd.DataFrame) -> List[Dict]:
-        """یافتن توالی‌های تکراری"""
+    def _windowed_trends(self, df: pd.DataFrame, date_col: str, numeric_columns: pd.Index, window: str,
+                         min_r: float) -> List[Dict]:
+        """روند هر پنجره زمانی؛ فقط پنجره‌های با همبستگی قابل توجه"""
+        fitted = TrendEngine(window=window).fit(df[date_col], df[numeric_columns])
+        trends = []
+        
+        for j, num_col in enumerate(numeric_columns):
+            selected = np.flatnonzero(np.abs(np.nan_to_num(fitted['r'][:, j])) > min_r)
+            if len(selected) == 0:
+                continue
+            
+            trends.append({
+                'column': num_col,
+                'date_column': date_col,
+                'window': window,
+                'windows': [
+                    {
+                        'start': pd.Timestamp(fitted['window_start'][k]).isoformat(),
+                        'trend': 'increasing' if fitted['slope'][k, j] > 0 else 'decreasing',
+                        'slope': float(fitted['slope'][k, j]),
+                        'r_squared': float(fitted['r'][k, j] ** 2),
+                        'count': int(fitted['n'][k, j])
+                    }
+                    for k in selected
+                ]
+            })
+        
+        return trends
+    
+    async def _find_seasonality(self, df: pd.DataFrame, min_strength: float = 0.2, top_k: int = 2) -> List[Dict]:
+        """یافتن دوره‌های تناوب (روزانه، هفتگی، ...) ستون‌های عددی با FFT"""
+        seasonality = []
+        
+        date_columns = df.select_dtypes(include=['datetime64']).columns
+        numeric_columns = df.select_dtypes(include=[np.number]).columns
+        
+        if len(date_columns) == 0 or len(numeric_columns) == 0:
+            return seasonality
+        
+        detector = SeasonalityDetector(min_strength=min_strength, top_k=top_k)
+        for date_col in date_columns:
+            for period in detector.detect(df[date_col], df[numeric_columns]):
+                seasonality.append({**period, 'date_column': date_col})
+        
+        return seasonality
+    
+    async def _find_sequences(self, df: pd.DataFrame, n: int = 3, top_k: int = 5) -> List[Dict]:
+        """یافتن توالی‌های تکراری (n-gram های پرتکرار هر ستون categorical)"""
         sequences = []
         
         # جستجو در ستون‌های categorical
         categorical_columns = df.select_dtypes(include=['object', 'category']).columns
         
         for col in categorical_columns:
-            series = df[col].dropna()
-            
-            if len(series) < 3:
-                continue
-            
-            # پیدا کردن توالی‌های رایج
-            sequence_counts = {}
-            window_size = 3
-            
-            for i in range(len(series) - window_size + 1):
-                sequence = tuple(series.iloc[i:i+window_size])
-                sequence_counts[sequence] = sequence_counts.get(sequence, 0) + 1
-            
-            # فیلتر توالی‌های تکراری
-            frequent_sequences = [
-                {'sequence': list(seq), 'count': count, 'column': col}
-                for seq, count in sequence_counts.items()
-                if count > 1
-            ]
-            
-            sequences.extend(sorted(frequent_sequences, key=lambda x: x['count'], reverse=True)[:5])
+            for sequence, count in frequent_ngrams(df[col], n=n, top_k=top_k):
+                sequences.append({'sequence': sequence, 'count': count, 'column': col})
         
         return sequences
     
-    async def _find_anomalies(self, df: pd.DataFrame) -> List[Dict]:
-        """یافتن ناهنجاری‌ها"""
+    async def _find_anomalies(self, df: pd.DataFrame, multivariate: bool = True) -> List[Dict]:
+        """یافتن ناهنجاری‌ها با آمار مقاوم مشترک (میانه/MAD) و Isolation Forest چندمتغیره"""
         anomalies = []
+        profile = anomaly_engine.profile(df)
         
-        numeric_df = df.select_dtypes(include=[np.number])
-        
-        for column in numeric_df.columns:
-            series = df[column].dropna()
-            
-            if len(series) < 4:
+        for column, column_stats in profile.items():
+            if column_stats['count'] < 4 or column_stats['robust_outliers'] == 0:
                 continue
             
-            # روش Z-score
-            z_scores = np.abs(stats.zscore(series))
-            anomaly_indices = np.where(z_scores > 3)[0]
-            
-            if len(anomaly_indices) > 0:
+            # روش Z-score مقاوم: 0.6745 * |x - median| / MAD
+            series = df[column]
+            anomaly_values = series[anomaly_engine.outlier_mask(series, column_stats, 'robust_z')]
+            anomalies.append({
+                'column': column,
+                'method': 'robust_z_score',
+                'count': column_stats['robust_outliers'],
+                'anomaly_values': anomaly_values.tolist()[:10],
+                'median': column_stats['median'],
+                'mad': column_stats['mad'],
+                'mean': column_stats['mean'],
+                'std': column_stats['std']
+            })
+        
+        if multivariate:
+            forest = anomaly_engine.isolation_forest(df)
+            if forest is not None and forest['is_anomaly'].any():
+                rows = np.flatnonzero(forest['is_anomaly'])
+                worst = rows[np.argsort(forest['scores'][rows])[:10]]
                 anomalies.append({
-                    'column': column,
-                    'method': 'z_score',
-                    'count': len(anomaly_indices),
-                    'anomaly_values': series.iloc[anomaly_indices].tolist()[:10],
-                    'mean': float(series.mean()),
-                    'std': float(series.std())
+                    'columns': forest['columns'],
+                    'method': 'isolation_forest',
+                    'count': int(len(rows)),
+                    'anomaly_rows': df.index[worst].tolist(),
+                    'anomaly_scores': forest['scores'][worst].tolist()
                 })
         
         return anomalies
     
-    async def _find_associations(self, df: pd.DataFrame, min_support: float = 0.1) -> List[Dict]:
-        """یافتن قوانین انجمنی (Association Rules)"""
-        associations = []
-        
-        # برای ستون‌های categorical
+    async def _find_associations(self, df: pd.DataFrame, min_support: float = 0.1, min_confidence: float = 0.5,
+                                 max_len: int = 3, top_k: int = 20) -> List[Dict]:
+        """یافتن قوانین انجمنی (Association Rules) با FP-Growth روی همه ستون‌های categorical"""
         categorical_columns = df.select_dtypes(include=['object', 'category']).columns
         
         if len(categorical_columns) < 2:
-            return associations
+            return []
         
-        # محاسبه فراوانی ترکیبات
-        for col1, col2 in itertools.combinations(categorical_columns[:5], 2):  # محدود به 5 ستون
-            crosstab = pd.crosstab(df[col1], df[col2], normalize='all')
-            
-            # پیدا کردن ترکیبات رایج
-            for idx in crosstab.index:
-                for col in crosstab.columns:
-                    support = crosstab.loc[idx, col]
-                    
-                    if support >= min_support:
-                        associations.append({
-                            'item1': f"{col1}={idx}",
-                            'item2': f"{col2}={col}",
-                            'support': float(support),
-                            'type': 'co_occurrence'
-                        })
-        
-        return sorted(associations, key=lambda x: x['support'], reverse=True)[:20]
+        engine = FPGrowth(min_support=min_support, min_confidence=min_confidence, max_len=max_len)
+        rules = engine.rules(df[categorical_columns])
+        
+        for rule in rules:
+            rule['type'] = 'association_rule'
+        
+        return sorted(rules, key=lambda x: (x['lift'], x['confidence'], x['support']), reverse=True)[:top_k]
     
-    async def _find_clusters(self, df: pd.DataFrame, n_components: int = 2) -> Dict[str, Any]:
-        """یافتن خوشه‌های طبیعی در داده"""
-        numeric_df = df.select_dtypes(include=[np.number]).dropna()
+    async def _find_clusters(self, df: pd.DataFrame, n_components: int = 2, chunk_size: int = 200000,
+                             max_clusters: int = 10) -> Dict[str, Any]:
+        """یافتن خوشه‌های طبیعی در داده (IncrementalPCA تکه‌ای و MiniBatchKMeans با k خودکار)
+        
+        'labels' برچسب هر ردیف است و در worker به صورت artifact ذخیره می‌شود.
+        """
+        numeric_columns = list(df.select_dtypes(include=[np.number]).columns)
         
-        if len(numeric_df) < 10 or len(numeric_df.columns) < 2:
+        if len(df) < 10 or len(numeric_columns) < 2:
             return {'clusters': [], 'note': 'Insufficient data for clustering'}
         
         try:
-            # استانداردسازی
-            scaler = StandardScaler()
-            scaled_data = scaler.fit_transform(numeric_df)
+            clusterer = StreamingClusterer(n_components=n_components, k_range=range(2, max_clusters + 1))
+            chunks = lambda: (df.iloc[start:start + chunk_size] for start in range(0, len(df), chunk_size))
+            result = clusterer.fit_predict(chunks, numeric_columns)
             
-            # PCA برای کاهش بعد
-            pca = PCA(n_components=min(n_components, len(numeric_df.columns)))
-            components = pca.fit_transform(scaled_data)
-            
-            return {
-                'n_components': n_components,
-                'explained_variance': pca.explained_variance_ratio_.tolist(),
-                'total_variance_explained': float(sum(pca.explained_variance_ratio_)),
-                'principal_components': components[:100].tolist()  # فقط 100 اولی
-            }
+            if result is None:
+                return {'clusters': [], 'note': 'Insufficient data for clustering'}
+            return result
         
         except Exception as e:
             log.error(f"Error in clustering: {e}")
             return {'clusters': [], 'error': str(e)}
     
-    async def find_dependencies(self, df: pd.DataFrame) -> List[Dict]:
-        """یافتن وابستگی‌های functional"""
-        dependencies = []
+    async def find_dependencies(self, df: pd.DataFrame, max_error: float = 0.0, max_lhs: int = 2,
+                                sample_size: Optional[int] = 10000) -> List[Dict]:
+        """یافتن وابستگی‌های functional (شامل تعیین‌کننده‌های چند ستونی و FD های تقریبی)
         
-        columns = df.columns.tolist()
-        
-        # بررسی وابستگی‌های احتمالی
-        for col1 in columns:
-            for col2 in columns:
-                if col1 == col2:
-                    continue
-                
-                # بررسی آیا col1 -> col2 (col1 تعیین‌کننده col2 است)
-                grouped = df.groupby(col1)[col2].nunique()
-                
-                if (grouped == 1).all():
-                    dependencies.append({
-                        'determinant': col1,
-                        'dependent': col2,
-                        'type': 'functional_dependency',
-                        'confidence': 1.0
-                    })
+        'determinants' لیست ستون‌های سمت چپ است؛ 'determinant' برای سازگاری نام همان
+        یک ستون است و برای تعیین‌کننده چند ستونی (یا ستون ثابت با سمت چپ خالی) None است.
+        """
+        discovery = FDDiscovery(max_error=max_error, max_lhs=max_lhs, sample_size=sample_size)
         
-        return dependencies
+        return [
+            {
+                'determinant': fd['lhs'][0] if len(fd['lhs']) == 1 else None,
+                'determinants': fd['lhs'],
+                'dependent': fd['rhs'],
+                'type': 'functional_dependency' if fd['error'] == 0 else 'approximate_dependency',
+                'confidence': 1.0 - fd['error']
+            }
+            for fd in discovery.discover(df)
+        ]
     
-    async def analyze_distribution(self, df: pd.DataFrame) -> Dict[str, Any]:
-        """تحلیل توزیع داده‌ها"""
-        distributions = {}
+    async def analyze_distribution(self, df: pd.DataFrame, chunk_size: int = 200000,
+                                   relative_accuracy: float = 0.01) -> Dict[str, Any]:
+        """تحلیل توزیع داده‌ها در یک گذر (گشتاورهای قابل ادغام و DDSketch برای چندک‌ها)
         
-        numeric_columns = df.select_dtypes(include=[np.number]).columns
+        میانه و چارک‌ها با خطای نسبی حداکثر relative_accuracy تقریب زده می‌شوند.
+        """
+        numeric_columns = list(df.select_dtypes(include=[np.number]).columns)
+        accumulator = DistributionAccumulator(numeric_columns, relative_accuracy=relative_accuracy)
         
-        for column in numeric_columns:
-            series = df[column].dropna()
-            
-            if len(series) < 4:
-                continue
-            
-            # آزمون نرمال بودن
-            _, p_value = stats.normaltest(series)
-            
-            distributions[column] = {
-                'mean': float(series.mean()),
-                'median': float(series.median()),
-                'std': float(series.std()),
-                'skewness': float(stats.skew(series)),
-                'kurtosis': float(stats.kurtosis(series)),
-                'is_normal': p_value > 0.05,
-                'quartiles': {
-                    'Q1': float(series.quantile(0.25)),
-                    'Q2': float(series.quantile(0.50)),
-                    'Q3': float(series.quantile(0.75))
-                }
-            }
+        for start in range(0, len(df), chunk_size):
+            accumulator.update(df.iloc[start:start + chunk_size])
         
-        return distributions
+        return accumulator.result()
 
 pattern_finder = PatternFinder()
\ No newline at end of file
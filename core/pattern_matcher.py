@@ -0,0 +1,143 @@
+# Location: datanex/core/pattern_matcher.py
+
+import re
+import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from typing import Any, Dict, Optional, Tuple
+from utils.logger import log
+
+class PatternMatcher:
+    """تطبیق برداری regex (معنای re.match) روی آرایه‌های رشته‌ای Arrow
+
+    هر الگو یک بار به نحو RE2 ترجمه و به صورت MatchSubstringOptions نگه
+    داشته می‌شود و pc.match_substring_regex آن را بدون ساختن شیء Python برای
+    هر مقدار روی بافر UTF-8 اجرا می‌کند. آرایه‌های Arrow (مثل ستون‌های
+    string[pyarrow]) بدون کپی استفاده می‌شوند. کلاس‌های \\d و \\w و \\s مثل
+    Python یونیکدی ترجمه می‌شوند (مثلاً ارقام فارسی رقم حساب می‌شوند). الگوهایی
+    که RE2 پشتیبانی نمی‌کند (lookaround، backreference) با re.compile کامپایل
+    شده Python اجرا می‌شوند.
+    """
+
+    # ترجمه کلاس‌های کوتاه Python به کلاس‌های یونیکدی RE2: (بیرون از [...], درون [...])
+    CLASSES = {
+        'd': (r'\p{Nd}', r'\p{Nd}'),
+        'w': (r'[\p{L}\p{N}_]', r'\p{L}\p{N}_'),
+        # \s در Python شامل \v و جداکننده‌های \x1c-\x1f و \x85 هم هست (در RE2 نیست)
+        's': (r'[\s\p{Z}\x0b\x1c-\x1f\x85]', r'\s\p{Z}\x0b\x1c-\x1f\x85'),
+        'D': (r'\P{Nd}', None),
+        'W': (r'[^\p{L}\p{N}_]', None),
+        'S': (r'[^\s\p{Z}\x0b\x1c-\x1f\x85]', None),
+        'Z': (r'\z', None)
+    }
+
+    def __init__(self, cache_size: int = 256):
+        self.cache_size = cache_size
+        self._compiled: Dict[Tuple[str, bool], Tuple[Optional[pc.MatchSubstringOptions], re.Pattern]] = {}
+
+    @classmethod
+    def _to_re2(cls, pattern: str, search: bool = False) -> str:
+        """ترجمه الگوی Python به RE2 با همان معنای یونیکدی؛ ValueError اگر ترجمه ممکن نباشد
+
+        با search=False الگو به ابتدای مقدار لنگر می‌شود (معنای re.match).
+        """
+        if re.search(r'\(\?[a-zA-Z]*m', pattern):
+            raise ValueError("Multiline patterns are matched with Python regex")
+        out, i, in_class = [], 0, False
+
+        while i < len(pattern):
+            char = pattern[i]
+            if char == '\\' and i + 1 < len(pattern):
+                escaped = pattern[i + 1]
+                if escaped in cls.CLASSES:
+                    replacement = cls.CLASSES[escaped][1 if in_class else 0]
+                    if replacement is None:
+                        raise ValueError(f"Cannot translate \\{escaped} inside a character class")
+                    out.append(replacement)
+                else:
+                    out.append(pattern[i:i + 2])
+                i += 2
+                continue
+
+            if char == '[' and not in_class:
+                in_class = True
+                out.append(char)
+                i += 1
+                # '^' و ']' در ابتدای کلاس معنای خاص/لفظی دارند
+                if pattern[i:i + 1] == '^':
+                    out.append('^')
+                    i += 1
+                if pattern[i:i + 1] == ']':
+                    out.append(r'\]')
+                    i += 1
+                continue
+
+            if char == ']' and in_class:
+                in_class = False
+            elif char == '$' and not in_class:
+                # '$' در Python قبل از یک '\n' پایانی هم تطبیق دارد
+                char = r'(?:\n?\z)'
+            out.append(char)
+            i += 1
+
+        return ('(?:' if search else '^(?:') + ''.join(out) + ')'
+
+    def compile(self, pattern: str, search: bool = False) -> Tuple[Optional[pc.MatchSubstringOptions], re.Pattern]:
+        """(گزینه‌های کرنل Arrow یا None، الگوی کامپایل شده Python) با cache"""
+        key = (pattern, search)
+        if key in self._compiled:
+            return self._compiled[key]
+
+        regex = re.compile(pattern)
+        try:
+            options = pc.MatchSubstringOptions(self._to_re2(pattern, search))
+            # کامپایل RE2 روی یک آرایه کوچک تا الگوهای پشتیبانی نشده همین‌جا مشخص شوند
+            pc.match_substring_regex(pa.array([''], type=pa.string()), options=options)
+        except (ValueError, pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+            log.debug(f"Pattern {pattern!r} falls back to Python regex: {e}")
+            options = None
+
+        if len(self._compiled) >= self.cache_size:
+            self._compiled.pop(next(iter(self._compiled)), None)
+        self._compiled[key] = (options, regex)
+        return options, regex
+
+    @staticmethod
+    def _arrow(values: Any) -> Optional[pa.Array]:
+        """آرایه رشته‌ای Arrow (بدون کپی برای داده Arrow)؛ None اگر مقادیر رشته نباشند"""
+        if isinstance(values, (pd.Series, pd.Index)):
+            values = values.array
+        if isinstance(values, (pa.Array, pa.ChunkedArray)):
+            array = values
+        else:
+            try:
+                array = pa.array(values, from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                return None
+
+        if pa.types.is_string(array.type) or pa.types.is_large_string(array.type):
+            return array
+        return None
+
+    def match(self, values: Any, pattern: str, search: bool = False) -> np.ndarray:
+        """ماسک بولی مقادیری که با pattern (از ابتدا) تطبیق دارند؛ null تطبیق ندارد
+
+        با search=True تطبیق در هر جای مقدار کافی است (معنای re.search).
+        مقادیر غیر رشته‌ای مثل str(value) بررسی می‌شوند.
+        """
+        options, regex = self.compile(pattern, search)
+        find = regex.search if search else regex.match
+        array = self._arrow(values) if options is not None else None
+
+        if array is not None:
+            matched = pc.fill_null(pc.match_substring_regex(array, options=options), False)
+            return np.asarray(matched.to_numpy(zero_copy_only=False), dtype=bool)
+
+        values = np.asarray(values, dtype=object)
+        return np.fromiter(
+            (not pd.isna(value) and find(str(value)) is not None for value in values),
+            dtype=bool, count=len(values)
+        )
+
+pattern_matcher = PatternMatcher()
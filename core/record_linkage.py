@@ -0,0 +1,203 @@
+# Location: datanex/core/record_linkage.py
+
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+from rapidfuzz import fuzz
+from rapidfuzz.process import cpdist
+from utils.logger import log
+
+_SOUNDEX_CODES = str.maketrans(
+    'abcdefghijklmnopqrstuvwxyz',
+    '01230120022455012623010202'
+)
+
+_SCORERS = {
+    'ratio': fuzz.ratio,
+    'partial_ratio': fuzz.partial_ratio,
+    'token_sort_ratio': fuzz.token_sort_ratio,
+    'token_set_ratio': fuzz.token_set_ratio,
+    'WRatio': fuzz.WRatio
+}
+
+def soundex(letters: str) -> str:
+    """کد Soundex چهار کاراکتری برای یک رشته از حروف لاتین کوچک"""
+    if not letters:
+        return ''
+    
+    codes = letters.translate(_SOUNDEX_CODES)
+    result = [letters[0].upper()]
+    previous = codes[0]
+    
+    for ch, code in zip(letters[1:], codes[1:]):
+        if code != '0' and code != previous:
+            result.append(code)
+        # h و w کد قبلی را قطع نمی‌کنند
+        if ch not in 'hw':
+            previous = code
+    
+    return (''.join(result) + '000')[:4]
+
+class RecordLinker:
+    """record linkage روی ستون‌های کلیدی با blocking و sorted-neighbourhood
+
+    برای هر pass یک کلید بلاک ساخته می‌شود (soundex، prefix، n-gram یا مقدار
+    مرتب شده) و هر ردیف فقط با window-1 ردیف بعدی در ترتیب مرتب شده همان
+    بلاک مقایسه می‌شود؛ بنابراین تعداد جفت‌های کاندید خطی می‌ماند. امتیاز هر
+    فیلد با rapidfuzz محاسبه و با وزن‌ها ترکیب می‌شود.
+
+    blocking: لیستی از مشخصه‌ها به شکل
+        'soundex:name'، 'prefix:name:4'، 'ngram:address:3' یا 'sorted:name'
+    """
+
+    def __init__(self, fields: Union[Sequence[str], Dict[str, float]], blocking: Optional[List[str]] = None,
+                 window: int = 10, threshold: float = 0.85, scorer: str = 'token_sort_ratio',
+                 block_size: int = 1000000):
+        if isinstance(fields, dict):
+            self.weights = {field: float(weight) for field, weight in fields.items()}
+        else:
+            self.weights = {field: 1.0 for field in fields}
+
+        if not self.weights:
+            raise ValueError("At least one key field is required for record linkage")
+
+        if scorer not in _SCORERS:
+            raise ValueError(f"Unknown scorer: {scorer}")
+
+        if window < 2:
+            raise ValueError(f"Invalid window: {window}")
+
+        self.fields = list(self.weights)
+        self.blocking = blocking or [f"sorted:{field}" for field in self.fields]
+        self.window = window
+        self.threshold = threshold
+        self.scorer = _SCORERS[scorer]
+        self.block_size = block_size
+
+    @staticmethod
+    def _normalize(series: pd.Series) -> pd.Series:
+        mask = series.isna()
+        text = series.astype(str).str.lower().str.replace(r'\s+', ' ', regex=True).str.strip()
+        return text.where(~mask & (text != ''), None)
+
+    def _blocking_keys(self, values: pd.Series, spec: str) -> Tuple[np.ndarray, pd.Series]:
+        """(موقعیت ردیف، کلید بلاک) برای یک pass؛ هر ردیف ممکن است چند کلید داشته باشد"""
+        kind, _, argument = spec.partition(':')
+        field, _, size = argument.partition(':')
+
+        if field not in values:
+            raise ValueError(f"Unknown blocking field: {field}")
+
+        column = values[field].dropna()
+        positions = column.index.to_numpy()
+
+        if kind == 'soundex':
+            # Soundex فقط یک بار برای هر رشته یکتای حروف محاسبه می‌شود
+            letters = column.str.replace(r'[^a-z]', '', regex=True)
+            codes, uniques = pd.factorize(letters)
+            keys = pd.Series(np.array([soundex(text) for text in uniques], dtype=object)[codes], index=column.index)
+            # متن غیر لاتین: چهار کاراکتر اول خود متن کلید بلاک است
+            keys = keys.where(letters != '', column.str[:4])
+        elif kind == 'prefix':
+            keys = column.str[:int(size or 4)]
+        elif kind == 'sorted':
+            keys = column
+        elif kind == 'ngram':
+            n = int(size or 3)
+            grams = column.map(lambda text: sorted({text[i:i + n] for i in range(max(len(text) - n + 1, 1))}))
+            exploded = grams.explode()
+            positions = exploded.index.to_numpy()
+            keys = exploded
+        else:
+            raise ValueError(f"Unknown blocking key: {spec}")
+
+        return positions, keys.reset_index(drop=True)
+
+    def _window_pairs(self, positions: np.ndarray, keys: pd.Series, sort_values: np.ndarray,
+                      exact_block: bool) -> Tuple[np.ndarray, np.ndarray]:
+        """جفت‌های sorted-neighbourhood: هر ردیف با window-1 ردیف بعدی"""
+        codes, _ = pd.factorize(keys, sort=True)
+        order = np.lexsort((positions, sort_values[positions], codes))
+        positions, codes = positions[order], codes[order]
+
+        left, right = [], []
+        for offset in range(1, self.window):
+            if offset >= len(positions):
+                break
+            same = codes[offset:] == codes[:-offset] if exact_block else np.ones(len(positions) - offset, dtype=bool)
+            left.append(positions[:-offset][same])
+            right.append(positions[offset:][same])
+
+        if not left:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+
+        return np.concatenate(left), np.concatenate(right)
+
+    def candidate_pairs(self, values: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """جفت‌های کاندید یکتا از همه pass های blocking"""
+        n = len(values)
+
+        # ترتیب ثانویه داخل هر بلاک: مقدار نرمال‌شده فیلدهای کلیدی
+        texts = [values[field].fillna('') for field in self.fields]
+        combined = texts[0].str.cat(texts[1:], sep=' ') if len(texts) > 1 else texts[0]
+        sort_values = pd.factorize(combined, sort=True)[0]
+
+        left, right = [], []
+        for spec in self.blocking:
+            positions, keys = self._blocking_keys(values, spec)
+            i, j = self._window_pairs(positions, keys, sort_values, exact_block=not spec.startswith('sorted:'))
+            left.append(i)
+            right.append(j)
+
+        if not left:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+
+        i = np.concatenate(left).astype(np.int64)
+        j = np.concatenate(right).astype(np.int64)
+        codes = np.unique(np.minimum(i, j) * n + np.maximum(i, j))
+        i, j = codes // n, codes % n
+        keep = i != j
+        return i[keep], j[keep]
+
+    def score_pairs(self, values: pd.DataFrame, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+        """امتیاز وزن‌دار (0 تا 1) برای هر جفت؛ فیلدهای null در میانگین حساب نمی‌شوند"""
+        total = np.zeros(len(left), dtype=np.float64)
+        weight_sum = np.zeros(len(left), dtype=np.float64)
+
+        for field, weight in self.weights.items():
+            column = values[field].to_numpy(dtype=object)
+
+            for start in range(0, len(left), self.block_size):
+                a = column[left[start:start + self.block_size]]
+                b = column[right[start:start + self.block_size]]
+                present = pd.notna(a) & pd.notna(b)
+                if not present.any():
+                    continue
+
+                scores = cpdist(a[present].tolist(), b[present].tolist(), scorer=self.scorer, workers=-1)
+                block = np.arange(start, start + len(a))[present]
+                total[block] += weight * np.asarray(scores, dtype=np.float64) / 100.0
+                weight_sum[block] += weight
+
+        return np.divide(total, weight_sum, out=np.zeros_like(total), where=weight_sum > 0)
+
+    def find_pairs(self, df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """جفت‌های رکورد با امتیاز >= threshold"""
+        missing = [field for field in self.fields if field not in df.columns]
+        if missing:
+            raise ValueError(f"Unknown key columns: {missing}")
+
+        blocking_fields = {spec.partition(':')[2].partition(':')[0] for spec in self.blocking}
+        columns = list(dict.fromkeys(self.fields + sorted(blocking_fields & set(df.columns))))
+        values = pd.DataFrame(
+            {column: self._normalize(df[column]) for column in columns}
+        ).reset_index(drop=True)
+
+        left, right = self.candidate_pairs(values)
+        scores = self.score_pairs(values, left, right)
+
+        keep = scores >= self.threshold
+        log.debug(f"Record linkage: {len(left)} candidate pairs, {int(keep.sum())} matched")
+        return left[keep], right[keep], scores[keep].astype(np.float32)
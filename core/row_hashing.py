@@ -0,0 +1,63 @@
+# Location: datanex/core/row_hashing.py
+
+import pandas as pd
+import numpy as np
+
+def normalize_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """نرمال‌سازی برداری ستون‌های متنی (حذف فاصله‌های اطراف و lowercase)
+
+    مقادیر null حفظ می‌شوند و ستون‌های عددی بدون تغییر می‌مانند.
+    """
+    normalized = {}
+
+    for column in df.columns:
+        series = df[column]
+
+        if pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+            mask = series.isna()
+            text = series.astype(str).str.strip().str.lower()
+            normalized[column] = text.where(~mask, np.nan)
+        else:
+            normalized[column] = series
+
+    return pd.DataFrame(normalized, index=df.index)
+
+def _text_markers(df: pd.DataFrame) -> pd.DataFrame:
+    """برای ستون‌های object مخلوط، اینکه هر مقدار رشته است یا نه
+
+    hash_pandas_object مقادیر object را با شکل رشته‌ای‌شان هش می‌کند، پس بدون
+    این ستون‌ها 1 و '1' هش یکسان می‌گیرند (df.duplicated آن‌ها را متفاوت می‌داند).
+    ستون‌هایی که همه مقادیرشان رشته است نیازی به این ستون ندارند.
+    """
+    markers = {}
+
+    for position, column in enumerate(df.columns):
+        series = df[column]
+        if pd.api.types.is_object_dtype(series) and \
+                pd.api.types.infer_dtype(series, skipna=True) not in ('string', 'empty'):
+            markers[position] = series.map(lambda value: isinstance(value, str))
+
+    return pd.DataFrame(markers, index=df.index)
+
+def hash_rows(df: pd.DataFrame, normalize: bool = False) -> np.ndarray:
+    """هش 64 بیتی هر ردیف (null ها هم هش ثابت دارند)
+
+    در حالت بدون نرمال‌سازی، رشته و مقدار غیر رشته‌ای با شکل رشته‌ای یکسان
+    (مثل 1 و '1') هش متفاوت دارند.
+    """
+    if len(df.columns) == 0:
+        return np.zeros(len(df), dtype=np.uint64)
+
+    if normalize:
+        frame = normalize_frame(df)
+    else:
+        markers = _text_markers(df)
+        frame = pd.concat([df, markers], axis=1) if len(markers.columns) else df
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy(dtype=np.uint64)
+
+def row_texts(df: pd.DataFrame) -> pd.Series:
+    """متن نرمال‌شده هر ردیف (برای shingle و MinHash)"""
+    normalized = df.astype(str).where(df.notna(), '')
+    columns = [normalized[column] for column in normalized.columns]
+    texts = columns[0].str.cat(columns[1:], sep=' ')
+    return texts.str.lower().str.replace(r'\s+', ' ', regex=True).str.strip()
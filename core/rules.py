@@ -0,0 +1,555 @@
+# Location: datanex/core/rules.py
+
+import ast
+import operator
+import re
+import pandas as pd
+import numpy as np
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple, Union
+from core.pattern_matcher import pattern_matcher
+from utils.logger import log
+
+class _Value:
+    """مقدار یک زیرعبارت: data (آرایه، ستون متنی factorize شده یا اسکالر) و ماسک null"""
+
+    __slots__ = ('data', 'null')
+
+    def __init__(self, data: Any, null: Any = False):
+        self.data = data
+        self.null = null
+
+class _Text:
+    """ستون متنی به صورت کدها و مقادیر یکتا؛ عملیات متنی فقط روی مقادیر یکتا اجرا می‌شوند"""
+
+    __slots__ = ('codes', 'uniques')
+
+    def __init__(self, codes: np.ndarray, uniques: np.ndarray):
+        self.codes = codes
+        self.uniques = uniques
+
+    def lookup(self, table: np.ndarray) -> np.ndarray:
+        """پخش نتیجه محاسبه شده روی مقادیر یکتا به همه ردیف‌ها (کد -1 یعنی null و بعداً ماسک می‌شود)"""
+        table = np.asarray(table)
+        if len(table) == 0:
+            return np.zeros(len(self.codes), dtype=table.dtype)
+        return table[self.codes]
+
+    def dense(self) -> np.ndarray:
+        return self.uniques[self.codes]
+
+def _as_text(value: _Value) -> _Value:
+    if isinstance(value.data, _Text):
+        return value
+    if np.ndim(value.data) == 0:
+        return _Value(_Text(np.zeros(1, dtype=np.intp), np.array([str(value.data)], dtype=object)), value.null)
+
+    codes, uniques = pd.factorize(value.data)
+    text = np.asarray(pd.Index(uniques).astype(str), dtype=object)
+    return _Value(_Text(codes, text), value.null | (codes < 0))
+
+def _dense(data: Any) -> Any:
+    return data.dense() if isinstance(data, _Text) else data
+
+def _align(array: Any, scalar: Any) -> Any:
+    """تبدیل ثابت متنی به زمان برای مقایسه با ستون‌های datetime"""
+    if isinstance(array, np.ndarray) and array.dtype.kind == 'M' and isinstance(scalar, str):
+        return pd.Timestamp(scalar).to_datetime64()
+    return scalar
+
+COMPARISONS = {
+    ast.Eq: operator.eq, ast.NotEq: operator.ne, ast.Lt: operator.lt,
+    ast.LtE: operator.le, ast.Gt: operator.gt, ast.GtE: operator.ge
+}
+
+ARITHMETIC = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod, ast.Pow: operator.pow
+}
+
+def _is_text(data: Any) -> bool:
+    return isinstance(data, (_Text, str))
+
+def _is_number(data: Any) -> bool:
+    if isinstance(data, np.ndarray):
+        return data.dtype.kind in 'biuf'
+    return isinstance(data, (int, float, np.number, np.bool_))
+
+def _compare(op: Callable, left: _Value, right: _Value) -> _Value:
+    null = left.null | right.null
+    a, b = left.data, right.data
+    if (_is_text(a) and _is_number(b)) or (_is_number(a) and _is_text(b)):
+        raise ValueError("Comparison between text and numeric values is not supported")
+
+    # ستون متنی در برابر اسکالر: مقایسه فقط روی مقادیر یکتا
+    if isinstance(a, _Text) and np.ndim(b) == 0:
+        return _Value(a.lookup(op(a.uniques, b)).astype(bool), null)
+    if isinstance(b, _Text) and np.ndim(a) == 0:
+        return _Value(b.lookup(op(a, b.uniques)).astype(bool), null)
+
+    a, b = _dense(a), _dense(b)
+    b, a = _align(a, b), _align(b, a)
+    with np.errstate(invalid='ignore'):
+        return _Value(np.asarray(op(a, b)), null)
+
+def _arithmetic(op: Callable, left: _Value, right: _Value) -> _Value:
+    if any(isinstance(value.data, (_Text, str)) for value in (left, right)):
+        raise ValueError("Arithmetic is not supported on text values")
+
+    a, b = left.data, right.data
+    if op is operator.pow:
+        # توان روی float64 تا ثابت‌هایی مثل 9 ** 9 ** 9 به حساب بی‌کران اعداد صحیح Python نروند
+        a, b = np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64)
+
+    with np.errstate(all='ignore'):
+        data = op(a, b)
+    null = left.null | right.null
+    if np.asarray(data).dtype.kind == 'f':
+        null = null | ~np.isfinite(data)
+    return _Value(data, null)
+
+def _no_null(value: _Value) -> bool:
+    return np.ndim(value.null) == 0 and not value.null
+
+def _boolean(value: _Value) -> Tuple[np.ndarray, np.ndarray]:
+    """(قطعاً درست، قطعاً نادرست) برای منطق سه مقداری"""
+    data = np.asarray(_dense(value.data), dtype=bool)
+    if _no_null(value):
+        return data, ~data
+    null = np.asarray(value.null, dtype=bool)
+    return data & ~null, ~(data | null)
+
+def _and(left: _Value, right: _Value) -> _Value:
+    if _no_null(left) and _no_null(right):
+        return _Value(np.asarray(_dense(left.data), dtype=bool) & np.asarray(_dense(right.data), dtype=bool))
+    left_true, left_false = _boolean(left)
+    right_true, right_false = _boolean(right)
+    data, false = left_true & right_true, left_false | right_false
+    return _Value(data, ~(data | false))
+
+def _or(left: _Value, right: _Value) -> _Value:
+    if _no_null(left) and _no_null(right):
+        return _Value(np.asarray(_dense(left.data), dtype=bool) | np.asarray(_dense(right.data), dtype=bool))
+    left_true, left_false = _boolean(left)
+    right_true, right_false = _boolean(right)
+    data, false = left_true | right_true, left_false & right_false
+    return _Value(data, ~(data | false))
+
+def _isin(value: _Value, options: List[Any], negate: bool) -> _Value:
+    if isinstance(value.data, _Text):
+        data = value.data.lookup(pd.Index(value.data.uniques).isin(options))
+    elif np.ndim(value.data) == 0:
+        data = np.bool_(value.data in options)
+    else:
+        data = pd.Index(value.data).isin([_align(value.data, option) for option in options])
+    return _Value(~data if negate else data, value.null)
+
+def _uniques_text(value: _Value) -> pd.Series:
+    return pd.Series(value.data.uniques, dtype=object).astype(str)
+
+def _text_map(value: _Value, function: Callable[[pd.Series], pd.Series]) -> _Value:
+    """تابع متنی با نتیجه غیر متنی (طول، تطبیق regex) روی مقادیر یکتا"""
+    value = _as_text(value)
+    return _Value(value.data.lookup(function(_uniques_text(value)).to_numpy()), value.null)
+
+def _text_transform(value: _Value, function: Callable[[pd.Series], pd.Series]) -> _Value:
+    """تبدیل متنی (lower، strip، ...) روی مقادیر یکتا با همان کدها"""
+    value = _as_text(value)
+    uniques = function(_uniques_text(value)).to_numpy(dtype=object)
+    return _Value(_Text(value.data.codes, uniques), value.null)
+
+def _is_unique(value: _Value) -> _Value:
+    codes = _as_text(value).data.codes if isinstance(value.data, _Text) else pd.factorize(value.data)[0]
+    present = codes >= 0
+    counts = np.bincount(codes[present], minlength=max(int(codes.max()) + 1, 1) if len(codes) else 1)
+    return _Value(np.where(present, counts[np.where(present, codes, 0)] == 1, False), ~present | value.null)
+
+def _present(value: _Value) -> np.ndarray:
+    """مقادیر غیر null به صورت آرایه عددی برای تجمیع"""
+    data = _dense(value.data)
+    if np.ndim(data) == 0:
+        return np.array([] if value.null else [data])
+    return data[~np.broadcast_to(value.null, data.shape)]
+
+def _aggregate(function: Callable[[np.ndarray], Any]) -> Callable[[_Value], _Value]:
+    def apply(value: _Value) -> _Value:
+        present = _present(value)
+        if len(present) == 0:
+            return _Value(np.nan, True)
+        result = function(present)
+        return _Value(result, bool(pd.isna(result)))
+    return apply
+
+def _count(value: _Value) -> _Value:
+    return _Value(int(len(_present(value))))
+
+def _nunique(value: _Value) -> _Value:
+    if isinstance(value.data, _Text):
+        codes = value.data.codes[~np.broadcast_to(value.null, value.data.codes.shape)]
+        return _Value(int(len(np.unique(codes))))
+    return _Value(int(pd.unique(_present(value)).size))
+
+def _any(value: _Value) -> _Value:
+    return _Value(bool(np.any(_boolean(value)[0])))
+
+def _all(value: _Value) -> _Value:
+    return _Value(bool(not np.any(_boolean(value)[1])))
+
+def _require_text(pattern: Any) -> str:
+    if not isinstance(pattern, str):
+        raise ValueError("Pattern arguments must be string constants")
+    return pattern
+
+def _matches(value: _Value, pattern: Any) -> _Value:
+    """regex (معنای re.search) با کرنل RE2 در pattern_matcher که زمان خطی دارد"""
+    pattern = _require_text(pattern)
+    if pattern_matcher.compile(pattern, search=True)[0] is None:
+        # الگوهای خارج از RE2 (lookaround، backreference) با re اجرا می‌شوند که backtracking دارد
+        log.warning(f"Rule pattern {pattern!r} is not supported by RE2; matching with Python regex")
+    return _text_map(value, lambda text: pd.Series(pattern_matcher.match(text, pattern, search=True)))
+
+# توابع مجاز: نام ← (تعداد آرگومان‌های عبارت، آیا آرگومان دوم ثابت است، پیاده‌سازی)
+FUNCTIONS: Dict[str, Tuple[int, bool, Callable]] = {
+    # تجمیعی (نتیجه اسکالر، null ها نادیده گرفته می‌شوند)
+    'sum': (1, False, _aggregate(np.sum)),
+    'mean': (1, False, _aggregate(np.mean)),
+    'min': (1, False, _aggregate(np.min)),
+    'max': (1, False, _aggregate(np.max)),
+    'median': (1, False, _aggregate(np.median)),
+    'std': (1, False, _aggregate(lambda values: np.std(values, ddof=1) if len(values) > 1 else np.nan)),
+    'count': (1, False, _count),
+    'nunique': (1, False, _nunique),
+    'any': (1, False, _any),
+    'all': (1, False, _all),
+    # ردیفی
+    'isnull': (1, False, lambda value: _Value(np.asarray(value.null, dtype=bool))),
+    'notnull': (1, False, lambda value: _Value(~np.asarray(value.null, dtype=bool))),
+    'is_unique': (1, False, _is_unique),
+    'abs': (1, False, lambda value: _Value(np.abs(value.data), value.null)),
+    'len': (1, False, lambda value: _text_map(value, lambda text: text.str.len())),
+    'lower': (1, False, lambda value: _text_transform(value, lambda text: text.str.lower())),
+    'upper': (1, False, lambda value: _text_transform(value, lambda text: text.str.upper())),
+    'strip': (1, False, lambda value: _text_transform(value, lambda text: text.str.strip())),
+    'matches': (1, True, _matches),
+    'contains': (1, True, lambda value, part: _text_map(
+        value, lambda text: text.str.contains(_require_text(part), regex=False))),
+    'startswith': (1, True, lambda value, prefix: _text_map(
+        value, lambda text: text.str.startswith(_require_text(prefix)))),
+    'endswith': (1, True, lambda value, suffix: _text_map(
+        value, lambda text: text.str.endswith(_require_text(suffix))))
+}
+
+Node = Tuple[str, Callable[['_Context'], _Value]]
+
+def _failing(message: str) -> Callable[['_Context'], _Value]:
+    """گره قانون نامعتبر؛ خطا هنگام ارزیابی همان قانون گزارش می‌شود"""
+    def compute(context: '_Context') -> _Value:
+        raise ValueError(message)
+    return compute
+
+class _Context:
+    """حالت ارزیابی یک مجموعه قانون روی یک DataFrame؛ ستون‌ها و زیرعبارت‌های مشترک یک بار محاسبه می‌شوند"""
+
+    def __init__(self, df: pd.DataFrame, shared: set):
+        self.df = df
+        self.shared = shared
+        self.memo: Dict[str, _Value] = {}
+
+    def value(self, key: str, compute: Callable[['_Context'], _Value]) -> _Value:
+        if key not in self.shared:
+            return compute(self)
+        if key not in self.memo:
+            self.memo[key] = compute(self)
+        return self.memo[key]
+
+    def column(self, name: str) -> _Value:
+        if name not in self.df.columns:
+            raise ValueError(f"Unknown column: {name}")
+
+        series = self.df[name]
+        if pd.api.types.is_bool_dtype(series) and not series.hasnans:
+            return _Value(series.to_numpy(dtype=bool))
+        if pd.api.types.is_numeric_dtype(series):
+            data = series.to_numpy(dtype=np.float64, na_value=np.nan)
+            return self._present(data, np.isnan(data))
+        if pd.api.types.is_datetime64_any_dtype(series):
+            data = series.to_numpy()
+            return self._present(data, np.isnat(data))
+
+        codes, uniques = pd.factorize(series)
+        return self._present(_Text(codes, np.asarray(uniques, dtype=object)), codes < 0)
+
+    @staticmethod
+    def _present(data: Any, null: np.ndarray) -> _Value:
+        # ستون بدون null ماسک ندارد تا عملیات منطقی مسیر سریع دو مقداری را بروند
+        return _Value(data, null if null.any() else False)
+
+class RuleSet:
+    """مجموعه قوانین کامپایل شده؛ هر قانون درخت بسته‌های برداری روی ستون‌هاست"""
+
+    def __init__(self, rules: List[Dict[str, Any]], roots: List[Node], columns: List[List[str]], shared: set):
+        self.rules = rules
+        self.roots = roots
+        self.columns = columns
+        self.shared = shared
+
+    def evaluate(self, df: pd.DataFrame) -> Iterator[Dict[str, Any]]:
+        """نتیجه هر قانون به ترتیب (یکی یکی تا ماسک‌ها پس از مصرف آزاد شوند)
+
+        هر نتیجه: {'rule', 'columns', 'scope': 'rows' | 'dataset', 'violations' (ماسک ردیف‌ها برای rows),
+        'holds', 'error'}. مقایسه با null نقض حساب نمی‌شود (مثل CHECK در SQL)؛ برای الزام از notnull استفاده کنید.
+        """
+        context = _Context(df, self.shared)
+
+        for rule, (_, compute), columns in zip(self.rules, self.roots, self.columns):
+            result = {'rule': rule['name'], 'columns': columns, 'scope': 'rows', 'violations': None,
+                      'holds': True, 'error': None}
+            try:
+                value = compute(context)
+                if np.ndim(value.data) == 0 and np.ndim(value.null) == 0:
+                    result['scope'] = 'dataset'
+                    result['holds'] = bool(value.null or value.data)
+                else:
+                    data = _dense(value.data)
+                    if np.asarray(data).dtype != bool:
+                        raise ValueError("Rule expression must be a condition")
+                    violations = np.broadcast_to(~(data | np.asarray(value.null, dtype=bool)), (len(df),))
+                    result['violations'] = violations
+                    result['holds'] = not violations.any()
+            except (ValueError, TypeError, KeyError, re.error) as e:
+                log.error(f"Error evaluating rule '{rule['name']}': {e}")
+                result['error'] = str(e)
+            yield result
+
+class RuleCompiler:
+    """کامپایل عبارت قانون (زیرمجموعه امن نحو Python) به درخت عملیات برداری
+
+    فقط ثابت‌ها، نام ستون‌ها (یا col('نام ستون'))، مقایسه‌ها (شامل زنجیره‌ای و in/not in با لیست ثابت)،
+    and/or/not، عملگرهای حسابی و توابع FUNCTIONS مجازند؛ هر نحو دیگری ValueError می‌دهد.
+    کلید هر گره نمایش متنی آن است تا زیرعبارت‌های یکسان بین قوانین یک بار محاسبه شوند.
+    """
+
+    MAX_LENGTH = 2000
+
+    def __init__(self):
+        self.references: Dict[str, int] = {}
+        self.columns: List[str] = []
+
+    def compile(self, expression: str) -> Node:
+        if len(expression) > self.MAX_LENGTH:
+            raise ValueError("Rule expression is too long")
+        try:
+            tree = ast.parse(expression.strip(), mode='eval')
+        except SyntaxError as e:
+            raise ValueError(f"Invalid rule expression: {e.msg}")
+        return self._node(tree.body)
+
+    def _register(self, key: str, compute: Callable[[_Context], _Value]) -> Node:
+        self.references[key] = self.references.get(key, 0) + 1
+        return key, lambda context: context.value(key, compute)
+
+    def _column(self, name: str) -> Node:
+        if name not in self.columns:
+            self.columns.append(name)
+        # ستون‌ها همیشه مشترک‌اند تا هر ستون یک بار خوانده شود
+        self.references[f'col:{name}'] = 2
+        return f'col:{name}', lambda context: context.value(f'col:{name}', lambda ctx: ctx.column(name))
+
+    @staticmethod
+    def _constant(node: ast.AST) -> Any:
+        if isinstance(node, ast.Constant) and isinstance(node.value, (str, int, float, bool, type(None))):
+            return node.value
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub) and isinstance(node.operand, ast.Constant) \
+                and isinstance(node.operand.value, (int, float)):
+            return -node.operand.value
+        raise ValueError(f"Expected a constant, got {type(node).__name__}")
+
+    def _node(self, node: ast.AST) -> Node:
+        if isinstance(node, ast.Constant):
+            value = self._constant(node)
+            return self._register(repr(value), lambda context: _Value(value, value is None))
+
+        if isinstance(node, ast.Name):
+            return self._column(node.id)
+
+        if isinstance(node, ast.BoolOp):
+            combine = _and if isinstance(node.op, ast.And) else _or
+            children = [self._node(child) for child in node.values]
+            key = f"({(' and ' if combine is _and else ' or ').join(child[0] for child in children)})"
+
+            def compute(context: _Context) -> _Value:
+                result = children[0][1](context)
+                for _, child in children[1:]:
+                    result = combine(result, child(context))
+                return result
+            return self._register(key, compute)
+
+        if isinstance(node, ast.UnaryOp):
+            operand = self._node(node.operand)
+            if isinstance(node.op, ast.Not):
+                return self._register(f'(not {operand[0]})', lambda context: self._not(operand[1](context)))
+            if isinstance(node.op, ast.USub):
+                return self._register(f'(-{operand[0]})', lambda context: _arithmetic(
+                    operator.mul, operand[1](context), _Value(-1)))
+            if isinstance(node.op, ast.UAdd):
+                return operand
+            raise ValueError(f"Unsupported operator: {type(node.op).__name__}")
+
+        if isinstance(node, ast.BinOp):
+            if type(node.op) not in ARITHMETIC:
+                raise ValueError(f"Unsupported operator: {type(node.op).__name__}")
+            op = ARITHMETIC[type(node.op)]
+            left, right = self._node(node.left), self._node(node.right)
+            return self._register(f'({left[0]} {type(node.op).__name__} {right[0]})', lambda context: _arithmetic(
+                op, left[1](context), right[1](context)))
+
+        if isinstance(node, ast.Compare):
+            return self._compare(node)
+
+        if isinstance(node, ast.Call):
+            return self._call(node)
+
+        raise ValueError(f"Unsupported syntax in rule: {type(node).__name__}")
+
+    @staticmethod
+    def _not(value: _Value) -> _Value:
+        if _no_null(value):
+            return _Value(~np.asarray(_dense(value.data), dtype=bool))
+        true, false = _boolean(value)
+        return _Value(false, ~(true | false))
+
+    def _compare(self, node: ast.Compare) -> Node:
+        """مقایسه زنجیره‌ای (a < b < c) به صورت and مقایسه‌های دوتایی"""
+        operands = [node.left] + list(node.comparators)
+        parts = []
+
+        for op, left_node, right_node in zip(node.ops, operands[:-1], operands[1:]):
+            left = self._node(left_node)
+            if isinstance(op, (ast.In, ast.NotIn)):
+                if not isinstance(right_node, (ast.List, ast.Tuple, ast.Set)):
+                    raise ValueError("Membership tests require a list of constants")
+                options = [self._constant(element) for element in right_node.elts]
+                negate = isinstance(op, ast.NotIn)
+                parts.append(self._register(
+                    f"({left[0]} {'not in' if negate else 'in'} {options!r})",
+                    lambda context, left=left, options=options, negate=negate: _isin(left[1](context), options, negate)))
+                continue
+
+            if type(op) not in COMPARISONS:
+                raise ValueError(f"Unsupported comparison: {type(op).__name__}")
+            compare = COMPARISONS[type(op)]
+            right = self._node(right_node)
+            parts.append(self._register(
+                f'({left[0]} {type(op).__name__} {right[0]})',
+                lambda context, left=left, right=right, compare=compare: _compare(
+                    compare, left[1](context), right[1](context))))
+
+        if len(parts) == 1:
+            return parts[0]
+
+        def compute(context: _Context) -> _Value:
+            result = parts[0][1](context)
+            for _, part in parts[1:]:
+                result = _and(result, part(context))
+            return result
+        return self._register(f"({' and '.join(part[0] for part in parts)})", compute)
+
+    def _call(self, node: ast.Call) -> Node:
+        if not isinstance(node.func, ast.Name) or node.keywords:
+            raise ValueError("Only calls to allowed functions with positional arguments are supported")
+
+        name = node.func.id
+        if name == 'col':
+            if len(node.args) != 1 or not isinstance(self._constant(node.args[0]), str):
+                raise ValueError("col() takes one column name")
+            return self._column(node.args[0].value)
+
+        if name not in FUNCTIONS:
+            raise ValueError(f"Unknown function: {name}")
+
+        arity, constant, function = FUNCTIONS[name]
+        if len(node.args) != arity + int(constant):
+            raise ValueError(f"{name}() takes {arity + int(constant)} argument(s)")
+
+        argument = self._node(node.args[0])
+        if constant:
+            option = self._constant(node.args[1])
+            return self._register(f'{name}({argument[0]}, {option!r})', lambda context: function(
+                argument[1](context), option))
+        return self._register(f'{name}({argument[0]})', lambda context: function(argument[1](context)))
+
+class RuleEngine:
+    """کامپایل و cache مجموعه قوانین و ارزیابی برداری آن‌ها
+
+    هر قانون {'name', 'expression'} است؛ قوانین قدیمی {'column', 'condition': 'not_null' | 'unique', 'min', 'max'}
+    به عبارت معادل ترجمه می‌شوند. مجموعه قوانین یک بار کامپایل و با کلید عبارت‌هایش cache می‌شود.
+    ارزیابی هر ستون ارجاع شده را یک بار می‌خواند و زیرعبارت‌های مشترک بین قوانین را یک بار حساب می‌کند.
+    """
+
+    def __init__(self, cache_size: int = 128):
+        self.cache_size = cache_size
+        self._compiled: Dict[Tuple[Tuple[str, str], ...], RuleSet] = {}
+
+    @staticmethod
+    def expression(rule: Union[Dict[str, Any], str]) -> str:
+        """عبارت یک قانون (با ترجمه قوانین قدیمی)"""
+        if isinstance(rule, str):
+            return rule
+        if rule.get('expression'):
+            return rule['expression']
+
+        column = f"col({rule.get('column')!r})"
+        if rule.get('condition') == 'not_null':
+            return f'notnull({column})'
+        if rule.get('condition') == 'unique':
+            return f'is_unique({column})'
+
+        bounds = [f'{column} >= {rule["min"]!r}'] if 'min' in rule else []
+        bounds += [f'{column} <= {rule["max"]!r}'] if 'max' in rule else []
+        if bounds:
+            return ' and '.join(bounds)
+        if isinstance(rule.get('condition'), str) and rule['condition']:
+            return rule['condition']
+        raise ValueError(f"Rule has no expression: {rule}")
+
+    def _normalize(self, rule: Union[Dict[str, Any], str]) -> Dict[str, Any]:
+        name = rule if isinstance(rule, str) else rule.get('name', 'unnamed_rule')
+        try:
+            return {'name': name, 'expression': self.expression(rule)}
+        except ValueError as e:
+            return {'name': name, 'expression': None, 'error': str(e)}
+
+    def compile(self, rules: Sequence[Union[Dict[str, Any], str]]) -> RuleSet:
+        """کامپایل (یا برداشتن از cache) یک مجموعه قانون
+
+        قانون نامعتبر بقیه را متوقف نمی‌کند و خطایش در نتیجه evaluate گزارش می‌شود.
+        """
+        normalized = [self._normalize(rule) for rule in rules]
+        key = tuple((rule['name'], rule['expression'] or rule['error']) for rule in normalized)
+        if key in self._compiled:
+            return self._compiled[key]
+
+        compiler = RuleCompiler()
+        roots, columns = [], []
+        for rule in normalized:
+            compiler.columns = []
+            try:
+                if rule['expression'] is None:
+                    raise ValueError(rule['error'])
+                roots.append(compiler.compile(rule['expression']))
+            except ValueError as e:
+                roots.append(('error', _failing(str(e))))
+            columns.append(list(compiler.columns))
+
+        shared = {key for key, count in compiler.references.items() if count > 1}
+        rule_set = RuleSet(normalized, roots, columns, shared)
+
+        if len(self._compiled) >= self.cache_size:
+            self._compiled.pop(next(iter(self._compiled)))
+        self._compiled[key] = rule_set
+        log.debug(f"Compiled {len(normalized)} rules ({len(shared)} shared subexpressions)")
+        return rule_set
+
+    def evaluate(self, df: pd.DataFrame, rules: Sequence[Union[Dict[str, Any], str]]) -> Iterator[Dict[str, Any]]:
+        return self.compile(rules).evaluate(df)
+
+rule_engine = RuleEngine()
@@ -0,0 +1,166 @@
+# Location: datanex/core/seasonality.py
+
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Tuple
+from utils.logger import log
+
+class SeasonalityDetector:
+    """تشخیص دوره‌های تناوب (روزانه، هفتگی، ...) با FFT
+
+    مقادیر هر ستون روی یک شبکه زمانی منظم (گام = میانه فاصله زمان‌ها،
+    حداکثر max_points نقطه) میانگین‌گیری و خانه‌های خالی درون‌یابی می‌شوند.
+    پس از حذف روند خطی، rfft همه ستون‌ها با یک تبدیل دسته‌ای (axis=0)
+    محاسبه می‌شود. فرکانس غالب با مجموع وزن‌دار هارمونیک‌ها انتخاب می‌شود
+    (تا فرکانس پایه یک قطار ضربه بر هارمونیک‌هایش ترجیح داده شود) و با
+    درون‌یابی بین خانه‌های FFT دقیق‌تر می‌شود. قدرت هر دوره سهم توان آن
+    فرکانس و max_harmonics هارمونیک‌اش (با یک خانه همسایه برای نشت طیفی)
+    از کل توان است؛ طبق Parseval این همان نسبت واریانس توضیح داده شده است
+    و residual_variance باقی‌مانده آن.
+    """
+
+    def __init__(self, min_strength: float = 0.2, top_k: int = 2, max_harmonics: int = 10,
+                 max_points: int = 65536, min_cycles: int = 2, block_size: int = 256):
+        self.min_strength = min_strength
+        self.top_k = top_k
+        self.max_harmonics = max_harmonics
+        self.max_points = max_points
+        self.min_cycles = min_cycles
+        self.block_size = block_size
+
+    def _grid(self, moments: np.ndarray):
+        """گام شبکه (نانوثانیه) و شماره خانه هر زمان"""
+        unique = np.unique(moments)
+        if len(unique) < 4:
+            return None, None
+
+        step = float(np.median(np.diff(unique)))
+        span = float(unique[-1] - unique[0])
+        step = max(step, span / (self.max_points - 1))
+        return step, np.floor((moments - unique[0]) / step).astype(np.int64)
+
+    @staticmethod
+    def _resample(bins: np.ndarray, y: np.ndarray, size: int) -> np.ndarray:
+        """میانگین هر خانه شبکه و درون‌یابی خطی خانه‌های خالی"""
+        order = np.argsort(bins, kind='stable')
+        bins, y = bins[order], y[order]
+        mask = ~np.isnan(y)
+
+        starts = np.flatnonzero(np.r_[True, bins[1:] != bins[:-1]])
+        sums = np.add.reduceat(np.where(mask, y, 0.0), starts, axis=0)
+        counts = np.add.reduceat(mask.astype(np.float64), starts, axis=0)
+
+        grid = np.full((size, y.shape[1]), np.nan)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            grid[bins[starts]] = sums / counts
+
+        positions = np.arange(size)
+        for j in range(grid.shape[1]):
+            present = ~np.isnan(grid[:, j])
+            if present.sum() >= 2 and not present.all():
+                grid[:, j] = np.interp(positions, positions[present], grid[present, j])
+        return grid
+
+    @staticmethod
+    def _detrend(grid: np.ndarray) -> np.ndarray:
+        """حذف روند خطی همه ستون‌ها با فرم بسته"""
+        x = np.arange(len(grid), dtype=np.float64)
+        x -= x.mean()
+        centered = grid - grid.mean(axis=0)
+        slope = (x @ centered) / (x @ x)
+        return centered - np.outer(x, slope)
+
+    def _harmonic_sum(self, available: np.ndarray) -> np.ndarray:
+        """مجموع وزن‌دار (1/h) توان هارمونیک‌های هر فرکانس؛ فرکانس پایه بر هارمونیک‌هایش ترجیح داده می‌شود"""
+        scores = available.copy()
+        for h in range(2, self.max_harmonics + 1):
+            count = (len(available) - 1) // h + 1
+            scores[:count] += available[::h][:count] / h
+        return scores
+
+    @staticmethod
+    def _refine(power: np.ndarray, k: np.ndarray) -> np.ndarray:
+        """فرکانس دقیق‌تر از نسبت دامنه قله به همسایه بزرگ‌ترش (روش Jain)"""
+        columns = np.arange(power.shape[1])
+        low = np.sqrt(power[np.maximum(k - 1, 0), columns])
+        mid = np.sqrt(power[k, columns])
+        high = np.sqrt(power[np.minimum(k + 1, len(power) - 1), columns])
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            ratio = np.maximum(low, high) / mid
+            delta = np.where(high > low, 1, -1) * ratio / (1 + ratio)
+        delta = np.where(np.isfinite(delta) & (k > 0) & (k < len(power) - 1), delta, 0.0)
+        return k + delta
+
+    def _peaks(self, power: np.ndarray) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """top_k فرکانس غالب هر ستون و قدرتشان (دسته‌ای روی ستون‌ها)"""
+        total = power[1:].sum(axis=0)
+        available = power.copy()
+        available[:self.min_cycles] = 0
+        columns = np.arange(power.shape[1])
+        harmonics = np.arange(1, self.max_harmonics + 1)
+        peaks = []
+
+        for _ in range(self.top_k):
+            k = self._harmonic_sum(available).argmax(axis=0)
+            frequency = self._refine(available, k)
+
+            # هارمونیک‌ها با یک خانه همسایه؛ برای دور بعد کنار گذاشته می‌شوند
+            centers = harmonics[:, None] * k[None, :]
+            near = np.concatenate([centers - 1, centers, centers + 1])
+            inside = (near > 0) & (near < len(power)) & (k[None, :] > 0)
+            selected = np.zeros(power.shape, dtype=bool)
+            selected[near[inside], np.broadcast_to(columns, near.shape)[inside]] = True
+
+            explained = np.where(selected, available, 0).sum(axis=0)
+            available[selected] = 0
+            with np.errstate(invalid='ignore', divide='ignore'):
+                peaks.append((frequency, np.where(total > 0, explained / total, 0.0)))
+        return peaks
+
+    def detect(self, timestamps: pd.Series, values: pd.DataFrame) -> List[Dict]:
+        """دوره‌های تناوب هر ستون values روی timestamps
+
+        خروجی: لیست {'column', 'period', 'period_seconds', 'strength', 'residual_variance'}
+        """
+        valid = timestamps.notna().to_numpy()
+        moments = pd.to_datetime(timestamps[valid]).to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        step, bins = self._grid(moments)
+        if step is None:
+            return []
+
+        size = int(bins.max()) + 1
+        positions = np.flatnonzero(valid)
+        columns = list(values.columns)
+        block_size = max(1, min(self.block_size, (2 ** 24) // size))
+        results = []
+
+        for start in range(0, len(columns), block_size):
+            block = columns[start:start + block_size]
+            y = values[block].to_numpy(dtype=np.float64, na_value=np.nan)[positions]
+            grid = self._resample(bins, y, size)
+
+            usable = ~np.isnan(grid).any(axis=0)
+            if not usable.any():
+                continue
+
+            detrended = self._detrend(grid[:, usable])
+            variance = detrended.var(axis=0)
+            power = np.abs(np.fft.rfft(detrended, axis=0)) ** 2
+
+            for k, strength in self._peaks(power):
+                for j, column in enumerate(np.array(block, dtype=object)[usable]):
+                    if k[j] == 0 or strength[j] < self.min_strength:
+                        continue
+
+                    period_seconds = size * step / k[j] / 1e9
+                    results.append({
+                        'column': column,
+                        'period': str(pd.Timedelta(seconds=round(period_seconds))),
+                        'period_seconds': float(period_seconds),
+                        'strength': float(strength[j]),
+                        'residual_variance': float(variance[j] * (1 - strength[j]))
+                    })
+
+        log.debug(f"Seasonality: {len(results)} periods over {len(columns)} columns ({size} grid points)")
+        return results
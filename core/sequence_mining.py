@@ -0,0 +1,39 @@
+# Location: datanex/core/sequence_mining.py
+
+import pandas as pd
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import List, Tuple
+
+def frequent_ngrams(series: pd.Series, n: int = 3, top_k: int = 5, min_count: int = 2) -> List[Tuple[list, int]]:
+    """پرتکرارترین n-gram های متوالی یک ستون به صورت برداری
+
+    مقادیر به کد عددی تبدیل و کلید هر n-gram به صورت حسابی (مبنای تعداد
+    مقادیر یکتا) از پنجره‌های strided ساخته می‌شود. اگر کلید در 64 بیت جا
+    نشود، پنجره‌ها مستقیماً با np.unique شمرده می‌شوند. در تساوی تعداد،
+    n-gram ای که زودتر ظاهر شده اول می‌آید.
+    """
+    codes, uniques = pd.factorize(series.dropna())
+    if len(codes) < n:
+        return []
+
+    windows = sliding_window_view(codes.astype(np.int64), n)
+    cardinality = max(len(uniques), 1)
+
+    if n * np.log2(cardinality) < 62:
+        keys = np.zeros(len(windows), dtype=np.int64)
+        for k in range(n):
+            keys = keys * cardinality + windows[:, k]
+        _, first_index, counts = np.unique(keys, return_index=True, return_counts=True)
+    else:
+        _, first_index, counts = np.unique(windows, axis=0, return_index=True, return_counts=True)
+
+    frequent = np.flatnonzero(counts >= min_count)
+    order = np.lexsort((first_index[frequent], -counts[frequent]))[:top_k]
+    selected = frequent[order]
+
+    values = np.asarray(uniques, dtype=object)
+    return [
+        (values[windows[first_index[i]]].tolist(), int(counts[i]))
+        for i in selected
+    ]
@@ -0,0 +1,126 @@
+# Location: datanex/core/trends.py
+
+import pandas as pd
+import numpy as np
+from scipy import stats
+from typing import Dict, Optional
+from utils.logger import log
+
+NANOSECONDS_PER_DAY = 86400 * 10 ** 9
+
+def _regression(n: np.ndarray, sx: np.ndarray, sy: np.ndarray, sxx: np.ndarray, syy: np.ndarray,
+                sxy: np.ndarray) -> Dict[str, np.ndarray]:
+    """شیب، r و p-value رگرسیون خطی از مجموع‌ها (همه آرایه‌ها هم‌شکل)"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        var_x = sxx - sx ** 2 / n
+        var_y = syy - sy ** 2 / n
+        cov = sxy - sx * sy / n
+
+        slope = cov / var_x
+        r = np.clip(cov / np.sqrt(var_x * var_y), -1, 1)
+        dof = n - 2
+        t = r * np.sqrt(dof / np.maximum(1 - r ** 2, 1e-300))
+        p = 2 * stats.t.sf(np.abs(t), np.maximum(dof, 1))
+
+    invalid = (n < 3) | ~(var_x > 0) | ~(var_y > 0)
+    return {
+        'n': n,
+        'slope': np.where(invalid, np.nan, slope),
+        'r': np.where(invalid, np.nan, r),
+        'p_value': np.where(invalid, np.nan, p)
+    }
+
+class TrendEngine:
+    """رگرسیون خطی همه ستون‌های عددی روی یک ستون زمانی با فرم بسته
+
+    به جای linregress جداگانه برای هر ستون، مجموع‌های لازم (Σx، Σy، Σx²، Σy²،
+    Σxy) برای همه ستون‌ها با چند عملیات ماتریسی روی ماسک مقادیر غیر null
+    حساب می‌شوند. متغیر مستقل زمان واقعی (به روز) است، نه شماره ردیف؛ پس
+    شیب «تغییر در روز» است. در حالت پنجره‌ای (window مثل '7D' یا 'M') همین
+    مجموع‌ها برای هر پنجره زمانی با np.add.reduceat روی داده مرتب گرفته
+    می‌شوند.
+    """
+
+    def __init__(self, window: Optional[str] = None, block_size: int = 256, max_cells: int = 2 ** 24):
+        self.window = window
+        self.block_size = block_size
+        self.max_cells = max_cells
+
+    def _sums(self, x: np.ndarray, y: np.ndarray, starts: np.ndarray):
+        """مجموع‌های رگرسیون برای هر بخش [starts[k], starts[k+1]) و هر ستون"""
+        mask = ~np.isnan(y)
+        y0 = np.where(mask, y, 0.0)
+
+        if len(starts) == 1:
+            # یک پنجره: ضرب‌های ماتریس-بردار بدون ماتریس‌های میانی
+            weights = mask.astype(np.float64)
+            return tuple(value[None, :] for value in (
+                weights.sum(axis=0), x @ weights, y0.sum(axis=0),
+                (x * x) @ weights, np.einsum('ij,ij->j', y0, y0), x @ y0
+            ))
+
+        xm = mask * x[:, None]
+
+        def segment(values: np.ndarray) -> np.ndarray:
+            return np.add.reduceat(values, starts, axis=0)
+
+        return (
+            segment(mask.astype(np.float64)), segment(xm), segment(y0),
+            segment(xm * x[:, None]), segment(y0 * y0), segment(xm * y0)
+        )
+
+    def fit(self, timestamps: pd.Series, values: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """رگرسیون ستون‌های values روی timestamps
+
+        خروجی: آرایه‌های n، slope، r و p_value به شکل (پنجره‌ها × ستون‌ها)؛
+        بدون window یک پنجره است. 'window_start' شروع هر پنجره را دارد.
+        """
+        valid = timestamps.notna().to_numpy()
+        positions = np.flatnonzero(valid)
+        moments = pd.to_datetime(timestamps[valid]).to_numpy(dtype='datetime64[ns]')
+
+        # رگرسیون کلی به ترتیب ردیف‌ها بستگی ندارد؛ مرتب‌سازی فقط برای پنجره‌ها لازم است
+        if self.window:
+            order = np.argsort(moments, kind='stable')
+            moments, positions = moments[order], positions[order]
+        x = moments.astype(np.int64).astype(np.float64) / NANOSECONDS_PER_DAY
+
+        if self.window and len(x):
+            periods = pd.Series(moments).dt.to_period(self.window)
+            codes = periods.to_numpy()
+            is_start = np.ones(len(x), dtype=bool)
+            is_start[1:] = codes[1:] != codes[:-1]
+            starts = np.flatnonzero(is_start)
+            window_start = periods.iloc[starts].dt.start_time.to_numpy()
+        else:
+            starts = np.zeros(1, dtype=np.int64)
+            window_start = moments.min(keepdims=True) if len(moments) else moments
+
+        # مرکزی کردن زمان برای پایداری عددی مجموع‌ها
+        x = x - (x.mean() if len(x) else 0.0)
+
+        columns = list(values.columns)
+        results = {key: np.full((len(starts), len(columns)), np.nan) for key in ('n', 'slope', 'r', 'p_value')}
+        if len(x) == 0:
+            results['window_start'] = window_start[:0]
+            return results
+
+        all_rows = len(positions) == len(values)
+        # تعداد ستون هر بلوک طوری که ماتریس بلوک حدود max_cells خانه باشد
+        block_size = max(1, min(self.block_size, self.max_cells // len(x)))
+        for start in range(0, len(columns), block_size):
+            block = columns[start:start + block_size]
+            y = values[block].to_numpy(dtype=np.float64, na_value=np.nan)
+            if self.window or not all_rows:
+                y = y[positions]
+            # مرکزی کردن y هم خطای گرد کردن Σy² - (Σy)²/n را کم می‌کند
+            counts = np.maximum((~np.isnan(y)).sum(axis=0), 1)
+            y = y - np.nansum(y, axis=0) / counts
+
+            fitted = _regression(*self._sums(x, y, starts))
+            for key in results:
+                results[key][:, start:start + len(block)] = fitted[key]
+
+        results['window_start'] = window_start
+        log.debug(f"Trend engine: {len(columns)} columns over {len(starts)} windows")
+        return results
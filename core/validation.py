@@ -0,0 +1,239 @@
+# Location: datanex/core/validation.py
+
+import os
+import pandas as pd
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Optional, Tuple
+from core.anomaly import anomaly_engine
+from core.pattern_matcher import pattern_matcher
+from utils.logger import log
+
+# نتیجه یک بررسی روی یک ستون: (ماسک ردیف‌های نقض کننده، جزئیات گزارش) یا None
+Finding = Optional[Tuple[np.ndarray, Dict[str, Any]]]
+
+class ValidationEngine:
+    """بررسی‌های اعتبارسنجی همه ستون‌ها در یک گذر روی هر ستون
+
+    برای هر ستون یک بار آرایه NumPy (ستون‌های عددی) یا کدهای factorize
+    (ستون‌های متنی) ساخته و همه بررسی‌ها (null، outlier، نوع داده، محدوده،
+    الگو) به صورت ماسک بولی روی همان آرایه حساب می‌شوند. تبدیل عددی و تطبیق
+    regex فقط روی مقادیر یکتا اجرا و با کدها به ردیف‌ها پخش می‌شود. هیچ ردیفی
+    از DataFrame کپی نمی‌شود و فقط موقعیت‌ها و نمونه‌های محدود از مقادیر خراب
+    برداشته می‌شوند. ستون‌ها در یک
+    ThreadPoolExecutor موازی بررسی می‌شوند (عملیات NumPy قفل GIL را آزاد
+    می‌کنند). مرزهای IQR از anomaly_engine.profile می‌آیند.
+
+    علاوه بر گزارش ستونی، هر بررسی ماسک ردیف‌های خرابش را در یک bitmap ردیفی
+    (uint8، یک بیت برای هر خانواده بررسی در BITS، OR روی همه ستون‌ها) می‌نویسد
+    تا شمارش و حذف ردیف‌های خراب دقیق و O(n) باشد.
+
+    بررسی الگو با کرنل regex برداری Arrow (pattern_matcher) روی مقادیر یکتا
+    اجرا می‌شود؛ مقادیر یکتای ستون‌های string[pyarrow] بدون تبدیل به str
+    استفاده می‌شوند. با pattern_sample_size ابتدا فقط مقادیر یکتای یک نمونه
+    تصادفی از ردیف‌ها بررسی می‌شوند و اگر همه معتبر بودند ستون بدون بررسی
+    کامل معتبر فرض می‌شود (تقریبی)؛ در غیر این صورت همه مقادیر یکتا برای
+    شمارش دقیق بررسی می‌شوند.
+    """
+
+    CHECKS = ['null_values', 'outliers', 'data_types', 'ranges', 'patterns']
+
+    # بیت هر خانواده بررسی در bitmap ردیفی
+    BITS = {check: 1 << bit for bit, check in enumerate(CHECKS + ['custom_rules'])}
+
+    # خانواده‌هایی که خطای داده‌اند؛ outlier آماری به تنهایی ردیف را خراب نمی‌کند
+    ERROR_CHECKS = ['null_values', 'data_types', 'ranges', 'patterns', 'custom_rules']
+
+    # الگوهای معتبر
+    PATTERNS = {
+        'email': r'^[\w\.-]+@[\w\.-]+\.\w+$',
+        'phone': r'^\+?1?\d{9,15}$',
+        'url': r'^https?://[\w\.-]+\.\w+',
+        'ipv4': r'^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$',
+        'credit_card': r'^\d{13,19}$',
+        'postal_code': r'^\d{5}(-\d{4})?$',
+        'uuid': r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$'
+    }
+
+    # قوانین محدوده برای فیلدهای شناخته شده
+    RANGE_RULES = {
+        'age': (0, 120),
+        'percentage': (0, 100),
+        'rating': (0, 5),
+        'score': (0, 100),
+        'temperature': (-100, 100),
+        'humidity': (0, 100)
+    }
+
+    # ستون‌هایی که نباید مقدار منفی داشته باشند
+    NON_NEGATIVE = ['count', 'quantity', 'age']
+
+    def __init__(self, max_workers: Optional[int] = None, max_indices: int = 100, max_values: int = 50,
+                 max_samples: int = 10, pattern_sample_size: Optional[int] = None, random_state: int = 42):
+        self.max_workers = max_workers or min(32, os.cpu_count() or 1)
+        self.max_indices = max_indices
+        self.max_values = max_values
+        self.max_samples = max_samples
+        self.pattern_sample_size = pattern_sample_size
+        self.random_state = random_state
+
+    def _null_check(self, index: pd.Index, missing: np.ndarray, count: int) -> Finding:
+        if count == 0:
+            return None
+        return missing, {
+            'count': count,
+            'percentage': float(count / len(missing) * 100),
+            'indices': index[np.flatnonzero(missing)[:self.max_indices]].tolist()
+        }
+
+    def _outlier_check(self, series: pd.Series, values: np.ndarray,
+                       stats: Optional[Dict[str, Any]]) -> Finding:
+        if stats is None or stats['count'] < 4 or stats['iqr_outliers'] == 0:
+            return None
+
+        outliers = (values < stats['lower_bound']) | (values > stats['upper_bound'])
+        return outliers, {
+            'count': stats['iqr_outliers'],
+            'percentage': float(stats['iqr_outliers'] / len(values) * 100),
+            'lower_bound': stats['lower_bound'],
+            'upper_bound': stats['upper_bound'],
+            'outlier_values': series.iloc[np.flatnonzero(outliers)[:self.max_values]].tolist()
+        }
+
+    def _type_check(self, name: str, series: pd.Series, values: Optional[np.ndarray],
+                    codes: Optional[np.ndarray], uniques: Optional[np.ndarray]) -> Finding:
+        if series.dtype == 'object':
+            # مقادیر غیر null که به عدد تبدیل نمی‌شوند (تبدیل فقط روی مقادیر یکتا)
+            non_numeric_unique = pd.to_numeric(pd.Series(uniques, dtype=object), errors='coerce').isna().to_numpy()
+            present = codes >= 0
+            non_numeric = non_numeric_unique[codes] & present
+            non_numeric_count = int(non_numeric.sum())
+
+            # ستون عمدتاً عددی (نسبت به مقادیر غیر null) با چند مقدار متنی
+            if 0 < non_numeric_count < present.sum() * 0.9:
+                return non_numeric, {
+                    'issue': 'mixed_numeric_text',
+                    'non_numeric_count': non_numeric_count,
+                    'sample_values': uniques[non_numeric_unique][:self.max_samples].tolist()
+                }
+
+        if values is not None and any(hint in name for hint in self.NON_NEGATIVE):
+            negative = values < 0
+            negative_count = int(negative.sum())
+            if negative_count > 0:
+                return negative, {'issue': 'unexpected_negative_values', 'negative_count': negative_count}
+        return None
+
+    def _range_check(self, name: str, values: Optional[np.ndarray]) -> Finding:
+        if values is None:
+            return None
+
+        issue, violations = None, None
+        for field_name, (min_val, max_val) in self.RANGE_RULES.items():
+            if field_name not in name:
+                continue
+
+            mask = (values < min_val) | (values > max_val)
+            out_of_range = int(mask.sum())
+            if out_of_range > 0:
+                violations = mask if violations is None else violations | mask
+                issue = {
+                    'expected_range': [min_val, max_val],
+                    'out_of_range_count': out_of_range,
+                    'min_found': float(np.nanmin(values)),
+                    'max_found': float(np.nanmax(values))
+                }
+        return None if issue is None else (violations, issue)
+
+    def _sample_valid(self, pattern: str, codes: np.ndarray, uniques: pd.Index) -> bool:
+        """آیا همه مقادیر یکتای یک نمونه تصادفی از ردیف‌ها با الگو تطبیق دارند"""
+        rng = np.random.default_rng(self.random_state)
+        sampled = np.unique(codes[rng.choice(len(codes), size=self.pattern_sample_size, replace=False)])
+        sampled = sampled[sampled >= 0]
+        return len(sampled) > 0 and bool(pattern_matcher.match(uniques.take(sampled), pattern).all())
+
+    def _pattern_check(self, field_type: str, codes: np.ndarray, uniques: pd.Index) -> Finding:
+        present = codes >= 0
+        present_count = int(present.sum())
+        if present_count == 0:
+            return None
+
+        pattern = self.PATTERNS[field_type]
+        if self.pattern_sample_size and len(codes) > self.pattern_sample_size \
+                and self._sample_valid(pattern, codes, uniques):
+            return None
+
+        # تطبیق الگو فقط روی مقادیر یکتا و پخش نتیجه با کدها
+        invalid_unique = ~pattern_matcher.match(uniques, pattern)
+        invalid = invalid_unique[codes] & present
+        invalid_count = int(invalid.sum())
+        if invalid_count == 0:
+            return None
+
+        return invalid, {
+            'expected_pattern': field_type,
+            'invalid_count': invalid_count,
+            'invalid_percentage': float(invalid_count / present_count * 100),
+            'sample_invalid': [str(value) for value in uniques.take(codes[np.flatnonzero(invalid)[:self.max_samples]])]
+        }
+
+    def _scan_column(self, column: Any, series: pd.Series, stats: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """همه بررسی‌های یک ستون روی یک آرایه (کدهای factorize برای ستون‌های متنی)"""
+        name = str(column).lower()
+        field_type = next((field_type for field_type in self.PATTERNS if field_type in name), None)
+        values, codes, uniques, distinct = None, None, None, None
+
+        if pd.api.types.is_numeric_dtype(series):
+            values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        if series.dtype == 'object' or field_type is not None:
+            codes, distinct = pd.factorize(series)
+            if series.dtype == 'object':
+                uniques = np.asarray(distinct, dtype=object)
+            missing = codes < 0
+        else:
+            missing = series.isna().to_numpy()
+
+        return {
+            'null_values': self._null_check(series.index, missing, int(missing.sum())),
+            'outliers': self._outlier_check(series, values, stats) if values is not None else None,
+            'data_types': self._type_check(name, series, values, codes, uniques),
+            'ranges': self._range_check(name, values),
+            'patterns': self._pattern_check(field_type, codes, distinct) if field_type is not None else None
+        }
+
+    def scan(self, df: pd.DataFrame) -> Tuple[Dict[str, Dict[str, Any]], np.ndarray]:
+        """گزارش {بررسی: {ستون: جزئیات}} برای ستون‌های دارای مشکل و bitmap ردیفی (uint8)"""
+        profile = anomaly_engine.profile(df)
+        columns = list(df.columns)
+        issues = {check: {} for check in self.CHECKS}
+        flags = np.zeros(len(df), dtype=np.uint8)
+
+        def scan_column(position: int) -> Dict[str, Any]:
+            column = columns[position]
+            return self._scan_column(column, df.iloc[:, position], profile.get(column))
+
+        # ماسک‌های هر ستون به ترتیب ستون‌ها در bitmap ادغام و سپس آزاد می‌شوند
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for column, result in zip(columns, executor.map(scan_column, range(len(columns)))):
+                for check, found in result.items():
+                    if found is not None:
+                        mask, issues[check][column] = found
+                        np.bitwise_or(flags, self.BITS[check], out=flags, where=mask)
+
+        log.debug(f"Validation scan: {len(columns)} columns, {len(df)} rows")
+        return issues, flags
+
+    @classmethod
+    def invalid_mask(cls, flags: np.ndarray, checks: Optional[Iterable[str]] = None) -> np.ndarray:
+        """ماسک ردیف‌هایی که حداقل یکی از بررسی‌های checks (پیش‌فرض همه) را نقض می‌کنند"""
+        bits = sum(cls.BITS[check] for check in (cls.BITS if checks is None else checks))
+        return (flags & bits) != 0
+
+    @classmethod
+    def violation_counts(cls, flags: np.ndarray) -> Dict[str, int]:
+        """تعداد ردیف‌های نقض کننده هر خانواده بررسی"""
+        counts = np.bincount(flags, minlength=256)
+        values = np.arange(256)
+        return {check: int(counts[(values & bit) != 0].sum()) for check, bit in cls.BITS.items()}
+
+validation_engine = ValidationEngine()
@@ -0,0 +1,89 @@
+# Location: datanex/services/artifact_cache.py
+
+from pathlib import Path
+from typing import Optional
+from utils.config import get_settings
+from utils.logger import log
+import asyncio
+import hashlib
+import os
+import uuid
+
+settings = get_settings()
+
+class ArtifactCache:
+    """کش محلی artifact های نتیجه task (مثل Parquet گروه‌های تکراری)
+
+    artifact ها در storage با نام یکتا ذخیره و هرگز بازنویسی نمی‌شوند، پس هر
+    کدام فقط یک بار دانلود و درخواست‌های بعدی (مثلاً صفحه‌های بعدی) از فایل
+    محلی خوانده می‌شوند. وقتی حجم کل از سقف بیشتر شود فایل‌هایی که دیرتر
+    استفاده شده‌اند حذف می‌شوند.
+    """
+
+    SUFFIX = '.artifact'
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None, storage=None):
+        self.cache_dir = Path(cache_dir or settings.ARTIFACT_CACHE_DIR)
+        self.max_bytes = max_bytes or settings.ARTIFACT_CACHE_MAX_BYTES
+        self._storage = storage
+        self._downloads = {}
+
+    @property
+    def storage(self):
+        if self._storage is None:
+            from services.storage import storage_service
+            self._storage = storage_service
+        return self._storage
+
+    def _path(self, object_name: str) -> Path:
+        digest = hashlib.blake2b(object_name.encode('utf-8'), digest_size=16).hexdigest()
+        return self.cache_dir / f"{digest}{self.SUFFIX}"
+
+    async def get(self, object_name: str) -> Path:
+        """مسیر محلی artifact؛ در اولین درخواست دانلود می‌شود"""
+        path = self._path(object_name)
+        if path.exists():
+            os.utime(path)
+            return path
+
+        # درخواست‌های هم‌زمان برای یک artifact منتظر همان یک دانلود می‌مانند
+        download = self._downloads.get(path)
+        if download is None:
+            download = asyncio.ensure_future(self._download(object_name, path))
+            self._downloads[path] = download
+            download.add_done_callback(lambda _: self._downloads.pop(path, None))
+        return await asyncio.shield(download)
+
+    async def _download(self, object_name: str, path: Path) -> Path:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+        try:
+            await self.storage.download_to_path(object_name, str(tmp_path))
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+        log.debug(f"Cached artifact {object_name} ({path.stat().st_size} bytes)")
+        self._evict(keep=path)
+        return path
+
+    def _evict(self, keep: Path):
+        """حذف فایل‌های کمتر استفاده شده تا حجم کل زیر سقف برود"""
+        entries = []
+        for path in self.cache_dir.glob(f"*{self.SUFFIX}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
+
+artifact_cache = ArtifactCache()
@@ -0,0 +1,273 @@
+# Location: datanex/services/embedding_cache.py
+
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+from utils.config import get_settings
+from utils.logger import log
+import hashlib
+import os
+import re
+import threading
+import time
+import uuid
+
+settings = get_settings()
+
+class EmbeddingCache:
+    """کش پایدار embedding‌ها با کلید (model id, hash متن)
+
+    هر مدل یک پوشه دارد که شامل چند segment است:
+      <segment>.keys.npy   -> hash های مرتب شده (uint64)
+      <segment>.vecs.npy   -> بردارها (float16 یا int8)
+      <segment>.scale.npy  -> ضریب هر بردار (فقط برای int8)
+    segment ها با mmap خوانده می‌شوند و وقتی حجم کل از سقف بیشتر شود
+    segment هایی که دیرتر استفاده شده‌اند حذف می‌شوند.
+    """
+
+    SUPPORTED_DTYPES = ('float16', 'int8')
+    MAX_SEGMENTS = 64
+
+    def __init__(self, cache_dir: Optional[str] = None, dtype: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.cache_dir = Path(cache_dir or settings.EMBEDDING_CACHE_DIR)
+        self.dtype = dtype or settings.EMBEDDING_CACHE_DTYPE
+        self.max_bytes = max_bytes or settings.EMBEDDING_CACHE_MAX_BYTES
+
+        if self.dtype not in self.SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported embedding cache dtype: {self.dtype}")
+
+        # segment های باز شده با mmap: مسیر -> (keys, vecs, scale)
+        self._segments: Dict[Path, Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def hash_texts(texts: Sequence[str]) -> np.ndarray:
+        """هش 64 بیتی هر متن"""
+        digests = b''.join(
+            hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest()
+            for text in texts
+        )
+        return np.frombuffer(digests, dtype='<u8').astype(np.uint64)
+
+    def encode(self, model, texts: Sequence[str], model_id: str) -> np.ndarray:
+        """encode متن‌ها با استفاده از کش؛ فقط متن‌های جدید به مدل داده می‌شوند"""
+        texts = list(texts)
+        if len(texts) == 0:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        keys = self.hash_texts(texts)
+        unique_keys, first_index, inverse = np.unique(keys, return_index=True, return_inverse=True)
+
+        with self._lock:
+            found, vectors = self._lookup(model_id, unique_keys)
+
+        missing = np.where(~found)[0]
+        if len(missing) > 0:
+            missing_texts = [texts[i] for i in first_index[missing]]
+            new_vectors = np.asarray(
+                model.encode(missing_texts, show_progress_bar=False),
+                dtype=np.float32
+            )
+
+            # ذخیره و بازگرداندن نسخه کوانتیزه تا نتیجه با/بدون کش یکسان باشد
+            stored, scale = self._quantize(new_vectors)
+            new_vectors = self._dequantize(stored, scale)
+
+            if vectors is None:
+                vectors = np.zeros((len(unique_keys), new_vectors.shape[1]), dtype=np.float32)
+            vectors[missing] = new_vectors
+
+            try:
+                with self._lock:
+                    self._write_segment(model_id, unique_keys[missing], stored, scale)
+                    self._evict()
+            except OSError as e:
+                log.warning(f"Could not persist embeddings to cache: {e}")
+
+        log.debug(f"Embedding cache: {int(found.sum())} hits, {len(missing)} misses for {model_id}")
+        return vectors[inverse]
+
+    def clear(self, model_id: Optional[str] = None):
+        """پاک کردن کش (برای یک مدل یا همه)"""
+        with self._lock:
+            directories = [self._model_dir(model_id)] if model_id else self._model_dirs()
+            for directory in directories:
+                for segment in self._list_segments(directory):
+                    self._remove_segment(segment)
+
+    def size_bytes(self) -> int:
+        """حجم کل کش روی دیسک"""
+        if not self.cache_dir.exists():
+            return 0
+        return sum(path.stat().st_size for path in self.cache_dir.rglob('*.npy'))
+
+    def _model_dir(self, model_id: str) -> Path:
+        safe_name = re.sub(r'[^\w\.-]', '_', model_id)
+        return self.cache_dir / safe_name
+
+    def _model_dirs(self) -> List[Path]:
+        if not self.cache_dir.exists():
+            return []
+        return [path for path in self.cache_dir.iterdir() if path.is_dir()]
+
+    def _list_segments(self, directory: Path) -> List[Path]:
+        """segment های کامل (فایل keys آخر نوشته می‌شود) به ترتیب ساخت"""
+        if not directory.exists():
+            return []
+        return sorted(
+            directory / path.name[:-len('.keys.npy')]
+            for path in directory.glob('*.keys.npy')
+        )
+
+    def _open_segment(self, segment: Path) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+        if segment not in self._segments:
+            keys = np.load(f"{segment}.keys.npy", mmap_mode='r')
+            vecs = np.load(f"{segment}.vecs.npy", mmap_mode='r')
+            scale_path = Path(f"{segment}.scale.npy")
+            scale = np.load(scale_path, mmap_mode='r') if scale_path.exists() else None
+            self._segments[segment] = (keys, vecs, scale)
+        return self._segments[segment]
+
+    def _lookup(self, model_id: str, keys: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """جستجوی کلیدهای مرتب شده در segment ها (از جدید به قدیم)"""
+        found = np.zeros(len(keys), dtype=bool)
+        vectors = None
+
+        for segment in reversed(self._list_segments(self._model_dir(model_id))):
+            try:
+                seg_keys, seg_vecs, seg_scale = self._open_segment(segment)
+            except (OSError, ValueError) as e:
+                log.warning(f"Skipping unreadable embedding segment {segment}: {e}")
+                continue
+
+            if len(seg_keys) == 0:
+                continue
+
+            positions = np.searchsorted(seg_keys, keys)
+            positions = np.minimum(positions, len(seg_keys) - 1)
+            hits = (np.asarray(seg_keys[positions]) == keys) & ~found
+
+            if not hits.any():
+                continue
+
+            rows = positions[hits]
+            scale = np.asarray(seg_scale[rows]) if seg_scale is not None else None
+            hit_vectors = self._dequantize(np.asarray(seg_vecs[rows]), scale)
+
+            if vectors is None:
+                vectors = np.zeros((len(keys), hit_vectors.shape[1]), dtype=np.float32)
+            vectors[hits] = hit_vectors
+            found |= hits
+
+            # به‌روزرسانی زمان دسترسی برای eviction از نوع LRU
+            os.utime(f"{segment}.keys.npy")
+
+            if found.all():
+                break
+
+        return found, vectors
+
+    def _quantize(self, vectors: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        if self.dtype == 'float16':
+            return vectors.astype(np.float16), None
+
+        # int8 متقارن با یک ضریب برای هر بردار
+        scale = np.abs(vectors).max(axis=1) / 127.0
+        scale[scale == 0] = 1.0
+        quantized = np.clip(np.rint(vectors / scale[:, None]), -127, 127).astype(np.int8)
+        return quantized, scale.astype(np.float32)
+
+    @staticmethod
+    def _dequantize(vectors: np.ndarray, scale: Optional[np.ndarray]) -> np.ndarray:
+        vectors = vectors.astype(np.float32)
+        if scale is not None:
+            vectors *= scale[:, None]
+        return vectors
+
+    def _write_segment(self, model_id: str, keys: np.ndarray, vectors: np.ndarray, scale: Optional[np.ndarray]):
+        """نوشتن یک segment جدید به صورت atomic"""
+        directory = self._model_dir(model_id)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        order = np.argsort(keys, kind='stable')
+        segment = directory / f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+
+        self._save_atomic(Path(f"{segment}.vecs.npy"), vectors[order])
+        if scale is not None:
+            self._save_atomic(Path(f"{segment}.scale.npy"), scale[order])
+        self._save_atomic(Path(f"{segment}.keys.npy"), keys[order])
+
+        if len(self._list_segments(directory)) > self.MAX_SEGMENTS:
+            self._compact(directory)
+
+    @staticmethod
+    def _save_atomic(path: Path, array: np.ndarray):
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+        with open(tmp_path, 'wb') as f:
+            np.save(f, array)
+        os.replace(tmp_path, path)
+
+    def _compact(self, directory: Path):
+        """ادغام همه segment های یک مدل در یک segment"""
+        segments = self._list_segments(directory)
+        all_keys, all_vecs, all_scale = [], [], []
+
+        for segment in segments:
+            keys, vecs, scale = self._open_segment(segment)
+            all_keys.append(np.asarray(keys))
+            all_vecs.append(np.asarray(vecs))
+            if scale is not None:
+                all_scale.append(np.asarray(scale))
+
+        keys = np.concatenate(all_keys)
+        vecs = np.concatenate(all_vecs)
+        scale = np.concatenate(all_scale) if len(all_scale) == len(segments) else None
+
+        # هر کلید یک بار (نسخه جدیدتر)
+        _, last = np.unique(keys[::-1], return_index=True)
+        keep = len(keys) - 1 - last
+
+        merged = directory / f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+        self._save_atomic(Path(f"{merged}.vecs.npy"), vecs[keep])
+        if scale is not None:
+            self._save_atomic(Path(f"{merged}.scale.npy"), scale[keep])
+        self._save_atomic(Path(f"{merged}.keys.npy"), keys[keep])
+
+        for segment in segments:
+            self._remove_segment(segment)
+
+        log.info(f"Compacted {len(segments)} embedding segments in {directory}")
+
+    def _evict(self):
+        """حذف segment های کم‌استفاده تا حجم کش زیر سقف برود"""
+        total = self.size_bytes()
+        if total <= self.max_bytes:
+            return
+
+        segments = [
+            segment
+            for directory in self._model_dirs()
+            for segment in self._list_segments(directory)
+        ]
+        segments.sort(key=lambda segment: os.path.getmtime(f"{segment}.keys.npy"))
+
+        for segment in segments:
+            if total <= self.max_bytes:
+                break
+            total -= self._remove_segment(segment)
+            log.info(f"Evicted embedding segment {segment}")
+
+    def _remove_segment(self, segment: Path) -> int:
+        self._segments.pop(segment, None)
+        freed = 0
+        # keys اول حذف می‌شود تا segment نیمه‌کاره دیده نشود
+        for suffix in ('.keys.npy', '.vecs.npy', '.scale.npy'):
+            path = Path(f"{segment}{suffix}")
+            try:
+                freed += path.stat().st_size
+                path.unlink()
+            except FileNotFoundError:
+                pass
+        return freed
+
+embedding_cache = EmbeddingCache()
@@ -3,5 +3,6 @@
 from .storage import storage_service
 from .queue import celery_app
 from .ai_provider import ai_provider
+from .embedding_cache import embedding_cache
 
-__all__ = ["storage_service", "celery_app", "ai_provider"]
\ No newline at end of file
+__all__ = ["storage_service", "celery_app", "ai_provider", "embedding_cache"]
\ No newline at end of file
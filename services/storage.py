@@ -61,6 +61,35 @@ class StorageService:
             log.error(f"Error downloading file: {e}")
             raise
     
+    async def upload_from_path(self, path: str, filename: str, content_type: str) -> str:
+        """آپلود مستقیم از دیسک بدون بارگذاری کل فایل در حافظه"""
+        try:
+            file_id = str(uuid.uuid4())
+            object_name = f"{file_id}/{filename}"
+            
+            self.client.fput_object(
+                self.bucket,
+                object_name,
+                path,
+                content_type=content_type
+            )
+            
+            log.info(f"Uploaded file: {object_name}")
+            return object_name
+            
+        except S3Error as e:
+            log.error(f"Error uploading file: {e}")
+            raise
+    
+    async def download_to_path(self, object_name: str, path: str) -> str:
+        """دانلود مستقیم روی دیسک بدون بارگذاری کل فایل در حافظه"""
+        try:
+            self.client.fget_object(self.bucket, object_name, path)
+            return path
+        except S3Error as e:
+            log.error(f"Error downloading file: {e}")
+            raise
+    
     async def delete_file(self, object_name: str) -> bool:
         try:
             self.client.remove_object(self.bucket, object_name)
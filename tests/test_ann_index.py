@@ -0,0 +1,32 @@
+# Location: datanex/tests/test_ann_index.py
+
+import numpy as np
+from core.ann_index import IVFIndex
+
+def test_self_join_finds_planted_duplicates_within_top_k_and_threshold():
+    """تست یافتن بردارهای near-duplicate کاشته شده با رعایت top_k و threshold"""
+    rng = np.random.default_rng(0)
+    base = rng.normal(size=(4000, 32)).astype(np.float32)
+    planted = base[:100] + rng.normal(scale=0.01, size=(100, 32)).astype(np.float32)
+    # پنج کپی از یک بردار: هر کدام چهار همسایه دارد ولی فقط k تا برگردانده می‌شوند
+    copies = np.repeat(base[200:201], 5, axis=0)
+    vectors = np.vstack([base, planted, copies])
+
+    index = IVFIndex(nlist=32, nprobe=4).fit(vectors)
+    i, j, similarity = index.self_join(k=2, threshold=0.95)
+
+    pairs = set(zip(i.tolist(), j.tolist()))
+    assert all((row, 4000 + row) in pairs and (4000 + row, row) in pairs for row in range(100))
+    assert (similarity >= 0.95).all() and (i != j).all()
+    assert np.bincount(i).max() <= 2
+
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    assert np.allclose(similarity, (normalized[i] * normalized[j]).sum(axis=1), atol=1e-5)
+
+    copy_rows = np.arange(4100, 4105)
+    assert all((i == row).sum() == 2 for row in copy_rows)
+    assert set(j[np.isin(i, copy_rows)]) <= set(copy_rows) | {200}
+
+    strict = index.self_join(k=2, threshold=0.9999)
+    assert set(zip(*strict[:2])) <= pairs
+    assert len(strict[0]) < len(i)
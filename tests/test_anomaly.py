@@ -0,0 +1,42 @@
+# Location: datanex/tests/test_anomaly.py
+
+import numpy as np
+import pandas as pd
+from core.anomaly import AnomalyEngine
+
+def test_profile_matches_pandas_robust_statistics():
+    """تست تطابق آمار مقاوم یک گذری با محاسبه ستون به ستون pandas"""
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(500, 3)), columns=['a', 'b', 'c'])
+    df.loc[3, 'a'] = 50.0
+    df.loc[::7, 'b'] = np.nan
+    df['empty'] = np.nan
+
+    engine = AnomalyEngine(block_size=2)
+    profile = engine.profile(df)
+    assert engine.profile(df) is profile
+
+    for column in ['a', 'b', 'c']:
+        series = df[column].dropna()
+        q1, q3 = series.quantile(0.25), series.quantile(0.75)
+        iqr = q3 - q1
+        assert np.isclose(profile[column]['median'], series.median())
+        assert np.isclose(profile[column]['mad'], (series - series.median()).abs().median())
+        assert profile[column]['iqr_outliers'] == int(((series < q1 - 1.5 * iqr) | (series > q3 + 1.5 * iqr)).sum())
+
+    assert profile['a']['robust_outliers'] >= 1
+    assert profile['empty']['count'] == 0
+
+    forest = engine.isolation_forest(df[['a', 'b', 'c']])
+    assert forest['is_anomaly'][3]
+
+def test_profile_recomputed_after_in_place_edit_and_blocks_capped():
+    """تست اینکه تغییر درجا با شکل یکسان آمار کهنه برنمی‌گرداند و بلوک‌ها به max_cells محدودند"""
+    df = pd.DataFrame({'a': [1.0, 2.0, 3.0, 4.0, 5.0, 100.0, 2.5, 3.5], 'b': np.arange(8.0)})
+    engine = AnomalyEngine(max_cells=8)
+    assert engine.profile(df)['a']['iqr_outliers'] == 1
+
+    df.loc[5, 'a'] = 6.0
+    profile = engine.profile(df)
+    assert profile['a']['iqr_outliers'] == 0
+    assert profile == AnomalyEngine().profile(df)
@@ -0,0 +1,32 @@
+# Location: datanex/tests/test_artifact_cache.py
+
+import pytest
+from services.artifact_cache import ArtifactCache
+
+class FakeStorage:
+    def __init__(self, objects):
+        self.objects = objects
+        self.downloads = []
+
+    async def download_to_path(self, object_name: str, path: str) -> str:
+        self.downloads.append(object_name)
+        with open(path, 'wb') as f:
+            f.write(self.objects[object_name])
+        return path
+
+@pytest.mark.asyncio
+async def test_artifact_downloaded_once_and_evicted_by_size(tmp_path):
+    """تست دانلود یک باره هر artifact و حذف قدیمی‌ترین فایل‌ها وقتی حجم از سقف بیشتر شود"""
+    storage = FakeStorage({name: bytes(400) for name in ('a', 'b', 'c')})
+    cache = ArtifactCache(cache_dir=str(tmp_path), max_bytes=1000, storage=storage)
+
+    path = await cache.get('a')
+    assert path.read_bytes() == bytes(400)
+    assert await cache.get('a') == path
+    assert storage.downloads == ['a']
+
+    await cache.get('b')
+    await cache.get('c')
+    assert not path.exists()
+    assert sorted(p.stat().st_size for p in tmp_path.iterdir()) == [400, 400]
+    assert storage.downloads == ['a', 'b', 'c']
@@ -0,0 +1,35 @@
+# Location: datanex/tests/test_association_rules.py
+
+import numpy as np
+import pandas as pd
+from itertools import combinations
+from core.association_rules import FPGrowth
+
+def test_frequent_itemsets_match_brute_force_counts():
+    """تست تطابق itemset های FP-Growth با شمارش مستقیم"""
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'city': rng.choice(['a', 'b', 'c'], 500),
+        'plan': rng.choice(['free', 'pro'], 500),
+        'device': rng.choice(['ios', 'android', None], 500)
+    })
+    df.loc[df['city'] == 'a', 'plan'] = 'pro'
+
+    miner = FPGrowth(min_support=0.05, max_len=3)
+    itemsets, names, n = miner.frequent_itemsets(df)
+
+    items = pd.get_dummies(df.astype(object), prefix_sep='=').astype(bool)
+    expected = {}
+    for size in range(1, 4):
+        for combo in combinations(items.columns, size):
+            count = int(items[list(combo)].all(axis=1).sum())
+            if count >= np.ceil(0.05 * n):
+                expected[frozenset(combo)] = count
+
+    found = {frozenset(names[i] for i in itemset): count for itemset, count in itemsets.items()}
+    assert found == expected
+
+    rules = miner.rules(df)
+    rule = next(r for r in rules if r['antecedent'] == ['city=a'] and r['consequent'] == ['plan=pro'])
+    assert rule['confidence'] == 1.0
+    assert rule['lift'] > 1
@@ -0,0 +1,93 @@
+# Location: datanex/tests/test_budget.py
+
+import asyncio
+import time
+import numpy as np
+import pandas as pd
+from core.budget import CostModel, PatternBudget, sample_rows
+from core.pattern_finder import PatternFinder
+
+def _frame(n: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'time': pd.Timestamp('2024-01-01') + pd.to_timedelta(np.arange(n), unit='h'),
+        'a': rng.normal(size=n),
+        'b': rng.normal(size=n),
+        'city': rng.choice(['x', 'y', 'z'], n),
+        'id': [f'u{i}' for i in range(n)]
+    })
+
+def test_cost_grows_with_rows_and_cardinality():
+    """تست رشد هزینه تخمینی با تعداد ردیف‌ها و بی‌هزینه بودن detector های بی‌داده"""
+    model = CostModel()
+    small, large = model.estimate(_frame(2000)), model.estimate(_frame(20000))
+    assert all(large[name] >= small[name] for name in small)
+    assert large['associations'] > small['associations'] > 0
+
+    numeric_only = model.estimate(_frame(2000)[['a', 'b']])
+    assert numeric_only['sequences'] == numeric_only['associations'] == numeric_only['trends'] == 0
+
+def test_budget_plans_full_sampled_and_skipped_runs():
+    """تست تقسیم بودجه به نسبت تخمین‌ها، نمونه‌گیری و رد detector"""
+    budget = PatternBudget(time_budget=10.0, min_rows=100)
+    assert budget.plan(estimate=1.0, pending=5.0, rows=10000) == 1.0
+    assert 0.1 < budget.plan(estimate=40.0, pending=50.0, rows=10000) < 0.2
+    assert budget.plan(estimate=1e6, pending=1e6, rows=10000) is None
+
+    budget.record(estimate=1.0, elapsed=2.0)
+    assert budget.scale == 2.0
+
+def test_budget_calibration_ignores_overhead_dominated_runs():
+    """تست اینکه اجراهای چند میلی‌ثانیه‌ای scale را منحرف نکنند و بخش ثابت مقیاس نشود"""
+    budget = PatternBudget(time_budget=10.0)
+    budget.record(estimate=0.001, elapsed=0.02)
+    assert budget.scale == 1.0
+
+    budget.scale = 10.0
+    # 3 ثانیه ثابت بدون scale کنار گذاشته و بخش متغیر (1 ثانیه × 10) در 7 ثانیه باقی‌مانده نمونه‌گیری می‌شود
+    fraction = budget.plan(estimate=4.0, pending=4.0, rows=100000, fixed=3.0, pending_fixed=3.0)
+    assert 0.65 < fraction <= 0.7
+
+    pending, pending_fixed = budget.reserve([(0.1, 0.02), (20.0, 15.0), (5.0, 3.0)])
+    assert (pending, pending_fixed) == (5.1, 3.02)
+
+    df = _frame(1000)
+    sampled = sample_rows(df, 0.25)
+    assert len(sampled) == 250 and sampled.index.is_monotonic_increasing
+    assert sample_rows(df, 0.25, contiguous=True).index.tolist() == list(range(250))
+
+def test_find_patterns_reports_completion_per_detector():
+    """تست نتایج جزئی با بودجه صفر و اجرای کامل بدون بودجه"""
+    df = _frame(3000)
+    finder = PatternFinder()
+
+    full = asyncio.run(finder.find_patterns(df))
+    assert {status['status'] for status in full['completion'].values()} == {'complete'}
+    assert list(full)[:-1] == [name for name, *_ in PatternFinder.DETECTORS]
+
+    generous = asyncio.run(finder.find_patterns(df, time_budget=600))
+    assert all(status['status'] == 'complete' and status['sample_fraction'] == 1.0
+               for status in generous['completion'].values())
+
+    partial = asyncio.run(finder.find_patterns(df, time_budget=0.0))
+    assert partial['completion']['clusters']['status'] == 'skipped'
+    assert partial['clusters'] == {} and partial['correlations'] == []
+
+def test_detector_over_its_deadline_is_abandoned():
+    """تست توقف detector ای که از زمان باقی‌مانده بودجه بیشتر طول بکشد و حفظ نتایج قبلی"""
+    df = _frame(3000)
+    finder = PatternFinder()
+
+    async def slow_trends(data):
+        time.sleep(3)
+        return [{'column': 'late'}]
+
+    finder._find_trends = slow_trends
+    started = time.monotonic()
+    patterns = asyncio.run(finder.find_patterns(df, time_budget=1.0))
+
+    assert time.monotonic() - started < 2.0
+    assert patterns['trends'] == []
+    assert patterns['completion']['trends']['status'] == 'timed_out'
+    assert patterns['completion']['trends']['completed'] is False
+    assert patterns['completion']['correlations']['completed'] is True
@@ -0,0 +1,28 @@
+# Location: datanex/tests/test_clustering.py
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from io import BytesIO
+from core.clustering import StreamingClusterer, labels_to_parquet
+
+def test_streaming_clusterer_finds_k_and_labels_every_row():
+    """تست انتخاب خودکار k و برچسب‌گذاری همه ردیف‌ها با خواندن تکه‌ای"""
+    rng = np.random.default_rng(0)
+    truth = rng.integers(0, 3, 3000)
+    centers = np.array([[0, 0, 0], [10, 10, 0], [0, 10, 10]])
+    df = pd.DataFrame(centers[truth] + rng.normal(size=(3000, 3)), columns=['a', 'b', 'c'])
+    df.loc[::50, 'a'] = np.nan
+
+    chunks = lambda: (df.iloc[start:start + 700] for start in range(0, len(df), 700))
+    result = StreamingClusterer(sample_size=1000, batch_size=500).fit_predict(chunks, ['a', 'b', 'c'])
+
+    assert result['n_clusters'] == 3
+    assert len(result['labels']) == len(df)
+    assert result['labels'].dtype == np.int8
+    # هر خوشه واقعی تقریباً به یک برچسب نگاشت می‌شود
+    for cluster in range(3):
+        assert np.bincount(result['labels'][truth == cluster]).max() > 0.95 * (truth == cluster).sum()
+
+    table = pq.read_table(BytesIO(labels_to_parquet(result['labels'])))
+    assert table['cluster'].to_numpy().tolist() == result['labels'].tolist()
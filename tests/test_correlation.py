@@ -0,0 +1,22 @@
+# Location: datanex/tests/test_correlation.py
+
+import numpy as np
+import pandas as pd
+from core.correlation import CorrelationEngine
+
+def test_blocked_correlation_matches_pandas():
+    """تست برابری جفت‌های بلوکی با ماتریس کامل pandas (با و بدون null)"""
+    rng = np.random.default_rng(0)
+    base = rng.normal(size=(500, 5))
+    df = pd.DataFrame(np.hstack([base, base + rng.normal(size=(500, 5)) * 0.5]))
+    
+    for data in (df, df.mask(rng.random(df.shape) < 0.1)):
+        i, j, r = CorrelationEngine(threshold=0.5, block_size=3).pairs(data)
+        
+        expected = data.corr().to_numpy()
+        rows, cols = np.triu_indices(len(expected), k=1)
+        selected = np.abs(expected[rows, cols]) >= 0.5
+        
+        assert i.tolist() == rows[selected].tolist()
+        assert j.tolist() == cols[selected].tolist()
+        assert np.allclose(r, expected[rows, cols][selected], atol=1e-5)
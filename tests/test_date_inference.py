@@ -0,0 +1,35 @@
+# Location: datanex/tests/test_date_inference.py
+
+import pandas as pd
+from core.date_inference import DateInference
+
+def test_convert_infers_formats_and_skips_non_dates():
+    """تست تشخیص format ستون‌های تاریخ و رد ستون‌های عددی/متنی"""
+    dates = pd.Series(pd.date_range('2024-01-01', periods=60, freq='D'))
+    df = pd.DataFrame({
+        'iso': dates.dt.strftime('%Y-%m-%d'),
+        'day_first': dates.dt.strftime('%d/%m/%Y'),
+        'mixed': dates.dt.strftime('%Y-%m-%d').where(dates.dt.day % 2 == 0, dates.dt.strftime('%b %d, %Y')),
+        'numbers': [str(i * 1000) for i in range(60)],
+        'versions': ['1.2.3'] * 60,
+        'text': ['order 2024'] * 60
+    })
+    df.loc[5, 'iso'] = None
+
+    formats = DateInference().convert(df)
+
+    assert formats == {'iso': 'ISO8601', 'day_first': '%d/%m/%Y', 'mixed': 'mixed'}
+    assert (df['day_first'] == dates).all()
+    assert (df['mixed'] == dates).all()
+    assert df['iso'].isna().sum() == 1
+    assert df['numbers'].dtype == object
+
+def test_cached_shape_format_is_verified_per_column():
+    """تست اینکه format cache شده یک شکل به ستون بعدی با ترتیب روز/ماه دیگر تحمیل نشود"""
+    dates = pd.Series(pd.date_range('2024-01-01', periods=60, freq='D'))
+    for first, second in [('%d/%m/%Y', '%m/%d/%Y'), ('%m/%d/%Y', '%d/%m/%Y')]:
+        inference = DateInference()
+        for date_format in (first, second):
+            df = pd.DataFrame({'when': dates.dt.strftime(date_format)})
+            assert inference.convert(df) == {'when': date_format}
+            assert (df['when'] == dates).all()
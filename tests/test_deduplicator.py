@@ -0,0 +1,67 @@
+# Location: datanex/tests/test_deduplicator.py
+
+import pytest
+import numpy as np
+import pandas as pd
+from core.deduplicator import deduplicator
+
+@pytest.mark.asyncio
+async def test_exact_duplicates_with_nulls():
+    """تست اینکه ردیف‌های تکراری با مقدار null هم گروه‌بندی می‌شوند"""
+    df = pd.DataFrame({'name': ['a', 'a', None, None, 'b'], 'value': [1, 1, np.nan, np.nan, 2]})
+    result = await deduplicator.find_duplicates(df, method='exact')
+    
+    assert result['duplicate_count'] == 4
+    assert result['group_ids'].tolist() == [0, 0, 1, 1, -1]
+    assert result['unique_count'] == 3
+
+@pytest.mark.asyncio
+async def test_exact_duplicates_keep_value_types():
+    """تست اینکه 1 و '1' در حالت exact تکراری نیستند (مثل df.duplicated)"""
+    df = pd.DataFrame({'code': [1, '1', 1, '1', 2.5, '2.5', None], 'name': ['a'] * 7})
+    result = await deduplicator.find_duplicates(df, method='exact')
+    
+    assert result['group_ids'].tolist() == [0, 1, 0, 1, -1, -1, -1]
+    assert (result['group_ids'] >= 0).tolist() == df.duplicated(keep=False).tolist()
+
+@pytest.mark.asyncio
+async def test_fuzzy_duplicates_normalize_text():
+    """تست تشخیص تکراری‌هایی که فقط در فاصله و حروف بزرگ تفاوت دارند"""
+    df = pd.DataFrame({'name': ['John ', ' john', 'Jane'], 'age': [30, 30, 25]})
+    result = await deduplicator.find_duplicates(df, method='fuzzy')
+    
+    assert result['duplicate_count'] == 2
+    assert deduplicator.describe_groups(df, result)[0]['indices'] == [0, 1]
+
+@pytest.mark.asyncio
+async def test_merge_duplicates_prefer_complete_fills_nulls():
+    """تست ادغام گروه‌ها با ترجیح ردیف کامل‌تر و پر کردن null ها از بقیه"""
+    df = pd.DataFrame({
+        'name': ['a', 'a', 'b', 'b', 'c'],
+        'email': [None, 'a@x.com', 'b@x.com', None, 'c@x.com'],
+        'phone': ['1', None, None, '2', '3']
+    })
+    duplicate_result = {'duplicate_groups': [{'indices': [0, 1]}, {'indices': [2, 3]}]}
+    merged = await deduplicator.merge_duplicates(df, duplicate_result, strategy='prefer_complete')
+    
+    assert merged.index.tolist() == [0, 2, 4]
+    assert merged.loc[0, 'email'] == 'a@x.com'
+    assert merged.loc[2, 'phone'] == '2'
+    
+    cleaned = await deduplicator.remove_duplicates(df, duplicate_result, keep='last')
+    assert cleaned.index.tolist() == [1, 3, 4]
+
+@pytest.mark.asyncio
+async def test_linkage_matches_similar_entities():
+    """تست record linkage روی نام و آدرس با blocking آوایی"""
+    df = pd.DataFrame({
+        'name': ['John Smith', 'Jon Smith', 'Jane Doe', 'Mary Major'],
+        'address': ['12 Main St', '12 Main Street', '5 Oak Ave', '12 Main St'],
+        'noise': [1, 2, 3, 4]
+    })
+    result = await deduplicator.find_duplicates(
+        df, method='linkage', fields={'name': 0.6, 'address': 0.4},
+        blocking=['soundex:name', 'prefix:address:4'], threshold=0.8
+    )
+    
+    assert result['group_ids'].tolist() == [0, 0, -1, -1]
@@ -0,0 +1,36 @@
+# Location: datanex/tests/test_embedding_cache.py
+
+import numpy as np
+from services.embedding_cache import EmbeddingCache
+
+class FakeModel:
+    """مدل ساختگی که تعداد متن‌های encode شده را می‌شمارد"""
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def encode(self, texts, show_progress_bar=False):
+        self.calls += len(texts)
+        return np.array([[len(t), t.count('a'), 1.0] for t in texts], dtype=np.float32)
+
+def test_cache_hits_skip_model(tmp_path):
+    """تست اینکه متن‌های تکراری دوباره encode نمی‌شوند"""
+    cache = EmbeddingCache(str(tmp_path), 'float16', 10 ** 9)
+    model = FakeModel()
+    
+    first = cache.encode(model, ['abc', 'aaa', 'abc'], model_id='test-model')
+    second = cache.encode(model, ['aaa', 'new'], model_id='test-model')
+    
+    assert model.calls == 3
+    assert np.allclose(first[1], second[0])
+    assert np.allclose(first[0], first[2])
+
+def test_cache_eviction(tmp_path):
+    """تست محدود ماندن حجم کش"""
+    cache = EmbeddingCache(str(tmp_path), 'int8', 1500)
+    model = FakeModel()
+    
+    for i in range(10):
+        cache.encode(model, [f'text {i}'], model_id='test-model')
+    
+    assert cache.size_bytes() <= 1500
@@ -0,0 +1,42 @@
+# Location: datanex/tests/test_external_dedup.py
+
+import pytest
+import numpy as np
+import pandas as pd
+from core.external_dedup import ExternalDeduplicator
+from core.row_hashing import normalize_frame
+from models.file import FileType
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('method', ['exact', 'fuzzy'])
+@pytest.mark.parametrize('keep', ['first', 'last', 'none'])
+async def test_out_of_core_matches_in_memory_duplicated(tmp_path, method, keep):
+    """تست partition های روی دیسک، mask memmap و خروجی stream در برابر df.duplicated"""
+    rng = np.random.default_rng(0)
+    n = 3000
+    df = pd.DataFrame({
+        'name': rng.choice(['alice', ' Alice', 'BOB', 'bob ', 'carol', None], n),
+        'city': rng.choice(['x', 'y', 'Y'], n),
+        'amount': rng.integers(0, 20, n).astype(str)
+    })
+    input_path = tmp_path / 'input.csv'
+    output_path = tmp_path / 'output.csv'
+    df.to_csv(input_path, index=False)
+
+    deduplicator = ExternalDeduplicator(chunksize=250, partition_bytes=1024, max_partitions=32)
+    result = await deduplicator.deduplicate(str(input_path), FileType.CSV, str(output_path),
+                                            method=method, keep=keep, work_dir=str(tmp_path))
+
+    source = pd.read_csv(input_path, dtype=str)
+    frame = normalize_frame(source) if method == 'fuzzy' else source
+    dropped = frame.duplicated(keep=False if keep == 'none' else keep)
+    expected = source[~dropped].reset_index(drop=True)
+
+    output = pd.read_csv(output_path, dtype=str)
+    pd.testing.assert_frame_equal(output, expected)
+
+    assert result['partitions'] > 16
+    assert result['rows_in'] == n and result['rows_out'] == len(expected)
+    assert result['duplicate_count'] == frame.duplicated(keep=False).sum()
+    assert result['duplicate_groups'] == frame[frame.duplicated(keep=False)].drop_duplicates().shape[0]
+    assert not list(tmp_path.glob('dedup_*'))
@@ -0,0 +1,81 @@
+# Location: datanex/tests/test_fd_discovery.py
+
+import pytest
+import numpy as np
+import pandas as pd
+from collections import Counter
+from itertools import combinations
+from core.fd_discovery import FDDiscovery
+from core.pattern_finder import PatternFinder
+
+def test_discovers_multi_column_and_approximate_dependencies():
+    """تست کشف FD با تعیین‌کننده چند ستونی و FD تقریبی"""
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'a': rng.integers(0, 20, 1000), 'b': rng.integers(0, 5, 1000)})
+    df['c'] = df['a'] * 10 + df['b']
+    df['d'] = df['a'] % 3
+    df.loc[0, 'd'] = 9
+    
+    exact = {(tuple(fd['lhs']), fd['rhs']) for fd in FDDiscovery().discover(df)}
+    assert (('a', 'b'), 'c') in exact
+    assert (('c',), 'a') in exact
+    assert (('a',), 'd') not in exact
+    
+    approximate = FDDiscovery(max_error=0.01).discover(df)
+    assert {'lhs': ['a'], 'rhs': 'd', 'error': 0.001} in approximate
+
+def _brute_force(df: pd.DataFrame, max_lhs: int, max_error: float) -> set:
+    """FD های مینیمال با شمارش مستقیم g3 برای همه زیرمجموعه‌ها"""
+    n = len(df)
+    columns = list(df.columns)
+    records = df.to_dict('records')
+
+    def holds(lhs, rhs):
+        pairs = Counter((tuple(row[c] for c in lhs), row[rhs]) for row in records)
+        largest = {}
+        for (key, _), count in pairs.items():
+            largest[key] = max(largest.get(key, 0), count)
+        return n - sum(largest.values()) <= np.floor(max_error * n)
+
+    found = set()
+    for size in range(max_lhs + 1):
+        for lhs in combinations(columns, size):
+            for rhs in columns:
+                if rhs in lhs or not holds(lhs, rhs):
+                    continue
+                if not any(holds(sub, rhs) for k in range(size) for sub in combinations(lhs, k)):
+                    found.add((lhs, rhs))
+    return found
+
+@pytest.mark.parametrize('max_error', [0.0, 0.05])
+def test_minimal_dependencies_match_brute_force(max_error):
+    """تست تطابق FD های مینیمال با شمارش مستقیم روی جدول‌های تصادفی کوچک"""
+    rng = np.random.default_rng(0)
+    for trial in range(30):
+        n = int(rng.integers(4, 40))
+        df = pd.DataFrame({name: rng.integers(0, int(rng.integers(1, 6)), n) for name in 'abcde'})
+        df['f'] = df['a'] * 10 + df['b']
+        for max_lhs in (2, 3):
+            found = {(tuple(fd['lhs']), fd['rhs'])
+                     for fd in FDDiscovery(max_error=max_error, max_lhs=max_lhs).discover(df)}
+            assert found == _brute_force(df, max_lhs, max_error), (trial, max_lhs)
+
+def test_key_pruning_keeps_minimal_dependencies():
+    """تست اینکه هرس کلیدها FD مینیمال روی مجموعه‌های هرس شده را حذف نمی‌کند"""
+    df = pd.DataFrame({'id': [1, 2, 3, 4], 'first': ['a', 'a', 'b', 'b'],
+                       'last': ['x', 'y', 'x', 'y'], 'city': ['p', 'q', 'p', 'q']})
+    found = {(tuple(fd['lhs']), fd['rhs']) for fd in FDDiscovery().discover(df)}
+    assert (('first', 'last'), 'id') in found
+    assert (('first', 'city'), 'id') in found
+
+@pytest.mark.asyncio
+async def test_find_dependencies_keeps_single_column_determinant():
+    """تست اینکه determinant برای سمت چپ تک ستونی همچنان نام ستون است"""
+    df = pd.DataFrame({'id': [1, 2, 3, 4], 'first': ['a', 'a', 'b', 'b'],
+                       'last': ['x', 'y', 'x', 'y'], 'city': ['p', 'q', 'p', 'q']})
+    dependencies = await PatternFinder().find_dependencies(df)
+
+    single = next(d for d in dependencies if d['determinants'] == ['city'] and d['dependent'] == 'last')
+    assert single['determinant'] == 'city' and single['type'] == 'functional_dependency'
+    multi = next(d for d in dependencies if d['determinants'] == ['first', 'last'])
+    assert multi['determinant'] is None and multi['dependent'] == 'id'
@@ -0,0 +1,71 @@
+# Location: datanex/tests/test_fingerprint_index.py
+
+import numpy as np
+from core.fingerprint_index import BloomFilter, FingerprintIndex
+from core.minhash import MinHashLSH
+
+def _index(tmp_path) -> FingerprintIndex:
+    return FingerprintIndex(index_dir=str(tmp_path), bloom_bits=2 ** 16, bloom_hashes=5, num_perm=64)
+
+def test_bloom_filter_has_no_false_negatives():
+    """تست Bloom filter: همه هش‌های افزوده دیده می‌شوند و false positive کم است"""
+    rng = np.random.default_rng(0)
+    added = rng.integers(0, 2 ** 63, 5000, dtype=np.uint64)
+    others = rng.integers(0, 2 ** 63, 5000, dtype=np.uint64)
+
+    bloom = BloomFilter(2 ** 16, 5)
+    bloom.add(added)
+    assert bloom.contains(added).all()
+    assert bloom.contains(others).mean() < 0.05
+
+def test_lookup_and_remove_file(tmp_path):
+    """تست lookup با exclude_file_id و بازسازی Bloom filter پس از حذف فایل"""
+    index = _index(tmp_path)
+    index.add_file('a', 'a.csv', np.arange(0, 100, dtype=np.uint64))
+    index.add_file('b', 'b.csv', np.arange(50, 150, dtype=np.uint64))
+
+    query = np.array([10, 60, 120, 500], dtype=np.uint64)
+    seen, matches = index.lookup(query)
+    assert seen.tolist() == [True, True, True, False]
+    assert matches == {'a': 2, 'b': 2}
+
+    seen, matches = index.lookup(query, exclude_file_id='b')
+    assert seen.tolist() == [True, True, False, False]
+    assert matches == {'a': 2}
+
+    assert index.remove_file('a')
+    assert not index.remove_file('a')
+    assert set(index.files()) == {'b'}
+    bloom = index._load_bloom()
+    assert not bloom.contains(np.arange(0, 50, dtype=np.uint64)).all()
+    seen, matches = index.lookup(query)
+    assert seen.tolist() == [False, True, True, False] and matches == {'b': 2}
+
+    # فایل هش گمشده یک فایل دیگر حذف را متوقف نمی‌کند
+    index.add_file('c', 'c.csv', np.arange(200, 210, dtype=np.uint64))
+    index._file_path('c', 'hashes').unlink()
+    assert index.remove_file('b')
+    assert index.lookup(query)[0].sum() == 0
+
+def test_lookup_near_uses_stored_band_keys(tmp_path):
+    """تست near-duplicate بین فایل‌ها با کلیدهای باند ذخیره شده و banding دیگر"""
+    index = _index(tmp_path)
+    lsh = MinHashLSH(num_perm=64)
+    stored = [f"customer {i} lives at {i * 7} maple street, springfield" for i in range(200)]
+    index.add_file('a', 'a.csv', np.arange(200, dtype=np.uint64), lsh.signatures(stored))
+    assert list((tmp_path / 'files').glob('a.lsh*.keys.npy'))
+
+    queries = [stored[3] + ' usa', stored[150] + '.', 'something completely different 12345']
+    signatures = lsh.signatures(queries)
+
+    seen, matches = index.lookup_near(signatures, threshold=0.8)
+    assert seen.tolist() == [True, True, False] and matches == {'a': 2}
+    assert index.lookup_near(signatures, exclude_file_id='a')[0].sum() == 0
+
+    # banding آستانه دیگر یک بار ساخته و کنار امضاها ذخیره می‌شود
+    seen, _ = index.lookup_near(signatures, threshold=0.6)
+    assert seen.tolist() == [True, True, False]
+    assert len(list((tmp_path / 'files').glob('a.lsh*.keys.npy'))) == 2
+
+    assert index.remove_file('a')
+    assert not list((tmp_path / 'files').glob('a.*'))
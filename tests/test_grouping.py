@@ -0,0 +1,58 @@
+# Location: datanex/tests/test_grouping.py
+
+import numpy as np
+import pyarrow.parquet as pq
+from io import BytesIO
+from core.grouping import _page_row_groups, union_find, group_rows, hash_pairs, group_members, groups_to_parquet, read_group_page
+
+def test_union_find_transitive_closure_is_order_independent():
+    """تست اینکه گروه‌ها بستار تعدی جفت‌ها هستند و به ترتیب جفت‌ها بستگی ندارند"""
+    left = np.array([5, 1, 7, 3])
+    right = np.array([3, 5, 8, 1])
+    
+    roots = union_find(10, left, right)
+    reversed_roots = union_find(10, right[::-1], left[::-1])
+    
+    assert roots.tolist() == reversed_roots.tolist()
+    assert roots[[1, 3, 5]].tolist() == [1, 1, 1]
+    assert roots[[7, 8]].tolist() == [7, 7]
+
+def test_group_rows_combines_pair_sources():
+    """تست ترکیب جفت‌های hash و جفت‌های تقریبی در یک گروه‌بندی"""
+    hashes = np.array([9, 4, 9, 6, 4, 2], dtype=np.uint64)
+    group_ids = group_rows(6, hash_pairs(hashes), (np.array([3]), np.array([2])))
+    
+    assert group_ids.tolist() == [0, 1, 0, 0, 1, -1]
+    
+    members, bounds = group_members(group_ids)
+    assert members[bounds[0]:bounds[1]].tolist() == [0, 2, 3]
+
+def test_parquet_group_pages():
+    """تست ذخیره ستونی گروه‌ها و خواندن صفحه‌ای آن‌ها"""
+    group_ids = np.array([0, 1, 0, -1, 2, 1, 2, 2])
+    data = groups_to_parquet(group_ids, np.linspace(0, 1, 8), row_group_size=2)
+    
+    page = read_group_page(data, offset=1, limit=2)
+    
+    assert page['group_count'] == 3
+    assert [group['group_id'] for group in page['groups']] == [1, 2]
+    assert page['groups'][1]['rows'] == [4, 6, 7]
+
+def test_group_page_reads_only_overlapping_row_groups(tmp_path):
+    """تست انتخاب row group ها از آمار group_id و یکسان بودن خواندن از فایل و bytes"""
+    group_ids = np.repeat(np.arange(50), 4)
+    data = groups_to_parquet(group_ids, row_group_size=20)
+    path = tmp_path / 'groups.parquet'
+    path.write_bytes(data)
+
+    parquet = pq.ParquetFile(BytesIO(data))
+    selected = _page_row_groups(parquet, offset=12, limit=5)
+    assert 0 < len(selected) < parquet.num_row_groups
+    for index in range(parquet.num_row_groups):
+        values = parquet.read_row_group(index)['group_id'].to_numpy()
+        assert (index in selected) == bool(((values >= 12) & (values < 17)).any())
+
+    page = read_group_page(path, offset=12, limit=5)
+    assert page == read_group_page(data, offset=12, limit=5)
+    assert [group['group_id'] for group in page['groups']] == list(range(12, 17))
+    assert read_group_page(path, offset=60, limit=5)['groups'] == []
@@ -0,0 +1,42 @@
+# Location: datanex/tests/test_minhash.py
+
+import pytest
+import numpy as np
+from core.minhash import MinHashLSH
+
+def _jaccard(a: str, b: str, k: int = 4) -> float:
+    shingles = [{text.encode()[i:i + k] for i in range(max(len(text.encode()) - k + 1, 1))} for text in (a, b)]
+    return len(shingles[0] & shingles[1]) / len(shingles[0] | shingles[1])
+
+def test_near_duplicates_found_and_distinct_rows_rejected():
+    """تست یافتن near-duplicate های بالای threshold با Jaccard دقیق و رد ردیف‌های متفاوت"""
+    rng = np.random.default_rng(0)
+    words = ['red', 'green', 'blue', 'house', 'river', 'stone', 'paper', 'cloud', 'light', 'storm']
+    base = [' '.join(rng.choice(words, 10)) + f' #{i}' for i in range(300)]
+    texts = base + [text + '!' for text in base[:100]]
+
+    lsh = MinHashLSH(threshold=0.8, num_perm=128)
+    left, right, similarities = lsh.find_pairs(texts)
+
+    pairs = set(zip(left.tolist(), right.tolist()))
+    assert {(i, 300 + i) for i in range(100)} <= pairs
+    for i, j, similarity in zip(left, right, similarities):
+        assert np.isclose(similarity, _jaccard(texts[i], texts[j]))
+        assert similarity >= 0.8
+
+    brute_force = {(i, j) for i in range(len(texts)) for j in range(i + 1, len(texts))
+                   if _jaccard(texts[i], texts[j]) >= 0.8}
+    assert pairs <= brute_force
+    assert len(pairs) >= 0.95 * len(brute_force)
+
+def test_exact_jaccard_and_band_validation():
+    """تست Jaccard دقیق جفت‌ها و خطا برای bands نامعتبر"""
+    lsh = MinHashLSH(num_perm=64, bands=16)
+    texts = ['hello world', 'hello world!', 'abc', 'completely different']
+    similarities = lsh.jaccard(texts, np.array([0, 0, 2]), np.array([1, 3, 3]))
+    expected = [_jaccard('hello world', 'hello world!'), _jaccard('hello world', 'completely different'), 0.0]
+    assert np.allclose(similarities, expected)
+
+    for bands in (0, 65, 48):
+        with pytest.raises(ValueError):
+            MinHashLSH(num_perm=64, bands=bands)
@@ -0,0 +1,30 @@
+# Location: datanex/tests/test_moments.py
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+from core.moments import DistributionAccumulator
+
+def test_merged_chunk_states_match_full_pass():
+    """تست برابری گشتاورها و چندک‌های ادغام شده از تکه‌ها با محاسبه یکجا"""
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'normal': rng.normal(5, 2, 5000), 'skewed': rng.exponential(3, 5000) - 1})
+    df.loc[::7, 'normal'] = np.nan
+
+    first, second = DistributionAccumulator(df.columns), DistributionAccumulator(df.columns)
+    for start in range(0, len(df), 600):
+        (first if start % 1200 == 0 else second).update(df.iloc[start:start + 600])
+    first.merge(DistributionAccumulator.from_dict(second.to_dict()))
+    result = first.result()
+
+    for column in df.columns:
+        series = df[column].dropna()
+        ordered = np.sort(series.to_numpy())
+        assert result[column]['count'] == len(series)
+        assert np.isclose(result[column]['mean'], series.mean())
+        assert np.isclose(result[column]['std'], series.std())
+        assert np.isclose(result[column]['skewness'], stats.skew(series))
+        assert np.isclose(result[column]['kurtosis'], stats.kurtosis(series))
+        assert result[column]['is_normal'] == (stats.normaltest(series).pvalue > 0.05)
+        # DDSketch: خطای نسبی حداکثر 1% نسبت به آماره ترتیبی
+        assert np.isclose(result[column]['median'], ordered[(len(ordered) - 1) // 2], rtol=0.01)
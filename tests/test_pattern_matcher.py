@@ -0,0 +1,61 @@
+# Location: datanex/tests/test_pattern_matcher.py
+
+import re
+import numpy as np
+import pandas as pd
+from core.pattern_matcher import PatternMatcher
+from core.validation import ValidationEngine
+
+VALUES = [
+    'a@b.com', 'user.name@mail.example.org', 'bad', None, 'علی@مثال.ایران', 'x@y.com\n',
+    '+989123456789', '۰۹۱۲۳۴۵۶۷۸۹', '192.168.0.1', '12345-6789', 'https://example.com/path',
+    '123e4567-e89b-12d3-a456-426614174000', '4111111111111111', ''
+]
+
+def test_arrow_kernel_matches_python_regex():
+    """تست یکسان بودن نتیجه کرنل Arrow با re.match برای همه الگوهای اعتبارسنجی"""
+    matcher = PatternMatcher()
+    for name, pattern in ValidationEngine.PATTERNS.items():
+        assert matcher.compile(pattern)[0] is not None, name
+        expected = np.array([value is not None and re.match(pattern, value) is not None for value in VALUES])
+        for values in (VALUES, pd.Series(VALUES, dtype='string[pyarrow]'), pd.Index(VALUES, dtype=object)):
+            assert (matcher.match(values, pattern) == expected).all(), name
+
+def test_fallback_to_python_regex():
+    """تست الگوهای خارج از RE2 و مقادیر غیر رشته‌ای"""
+    matcher = PatternMatcher()
+    assert matcher.compile(r'a(?=b)')[0] is None
+    assert matcher.match(['ab', 'ac', None], r'a(?=b)').tolist() == [True, False, False]
+    assert matcher.match(['12345', 12345, 1.5], r'^\d{5}$').tolist() == [True, True, False]
+
+def test_sampled_pattern_check():
+    """تست نمونه‌گیری: ستون تمیز رد می‌شود و ستون خراب دقیق شمرده می‌شود"""
+    n = 20000
+    clean = pd.DataFrame({'email': [f'user{i}@mail.com' for i in range(n)]})
+    dirty = clean.copy()
+    dirty.loc[::4, 'email'] = 'bad'
+
+    engine = ValidationEngine(max_workers=1, pattern_sample_size=500)
+    assert engine.scan(clean)[0]['patterns'] == {}
+
+    issues, flags = engine.scan(dirty)
+    assert issues['patterns']['email']['invalid_count'] == n // 4
+    assert ValidationEngine.violation_counts(flags)['patterns'] == n // 4
+
+def test_unicode_classes_match_python_regex():
+    """تست تفاضلی کلاس‌های \\s \\S \\w \\W \\d \\D در برابر re.match روی نویسه‌های یونیکد"""
+    rng = np.random.default_rng(0)
+    spaces = np.array([chr(c) for c in range(0x3001) if chr(c).isspace()] + ['\u200b', '\ufeff'])
+    chars = np.array([chr(c) for c in range(0x3100) if not 0xd800 <= c < 0xe000] + ['\U0001d7ce', '\U00010400'])
+    # نیمی از مقادیر فقط از نویسه‌های فاصله ساخته می‌شوند
+    pools = [chars, spaces]
+    values = [''.join(pools[k % 2][rng.integers(0, len(pools[k % 2]), length)])
+              for k, length in enumerate(rng.integers(0, 4, 20000))]
+    patterns = [r'^\s+$', r'\S+$', r'^\w+$', r'\W', r'^\d+$', r'\D', r'^[\w\s]+$', r'^[^\d]+$',
+                r'^[\s\d]*$', r'\w+\s\w+$']
+
+    matcher = PatternMatcher()
+    for pattern in patterns:
+        expected = np.array([re.match(pattern, value) is not None for value in values])
+        assert matcher.compile(pattern)[0] is not None, pattern
+        assert (matcher.match(values, pattern) == expected).all(), pattern
@@ -0,0 +1,105 @@
+# Location: datanex/tests/test_rules.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from core.rules import RuleCompiler, RuleEngine
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({
+        'a': [1.0, 2.0, np.nan, 4.0],
+        'b': [3, 2, 1, 10],
+        'email': ['x@y.com', 'bad', None, 'q@w.org'],
+        'day': pd.to_datetime(['2024-01-01', '2023-01-01', None, '2025-01-01']),
+        'first name': ['A', 'B', 'C', 'A']
+    })
+
+def _violations(engine, df, expression):
+    result = next(engine.evaluate(df, [expression]))
+    assert result['error'] is None
+    return result['violations'].astype(int).tolist() if result['scope'] == 'rows' else result['holds']
+
+def test_row_rules_match_pandas_with_null_passing(df):
+    """تست مقایسه، regex، عضویت، عبارت بین ستون‌ها و تجمیع؛ مقایسه با null نقض نیست"""
+    engine = RuleEngine()
+    assert _violations(engine, df, 'a < b') == [0, 1, 0, 0]
+    assert _violations(engine, df, '0 <= a <= 3') == [0, 0, 0, 1]
+    assert _violations(engine, df, 'matches(email, "^[^@]+@[^@]+$")') == [0, 1, 0, 0]
+    assert _violations(engine, df, "email not in ['bad']") == [0, 1, 0, 0]
+    assert _violations(engine, df, 'sum(a) == b - 3') == [1, 1, 1, 0]
+    assert _violations(engine, df, 'day >= "2024-01-01"') == [0, 1, 0, 0]
+    assert _violations(engine, df, 'not (a > 1 or b > 5)') == [0, 1, 0, 1]
+    assert _violations(engine, df, 'is_unique(col("first name"))') == [1, 0, 0, 1]
+    assert _violations(engine, df, 'notnull(email)') == [0, 0, 1, 0]
+    assert _violations(engine, df, 'sum(a) == 7') is True
+    assert _violations(engine, df, 'mean(b) > 100') is False
+    assert _violations(engine, df, 'any(len(email) > 6) and nunique(email) == 3') is True
+
+def test_legacy_rules_and_errors_are_reported_per_rule(df):
+    """تست ترجمه قوانین قدیمی و گزارش خطای هر قانون بدون توقف بقیه"""
+    rules = [
+        {'name': 'min_a', 'column': 'a', 'min': 2},
+        {'name': 'bounded_b', 'column': 'b', 'min': 2, 'max': 5},
+        {'name': 'missing', 'column': 'zz', 'condition': 'not_null'},
+        {'name': 'unsafe', 'expression': '__import__("os").system("ls")'},
+        {'name': 'ok', 'expression': 'b > 0'}
+    ]
+    results = {result['rule']: result for result in RuleEngine().evaluate(df, rules)}
+
+    assert results['min_a']['violations'].tolist() == [True, False, False, False]
+    assert results['bounded_b']['violations'].tolist() == [False, False, True, True]
+    assert 'Unknown column' in results['missing']['error']
+    assert results['unsafe']['error'] is not None and results['unsafe']['violations'] is None
+    assert results['ok']['holds'] and results['ok']['columns'] == ['b']
+
+@pytest.mark.parametrize('expression', ['a.__class__', 'a[0]', 'open("x")', 'lambda: 1', '[x for x in a]', 'f"{a}"'])
+def test_compiler_rejects_unsafe_syntax(expression):
+    """تست رد نحو خارج از لیست مجاز"""
+    with pytest.raises(ValueError):
+        RuleCompiler().compile(expression)
+
+def test_power_and_text_arithmetic_are_bounded(df):
+    """تست توان روی float64 (بدون حساب بی‌کران اعداد صحیح) و رد ضرب متن"""
+    engine = RuleEngine()
+    assert _violations(engine, df, 'b ** 2 <= 9') == [0, 0, 0, 1]
+    assert _violations(engine, df, '2 ** b == 4') == [1, 0, 1, 1]
+    # سرریز به inf مثل null رفتار می‌کند و نقض حساب نمی‌شود
+    assert _violations(engine, df, 'b < 9 ** 9 ** 9') == [0, 0, 0, 0]
+
+    for expression in ("len('a' * 999999999) > 0", 'email * 2 == "x"'):
+        assert 'not supported on text' in next(engine.evaluate(df, [expression]))['error']
+
+def test_rule_sets_are_cached_and_share_columns():
+    """تست cache مجموعه قوانین و محاسبه یک باره ستون‌ها و زیرعبارت‌های مشترک"""
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'x': rng.normal(size=1000), 'y': rng.choice(['p', 'q', None], 1000)})
+    rules = [f"x < {k / 10} or y in ['p']" for k in range(50)]
+
+    engine = RuleEngine()
+    rule_set = engine.compile(rules)
+    assert engine.compile(rules) is rule_set
+    assert {'col:x', 'col:y', "(col:y in ['p'])"} <= rule_set.shared
+
+    for k, result in enumerate(rule_set.evaluate(df)):
+        # نادرست قطعی: x >= آستانه و y غیر null و متفاوت از 'p'
+        expected = (df['x'] >= k / 10) & df['y'].notna() & (df['y'] != 'p')
+        assert np.array_equal(result['violations'], expected.to_numpy())
+
+def test_matches_runs_in_linear_time_with_search_semantics(df):
+    """تست اجرای matches با RE2 (بدون backtracking فاجعه‌بار) و تطبیق در هر جای مقدار"""
+    engine = RuleEngine()
+    slow = pd.DataFrame({'s': ['a' * 40 + 'b', 'aaa', None]})
+    # با re این الگو روی 'aaa...ab' زمان نمایی می‌گیرد
+    assert _violations(engine, slow, 'matches(s, "(a+)+$")') == [1, 0, 0]
+    assert _violations(engine, slow, 'matches(s, "a+b")') == [0, 1, 0]
+    assert _violations(engine, df, 'matches(email, "y\\\\.c")') == [0, 1, 0, 1]
+    # lookahead در RE2 نیست و با re اجرا می‌شود
+    assert _violations(engine, df, 'matches(email, "@(?=w)")') == [1, 1, 0, 0]
+
+def test_mixed_text_and_numeric_comparisons_are_rejected(df):
+    """تست خطا برای مقایسه ستون عددی با متن و ستون متنی با عدد"""
+    engine = RuleEngine()
+    for expression in ('a == "x"', 'email > 1', '"x" < b', 'col("first name") == b', '1 == "1"'):
+        assert 'between text and numeric' in next(engine.evaluate(df, [expression]))['error'], expression
+    assert _violations(engine, df, 'email == "bad"') == [1, 0, 0, 1]
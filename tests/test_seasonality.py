@@ -0,0 +1,23 @@
+# Location: datanex/tests/test_seasonality.py
+
+import numpy as np
+import pandas as pd
+from core.seasonality import SeasonalityDetector
+
+def test_detects_daily_period_on_irregular_timestamps():
+    """تست تشخیص دوره روزانه با زمان‌های ناقص و ستون بدون تناوب"""
+    rng = np.random.default_rng(0)
+    hours = np.arange(24 * 30)
+    timestamps = pd.Series(pd.Timestamp('2024-01-01') + pd.to_timedelta(hours, unit='h'))
+    df = pd.DataFrame({
+        'load': 10 * np.sin(2 * np.pi * hours / 24) + 0.05 * hours + rng.normal(size=len(hours)),
+        'noise': rng.normal(size=len(hours))
+    })
+    keep = rng.random(len(hours)) > 0.1
+
+    periods = SeasonalityDetector(top_k=1).detect(timestamps[keep], df[keep])
+
+    assert [period['column'] for period in periods] == ['load']
+    assert abs(periods[0]['period_seconds'] - 86400) < 3600
+    assert periods[0]['strength'] > 0.8
+    assert periods[0]['residual_variance'] < df['load'].var()
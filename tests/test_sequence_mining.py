@@ -0,0 +1,29 @@
+# Location: datanex/tests/test_sequence_mining.py
+
+from collections import Counter
+import numpy as np
+import pandas as pd
+from core.sequence_mining import frequent_ngrams
+
+def test_frequent_ngrams_match_brute_force_counts():
+    """تست شمارش n-gram ها در مقایسه با شمارش مستقیم پنجره‌ها"""
+    rng = np.random.default_rng(0)
+    series = pd.Series(rng.choice(['a', 'b', 'c', None], 500, p=[0.4, 0.3, 0.2, 0.1]))
+    values = series.dropna().tolist()
+
+    for n in (2, 3):
+        windows = [tuple(values[k:k + n]) for k in range(len(values) - n + 1)]
+        counts = Counter(windows)
+        first_seen = {window: windows.index(window) for window in counts}
+        expected = sorted((window for window in counts if counts[window] >= 2),
+                          key=lambda window: (-counts[window], first_seen[window]))[:5]
+
+        result = frequent_ngrams(series, n=n, top_k=5)
+        assert [(tuple(ngram), count) for ngram, count in result] == [(window, counts[window]) for window in expected]
+
+    assert frequent_ngrams(pd.Series(['x', 'y']), n=3) == []
+    assert frequent_ngrams(pd.Series(['x', 'y', 'z', 'w']), n=2) == []
+
+    # کلید n-gram در 64 بیت جا نمی‌شود (300 مقدار یکتا، n=8)
+    repeated = pd.Series(list(range(300)) * 3)
+    assert frequent_ngrams(repeated, n=8, top_k=2) == [(list(range(8)), 3), (list(range(1, 9)), 3)]
@@ -0,0 +1,27 @@
+# Location: datanex/tests/test_trends.py
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+from core.trends import TrendEngine
+
+def test_batched_regression_matches_linregress_on_timestamps():
+    """تست تطابق رگرسیون دسته‌ای با linregress روی زمان واقعی (به روز)"""
+    rng = np.random.default_rng(0)
+    timestamps = pd.Series(pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.uniform(0, 365, 500), unit='D'))
+    days = (timestamps - timestamps.min()).dt.total_seconds() / 86400
+    df = pd.DataFrame({'up': days * 2 + rng.normal(size=500), 'noise': rng.normal(size=500)})
+    df.loc[::9, 'noise'] = np.nan
+
+    fitted = TrendEngine().fit(timestamps, df)
+    for j, column in enumerate(df.columns):
+        mask = df[column].notna()
+        expected = stats.linregress(days[mask], df[column][mask])
+        assert np.isclose(fitted['slope'][0, j], expected.slope)
+        assert np.isclose(fitted['r'][0, j], expected.rvalue)
+        assert np.isclose(fitted['p_value'][0, j], expected.pvalue, atol=1e-12)
+
+    monthly = TrendEngine(window='M').fit(timestamps, df)
+    assert monthly['slope'].shape == (12, 2)
+    march = (timestamps >= '2024-03-01') & (timestamps < '2024-04-01')
+    assert np.isclose(monthly['slope'][2, 0], stats.linregress(days[march], df['up'][march]).slope)
@@ -0,0 +1,98 @@
+# Location: datanex/tests/test_validation.py
+
+import numpy as np
+import pandas as pd
+from core.validation import ValidationEngine
+
+def test_fused_scan_reports_every_check():
+    """تست همه بررسی‌ها در یک گذر در مقایسه با فیلتر مستقیم ردیف‌ها"""
+    rng = np.random.default_rng(0)
+    n = 2000
+    df = pd.DataFrame({
+        'age': rng.integers(-5, 130, n).astype(float),
+        'item_count': rng.integers(-3, 50, n),
+        'user_email': rng.choice(['a@b.com', 'bad', 'x@y.org', None], n),
+        'mixed': rng.choice(['1', '2.5', 'abc', None, '7'], n),
+        'value': np.r_[rng.normal(size=n - 3), [50.0, -40.0, 60.0]]
+    }, index=np.arange(n) * 2)
+    df.loc[df.index[::7], 'age'] = np.nan
+
+    issues, flags = ValidationEngine(max_workers=2).scan(df)
+
+    nulls = issues['null_values']
+    assert set(nulls) == {'age', 'user_email', 'mixed'}
+    assert nulls['age']['count'] == df['age'].isna().sum()
+    assert nulls['age']['indices'] == df.index[df['age'].isna()].tolist()[:100]
+
+    assert issues['outliers']['value']['outlier_values'][-3:] == [50.0, -40.0, 60.0]
+
+    ages = df['age'].dropna()
+    assert issues['ranges']['age']['out_of_range_count'] == ((ages < 0) | (ages > 120)).sum()
+    assert issues['data_types']['item_count']['negative_count'] == (df['item_count'] < 0).sum()
+
+    mixed = df['mixed'].dropna()
+    assert issues['data_types']['mixed']['non_numeric_count'] == (mixed == 'abc').sum()
+    assert issues['data_types']['mixed']['sample_values'] == ['abc']
+
+    emails = df['user_email'].dropna()
+    pattern = issues['patterns']['user_email']
+    assert pattern['invalid_count'] == (emails == 'bad').sum()
+    assert np.isclose(pattern['invalid_percentage'], (emails == 'bad').mean() * 100)
+    assert pattern['sample_invalid'] == ['bad'] * 10
+    assert 'value' not in issues['patterns'] and 'value' not in issues['null_values']
+
+def test_row_bitmap_covers_every_violating_row():
+    """تست bitmap ردیفی: شمارش دقیق هر خانواده بررسی و ماسک ردیف‌های خراب"""
+    rng = np.random.default_rng(1)
+    n = 50000
+    df = pd.DataFrame({
+        'age': rng.integers(-5, 130, n).astype(float),
+        'user_email': rng.choice(['a@b.com', 'bad', None], n),
+        'value': rng.normal(size=n)
+    }, index=np.zeros(n, dtype=int))
+
+    issues, flags = ValidationEngine().scan(df)
+    assert flags.dtype == np.uint8 and len(flags) == n
+
+    age = df['age'].to_numpy()
+    email = df['user_email'].to_numpy()
+    out_of_range = (age < 0) | (age > 120)
+    nulls = pd.isna(email)
+    invalid_email = email == 'bad'
+    outliers = (df['value'] < issues['outliers']['value']['lower_bound']) | \
+               (df['value'] > issues['outliers']['value']['upper_bound'])
+
+    counts = ValidationEngine.violation_counts(flags)
+    assert counts['ranges'] == out_of_range.sum()
+    assert counts['null_values'] == nulls.sum()
+    assert counts['patterns'] == invalid_email.sum()
+    assert counts['custom_rules'] == 0
+
+    expected = out_of_range | nulls | invalid_email | outliers.to_numpy()
+    assert np.array_equal(ValidationEngine.invalid_mask(flags), expected)
+    assert np.array_equal(ValidationEngine.invalid_mask(flags, ['null_values', 'ranges']), nulls | out_of_range)
+
+def test_clean_data_keeps_valid_outliers_by_default():
+    """تست اینکه ستون‌های چوله ولی معتبر با drop پیش‌فرض حذف نشوند"""
+    import asyncio
+    from core.validator import Validator
+
+    rng = np.random.default_rng(2)
+    n = 20000
+    df = pd.DataFrame({
+        'revenue': rng.lognormal(3, 1.5, n),
+        'visits': rng.pareto(1.5, n),
+        'latency': rng.exponential(2, n) ** 2,
+        'label': rng.choice(['a', 'b', None], n, p=[0.45, 0.45, 0.1])
+    })
+
+    validator = Validator()
+    results = asyncio.run(validator.validate_data(df))
+    assert results['violation_counts']['outliers'] > 0
+    assert results['invalid_count'] == df['label'].isna().sum()
+
+    cleaned = asyncio.run(validator.clean_data(df, results))
+    assert len(cleaned) == df['label'].notna().sum()
+
+    with_outliers = asyncio.run(validator.clean_data(df, results, checks=['null_values', 'outliers']))
+    assert len(with_outliers) < len(cleaned)
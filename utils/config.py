@@ -32,10 +32,35 @@ class Settings(BaseSettings):
     ALCHEMY_API_KEY: str = ""
     ETHEREUM_RPC: str = "https://eth-mainnet.g.alchemy.com/v2/"
     
+    # Embeddings
+    EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    EMBEDDING_CACHE_DIR: str = "data/cache/embeddings"
+    EMBEDDING_CACHE_DTYPE: str = "float16"  # float16, int8
+    EMBEDDING_CACHE_MAX_BYTES: int = 2 * 1024 ** 3  # 2 GB
+    
+    # Task artifacts
+    ARTIFACT_CACHE_DIR: str = "data/cache/artifacts"
+    ARTIFACT_CACHE_MAX_BYTES: int = 1024 ** 3  # 1 GB
+    
+    # Cross-file deduplication
+    FINGERPRINT_INDEX_DIR: str = "data/fingerprints"
+    FINGERPRINT_BLOOM_BITS: int = 2 ** 30  # 128 MB
+    FINGERPRINT_BLOOM_HASHES: int = 7
+    FINGERPRINT_STORE_MINHASH: bool = False
+    
+    # فایل‌های بزرگ‌تر از این مقدار خارج از حافظه dedup می‌شوند
+    DEDUP_IN_MEMORY_MAX_BYTES: int = 512 * 1024 ** 2  # 512 MB
+    
+    # بودجه زمانی پیش‌فرض آنالیز کامل (ثانیه)؛ کمتر از task_soft_time_limit
+    ANALYSIS_TIME_BUDGET: int = 2700
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
 
 settings = Settings()
 
+def get_settings() -> Settings:
+    return settings
+
 # Location: utils/config.py
@@ -7,9 +7,12 @@ from core.categorizer import categorizer
 from core.labeler import labeler
 from core.validator import validator
 from core.deduplicator import deduplicator
+from core.external_dedup import external_deduplicator
 from core.pattern_finder import pattern_finder
+from core.clustering import labels_to_parquet
 from core.scraper import scraper
 from core.blockchain_analyzer import blockchain_analyzer
+from utils.config import get_settings
 from utils.logger import log
 from models.file import FileStatus
 from models.analysis import AnalysisStatus
@@ -17,9 +20,14 @@ from database import async_session
 from sqlalchemy import select, update
 from models import File, Analysis, Task as TaskModel
 import asyncio
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+import os
+import time
+import tempfile
 import uuid
 
+settings = get_settings()
+
 @celery_app.task(bind=True)
 def process_file_upload(self, file_id: str, file_data: bytes, filename: str):
     """پردازش فایل آپلود شده"""
@@ -83,16 +91,17 @@ async def _process_file_upload_async(task, file_id: str, file_data: bytes, filen
         raise
 
 @celery_app.task(bind=True)
-def analyze_file_task(self, file_id: str):
+def analyze_file_task(self, file_id: str, time_budget: Optional[float] = None):
     """آنالیز کامل فایل"""
     try:
-        return asyncio.run(_analyze_file_async(self, file_id))
+        return asyncio.run(_analyze_file_async(self, file_id, time_budget))
     except Exception as e:
         log.error(f"Error analyzing file: {e}")
         return {'status': 'failed', 'error': str(e)}
 
-async def _analyze_file_async(task, file_id: str):
-    """آنالیز async فایل"""
+async def _analyze_file_async(task, file_id: str, time_budget: Optional[float] = None):
+    """آنالیز async فایل؛ یافتن الگوها باقی‌مانده time_budget را می‌گیرد"""
+    deadline = time.monotonic() + (time_budget or settings.ANALYSIS_TIME_BUDGET)
     try:
         # دریافت فایل از دیتابیس
         async with async_session() as session:
@@ -124,14 +133,34 @@ async def _analyze_file_async(task, file_id: str):
             # 3. اعتبارسنجی
             task.update_state(state='PROGRESS', meta={'step': 'validation', 'progress': 60})
             validation_result = await validator.validate_data(df)
+            # bitmap ردیفی فقط برای clean_data لازم است و در نتیجه JSON ذخیره نمی‌شود
+            validation_result.pop('row_flags', None)
             
             # 4. تشخیص تکراری
             task.update_state(state='PROGRESS', meta={'step': 'deduplication', 'progress': 75})
             duplicate_result = await deduplicator.find_duplicates(df, method='hybrid')
+            groups_artifact = await storage_service.upload_file(
+                deduplicator.to_parquet(duplicate_result),
+                f"duplicate_groups_{file_id}.parquet",
+                'application/vnd.apache.parquet'
+            )
+            duplicate_result = deduplicator.summarize(duplicate_result)
+            duplicate_result['groups_artifact'] = groups_artifact
+            
+            # مقایسه با فایل‌های قبلی و افزودن این فایل به ایندکس
+            duplicate_result['cross_file'] = await deduplicator.find_cross_file_duplicates(df, file_id=file_id)
+            await deduplicator.register_file(df, file_id, file_record.original_filename)
             
             # 5. یافتن الگوها
             task.update_state(state='PROGRESS', meta={'step': 'pattern_detection', 'progress': 90})
-            patterns = await pattern_finder.find_patterns(df)
+            patterns = await pattern_finder.find_patterns(df, time_budget=max(deadline - time.monotonic(), 0.0))
+            cluster_labels = patterns['clusters'].pop('labels', None)
+            if cluster_labels is not None:
+                patterns['clusters']['labels_artifact'] = await storage_service.upload_file(
+                    labels_to_parquet(cluster_labels),
+                    f"cluster_labels_{file_id}.parquet",
+                    'application/vnd.apache.parquet'
+                )
             
             # آپدیت فایل
             file_record.status = FileStatus.COMPLETED
@@ -236,15 +265,15 @@ async def _analyze_blockchain_address_async(task, address: str):
         raise
 
 @celery_app.task(bind=True)
-def clean_data_task(self, file_id: str, strategy: str = 'drop'):
+def clean_data_task(self, file_id: str, strategy: str = 'drop', checks: Optional[List[str]] = None):
     """پاکسازی داده"""
     try:
-        return asyncio.run(_clean_data_async(self, file_id, strategy))
+        return asyncio.run(_clean_data_async(self, file_id, strategy, checks))
     except Exception as e:
         log.error(f"Error cleaning data: {e}")
         return {'status': 'failed', 'error': str(e)}
 
-async def _clean_data_async(task, file_id: str, strategy: str):
+async def _clean_data_async(task, file_id: str, strategy: str, checks: Optional[List[str]] = None):
     """پاکسازی async داده"""
     try:
         # دریافت فایل
@@ -259,7 +288,8 @@ async def _clean_data_async(task, file_id: str, strategy: str):
             
             # دانلود و بارگذاری
             file_data = await storage_service.download_file(file_record.storage_path)
-            df = await file_handler.load_data(file_data, file_record.file_type)
+            # فایل تمیز شده مقادیر تاریخ را همان‌طور که در فایل اصلی هستند نگه می‌دارد
+            df = await file_handler.load_data(file_data, file_record.file_type, parse_dates=False)
             
             # اعتبارسنجی
             task.update_state(state='PROGRESS', meta={'step': 'validating'})
@@ -267,7 +297,7 @@ async def _clean_data_async(task, file_id: str, strategy: str):
             
             # پاکسازی
             task.update_state(state='PROGRESS', meta={'step': 'cleaning'})
-            cleaned_df = await validator.clean_data(df, validation_result, strategy)
+            cleaned_df = await validator.clean_data(df, validation_result, strategy, checks)
             
             # ذخیره فایل تمیز شده
             # تبدیل به CSV
@@ -314,15 +344,15 @@ async def _clean_data_async(task, file_id: str, strategy: str):
         raise
 
 @celery_app.task(bind=True)
-def remove_duplicates_task(self, file_id: str, method: str = 'hybrid', keep: str = 'first'):
+def remove_duplicates_task(self, file_id: str, method: str = 'hybrid', keep: str = 'first', options: Dict[str, Any] = None):
     """حذف تکراری‌ها"""
     try:
-        return asyncio.run(_remove_duplicates_async(self, file_id, method, keep))
+        return asyncio.run(_remove_duplicates_async(self, file_id, method, keep, options or {}))
     except Exception as e:
         log.error(f"Error removing duplicates: {e}")
         return {'status': 'failed', 'error': str(e)}
 
-async def _remove_duplicates_async(task, file_id: str, method: str, keep: str):
+async def _remove_duplicates_async(task, file_id: str, method: str, keep: str, options: Dict[str, Any]):
     """حذف async تکراری‌ها"""
     try:
         async with async_session() as session:
@@ -334,41 +364,81 @@ async def _remove_duplicates_async(task, file_id: str, method: str, keep: str):
             if not file_record:
                 raise ValueError(f"File {file_id} not found")
             
-            # دانلود و بارگذاری
-            file_data = await storage_service.download_file(file_record.storage_path)
-            df = await file_handler.load_data(file_data, file_record.file_type)
-            
-            # یافتن تکراری‌ها
-            task.update_state(state='PROGRESS', meta={'step': 'finding_duplicates'})
-            duplicate_result = await deduplicator.find_duplicates(df, method=method)
+            deduped_filename = f"deduped_{file_record.original_filename}"
             
-            # حذف تکراری‌ها
-            task.update_state(state='PROGRESS', meta={'step': 'removing_duplicates'})
-            cleaned_df = await deduplicator.remove_duplicates(df, duplicate_result, keep=keep)
+            use_external = (
+                method in external_deduplicator.SUPPORTED_METHODS
+                and file_record.file_size > settings.DEDUP_IN_MEMORY_MAX_BYTES
+            )
             
-            # ذخیره
-            import io
-            csv_buffer = io.BytesIO()
-            cleaned_df.to_csv(csv_buffer, index=False)
-            csv_data = csv_buffer.getvalue()
+            if use_external:
+                # فایل بزرگ: dedup خارج از حافظه روی دیسک
+                task.update_state(state='PROGRESS', meta={'step': 'external_deduplication'})
+                with tempfile.TemporaryDirectory() as work_dir:
+                    input_path = os.path.join(work_dir, 'input')
+                    output_path = os.path.join(work_dir, 'output.csv')
+                    
+                    await storage_service.download_to_path(file_record.storage_path, input_path)
+                    stats = await external_deduplicator.deduplicate(
+                        input_path, file_record.file_type, output_path, method=method, keep=keep, work_dir=work_dir
+                    )
+                    
+                    file_size = os.path.getsize(output_path)
+                    storage_path = await storage_service.upload_from_path(output_path, deduped_filename, 'text/csv')
+                
+                row_count = stats['rows_out']
+                column_count = file_record.column_count
+                duplicates_removed = stats['duplicates_removed']
+                duplicate_group_count = stats['duplicate_groups']
+                groups_artifact = None
             
-            deduped_filename = f"deduped_{file_record.original_filename}"
-            storage_path = await storage_service.upload_file(
-                csv_data,
-                deduped_filename,
-                'text/csv'
-            )
+            else:
+                # دانلود و بارگذاری
+                file_data = await storage_service.download_file(file_record.storage_path)
+                # مقادیر مانند مسیر out-of-core به صورت خام مقایسه و ذخیره می‌شوند
+                df = await file_handler.load_data(file_data, file_record.file_type, parse_dates=False)
+                
+                # یافتن تکراری‌ها
+                task.update_state(state='PROGRESS', meta={'step': 'finding_duplicates'})
+                duplicate_result = await deduplicator.find_duplicates(df, method=method, **options)
+                groups_artifact = await storage_service.upload_file(
+                    deduplicator.to_parquet(duplicate_result),
+                    f"duplicate_groups_{file_id}.parquet",
+                    'application/vnd.apache.parquet'
+                )
+                
+                # حذف تکراری‌ها
+                task.update_state(state='PROGRESS', meta={'step': 'removing_duplicates'})
+                cleaned_df = await deduplicator.remove_duplicates(df, duplicate_result, keep=keep)
+                
+                # ذخیره
+                import io
+                csv_buffer = io.BytesIO()
+                cleaned_df.to_csv(csv_buffer, index=False)
+                csv_data = csv_buffer.getvalue()
+                
+                file_size = len(csv_data)
+                storage_path = await storage_service.upload_file(
+                    csv_data,
+                    deduped_filename,
+                    'text/csv'
+                )
+                
+                row_count = len(cleaned_df)
+                column_count = len(cleaned_df.columns)
+                duplicates_removed = len(df) - len(cleaned_df)
+                duplicate_group_count = duplicate_result['group_count']
             
             new_file = File(
                 filename=deduped_filename,
                 original_filename=deduped_filename,
                 file_type=file_record.file_type,
-                file_size=len(csv_data),
+                file_size=file_size,
                 mime_type='text/csv',
                 storage_path=storage_path,
                 status=FileStatus.COMPLETED,
-                row_count=len(cleaned_df),
-                column_count=len(cleaned_df.columns)
+                row_count=row_count,
+                column_count=column_count
             )
             
             session.add(new_file)
@@ -381,8 +451,10 @@ async def _remove_duplicates_async(task, file_id: str, method: str, keep: str):
             'status': 'success',
             'original_file_id': file_id,
             'deduped_file_id': new_file_id,
-            'duplicates_removed': len(df) - len(cleaned_df),
-            'duplicate_groups': len(duplicate_result['duplicate_groups'])
+            'duplicates_removed': duplicates_removed,
+            'duplicate_groups': duplicate_group_count,
+            'groups_artifact': groups_artifact,
+            'out_of_core': use_external
         }
         
     except Exception as e: